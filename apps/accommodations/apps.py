@@ -4,3 +4,6 @@ class AccommodationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accommodations' 
     verbose_name = 'Gestão de Quartos'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registra os receivers)
@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.core.broker import get_broker
+
+from .models import Room
+
+
+class RoomStatusService:
+    """
+    Resumo de status dos quartos para o Dashboard (a página mais acessada).
+    Calculado com uma query agrupada + uma de movimentação, e guardado no cache.
+    O cache é invalidado pelos signals (apps/accommodations/signals.py).
+    """
+    CACHE_KEY = 'dashboard:room-status:{date}'
+    CACHE_TIMEOUT = 60  # Segurança extra caso algum update escape dos signals
+
+    # Canal SSE com os deltas de status (dashboard, agenda, governança)
+    EVENTS_CHANNEL = 'rooms'
+
+    @staticmethod
+    def _key(day=None):
+        return RoomStatusService.CACHE_KEY.format(date=day or timezone.now().date())
+
+    @staticmethod
+    def summary():
+        today = timezone.now().date()
+        key = RoomStatusService._key(today)
+        data = cache.get(key)
+        if data is None:
+            data = RoomStatusService.compute(today)
+            cache.set(key, data, RoomStatusService.CACHE_TIMEOUT)
+        return data
+
+    @staticmethod
+    def compute(today):
+        from apps.bookings.models import RoomAllocation
+
+        # 1 query: SELECT status, COUNT(*) ... GROUP BY status
+        by_status = dict(
+            Room.objects.order_by().values_list('status').annotate(total=Count('id'))
+        )
+        total_rooms = sum(by_status.values())
+        occupied = by_status.get(Room.Status.OCCUPIED, 0)
+
+        # 1 query: entradas e saídas do dia com COUNT condicional
+        movement = RoomAllocation.objects.filter(
+            Q(start_date=today) | Q(end_date=today)
+        ).aggregate(
+            check_ins=Count('id', filter=Q(start_date=today)),
+            check_outs=Count('id', filter=Q(end_date=today)),
+        )
+
+        return {
+            'total_rooms': total_rooms,
+            'occupied_rooms': occupied,
+            'cleaning_rooms': by_status.get(Room.Status.DIRTY, 0),
+            'available_rooms': by_status.get(Room.Status.AVAILABLE, 0),
+            'maintenance_rooms': by_status.get(Room.Status.MAINTENANCE, 0),
+            'occupancy_rate': int((occupied / total_rooms) * 100) if total_rooms else 0,
+            'check_ins': movement['check_ins'],
+            'check_outs': movement['check_outs'],
+        }
+
+    @staticmethod
+    def invalidate():
+        cache.delete(RoomStatusService._key())
+
+    @staticmethod
+    def rooms_changed(room_ids):
+        """
+        Quartos mudaram (status ou alocações): invalida o resumo e,
+        após o COMMIT, publica um delta por quarto para as telas abertas (SSE).
+        """
+        RoomStatusService.invalidate()
+        room_ids = list(room_ids)
+        if room_ids:
+            transaction.on_commit(lambda: RoomStatusService.publish(room_ids))
+
+    @staticmethod
+    def publish(room_ids):
+        # De novo após o COMMIT: um Dashboard pode ter recalculado o resumo
+        # entre a invalidação e o fim da transação
+        RoomStatusService.invalidate()
+        broker = get_broker()
+        for room in Room.objects.filter(pk__in=room_ids).only('id', 'number', 'status'):
+            broker.publish(RoomStatusService.EVENTS_CHANNEL, RoomStatusService.event(room))
+
+    @staticmethod
+    def label_rooms(rooms):
+        """
+        Preenche room.status_label para os cards do mapa de quartos.
+        Traduz cada status uma vez, em vez de um get_status_display() por card.
+        """
+        labels = {value: str(label) for value, label in Room.Status.choices}
+        rooms = list(rooms)
+        for room in rooms:
+            room.status_label = labels.get(room.status, room.status)
+        return rooms
+
+    @staticmethod
+    def event(room):
+        """Delta enviado aos navegadores (evento roomStatusChanged)."""
+        return {
+            'id': str(room.pk),
+            'number': room.number,
+            'status': room.status,
+            'label': str(room.get_status_display()),
+        }
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_fsm.signals import post_transition
+
+from apps.bookings.models import RoomAllocation
+
+from .models import Room
+from .services import RoomStatusService
+
+
+@receiver(post_transition, sender=Room)
+def room_transitioned(sender, instance, name, source, target, **kwargs):
+    """check_in, check_out, finish_cleaning, etc."""
+    RoomStatusService.invalidate()
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, **kwargs):
+    RoomStatusService.rooms_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, **kwargs):
+    RoomStatusService.invalidate()
+
+
+@receiver(post_save, sender=RoomAllocation)
+@receiver(post_delete, sender=RoomAllocation)
+def allocation_changed(sender, instance, **kwargs):
+    """Entradas/saídas do dia e a agenda dependem das alocações."""
+    RoomStatusService.rooms_changed([instance.room_id])
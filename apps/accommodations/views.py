@@ -1,11 +1,17 @@
+import json
+
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django_fsm import TransitionNotAllowed
 from .models import Room
+from .services import RoomStatusService
 from apps.bookings.models import RoomAllocation
+from apps.core.broker import get_broker
 
 @login_required
 def housekeeping_dashboard(request):
@@ -14,37 +20,63 @@ def housekeeping_dashboard(request):
     Mostra apenas quartos SUJOS ou em MANUTENÇÃO.
     """
     # Pega apenas quartos sujos, ordenados por prioridade (térreo primeiro, por exemplo)
-    dirty_rooms = Room.objects.filter(status='DIRTY').order_by('floor', 'number')
+    dirty_rooms = Room.objects.filter(status='DIRTY').select_related('category').order_by('floor', 'number')
 
     context = {
         'dirty_rooms': dirty_rooms,
-        'dirty_count': dirty_rooms.count()
+        'dirty_count': len(dirty_rooms)
     }
+
+    # Um quarto ficou sujo em outra tela (SSE): só a lista é re-renderizada
+    if request.headers.get('HX-Target') == 'housekeeping-list':
+        return render(request, 'accommodations/housekeeping/partials/room_list.html', {**context, 'live': True})
+
     return render(request, 'accommodations/housekeeping/dashboard.html', context)
 
+
 @login_required
-@require_POST
-def clean_room_action(request, room_id):
+def room_card(request, room_id):
     """
-    Ação de limpar o quarto. Pode ser chamada do Dashboard ou do Modal.
+    Card de um único quarto, usado pelas atualizações ao vivo.
+    ?board=housekeeping devolve o card da Governança (vazio se o quarto não está mais sujo).
     """
-    room = get_object_or_404(Room, pk=room_id)
+    if request.GET.get('board') == 'housekeeping':
+        room = get_object_or_404(Room.objects.select_related('category'), pk=room_id)
+        return render(request, 'accommodations/housekeeping/partials/room_card.html', {
+            'room': room,
+            'dirty_count': RoomStatusService.summary()['cleaning_rooms'],
+            'live': True,
+        })
 
-    if room.status == 'DIRTY':
-        room.status = 'AVAILABLE'
-        room.save()
-        messages.success(request, f"Quarto {room.number} liberado para venda!")
-    else:
-        messages.warning(request, f"O Quarto {room.number} já estava limpo ou ocupado.")
+    room = get_object_or_404(Room.objects.only('id', 'number', 'status'), pk=room_id)
+    RoomStatusService.label_rooms([room])
+    return render(request, 'core/partials/room_card.html', {'room': room})
+
+
+@login_required
+async def room_events_stream(request):
+    """
+    Server-Sent Events com os deltas de status dos quartos
+    (Dashboard, Agenda e Governança se atualizam sem recarregar a página).
 
-    # Se a requisição veio da página de Governança (Dashboard de Limpeza)
-    if 'housekeeping' in request.path or request.headers.get('HX-Target') == 'housekeeping-list':
-        # Remove o card da lista usando HTMX
-        return HttpResponse(status=200)
+    Exige o servidor ASGI (uvicorn): num worker WSGI a conexão prenderia
+    uma thread para sempre, então respondemos 204 e o navegador desiste.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
 
-    # Se veio do Modal (Recepcionista limpando), atualiza o modal
-    return room_details_modal(request, room.id)
+    async def stream():
+        yield 'retry: 5000\n\n'
+        async for event in get_broker().listen(RoomStatusService.EVENTS_CHANNEL):
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f'event: room\ndata: {json.dumps(event)}\n\n'
 
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Nginx não pode bufferizar o stream
+    return response
 
 
 @login_required
@@ -53,7 +85,7 @@ def room_details_modal(request, room_id):
     Abre o modal do quarto.
     Descobre se tem alguma alocação (hóspede) ATIVA para hoje.
     """
-    room = get_object_or_404(Room, pk=room_id)
+    room = get_object_or_404(Room.objects.select_related('category'), pk=room_id)
     today = timezone.now().date()
 
     # Busca quem está no quarto HOJE
@@ -63,7 +95,9 @@ def room_details_modal(request, room_id):
         start_date__lte=today,
         end_date__gte=today,
         booking__status__in=['CONFIRMED', 'CHECKED_IN']
-    ).first()
+    ).select_related('booking__guest').first()
+    if allocation:
+        allocation.room = room  # Reaproveita o quarto já carregado (sem buscar de novo)
 
     return render(request, 'accommodations/modals/room_details.html', {
         'room': room,
@@ -71,11 +105,29 @@ def room_details_modal(request, room_id):
         'today': today
     })
 
+
+def room_modal_response(request, room_id):
+    """
+    Resposta das ações do modal (check-in, check-out, limpeza): re-renderiza
+    o modal com o novo estado em vez de recarregar a página (HX-Refresh).
+    O card do quarto na tela de quem agiu é atualizado pelo evento
+    roomStatusChanged; as outras telas recebem o mesmo delta via SSE.
+    """
+    response = room_details_modal(request, room_id)
+    response['HX-Retarget'] = '#booking-modal-container'
+    response['HX-Reswap'] = 'innerHTML'
+    response['HX-Trigger'] = json.dumps({
+        'roomStatusChanged': RoomStatusService.event(Room.objects.get(pk=room_id))
+    })
+    return response
+
+
 @login_required
 @require_POST
 def clean_room_action(request, room_id):
     """
     Camareira clica em "Confirmar Limpeza".
+    Pode ser chamada da Governança (card) ou do Modal (recepção).
     """
     room = get_object_or_404(Room, pk=room_id)
 
@@ -84,10 +136,15 @@ def clean_room_action(request, room_id):
         room.finish_cleaning()
         room.save()
         messages.success(request, f"Quarto {room.number} marcado como LIMPO.")
+    except TransitionNotAllowed:
+        messages.warning(request, f"O Quarto {room.number} já estava limpo ou ocupado.")
 
-        # O comando HX-Refresh faz a página recarregar para atualizar
-        # os contadores do topo (Livres/Sujos) e a cor do card.
-        return HttpResponse(status=204, headers={'HX-Refresh': 'true'})
+    # Governança: o card sai da lista e o contador é atualizado out-of-band
+    if request.headers.get('HX-Target', '').startswith('room-card-'):
+        return render(request, 'accommodations/housekeeping/partials/room_card.html', {
+            'room': room,
+            'dirty_count': RoomStatusService.summary()['cleaning_rooms'],
+            'live': True,
+        })
 
-    except Exception as e:
-        return HttpResponse(f"Erro: {str(e)}", status=400)
+    return room_modal_response(request, room.id)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking, RoomAllocation
+from .models import Booking, NightAudit, RoomAllocation
 from apps.financials.models import Transaction
 
 class RoomAllocationInline(admin.TabularInline):
@@ -38,6 +38,10 @@ class BookingAdmin(admin.ModelAdmin):
 
     inlines = [RoomAllocationInline, TransactionInline]
 
+    def get_queryset(self, request):
+        # Valores vêm do ledger gravado na reserva: nenhuma agregação por linha
+        return super().get_queryset(request).select_related('guest')
+
     def id_short(self, obj):
         return str(obj.id)[:8]
     id_short.short_description = "ID"
@@ -48,6 +52,16 @@ class BookingAdmin(admin.ModelAdmin):
 
     def amount_paid(self, obj):
         return f"R$ {obj.amount_paid}"
+    amount_paid.admin_order_field = 'paid_total'
 
     def balance_due(self, obj):
         return f"R$ {obj.balance_due}"
+    balance_due.admin_order_field = 'balance'
+
+
+@admin.register(NightAudit)
+class NightAuditAdmin(admin.ModelAdmin):
+    list_display = ('date', 'category', 'rooms_total', 'rooms_out_of_order', 'rooms_sold', 'room_revenue')
+    list_filter = ('category',)
+    date_hierarchy = 'date'
+    readonly_fields = ('date', 'category', 'rooms_total', 'rooms_out_of_order', 'rooms_sold', 'room_revenue')
@@ -0,0 +1,150 @@
+"""
+Motor de Disponibilidade.
+
+Centraliza a pergunta "o quarto X está livre em [entrada, saída)?".
+Toda checagem de overbooking deve passar por aqui.
+
+- PostgreSQL: usa daterange(start_date, end_date, '[)') com o operador &&,
+  que casa com a EXCLUSION CONSTRAINT (GiST) criada na migração 0005.
+- SQLite (dev local): cai no range scan clássico, servido pelo índice
+  composto (room, start_date, end_date).
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import BooleanField, Exists, F, Func, OuterRef, Value
+
+from apps.accommodations.models import Room
+
+from .models import RoomAllocation
+
+
+class DateRangeOverlaps(Func):
+    """
+    daterange(start_date, end_date, '[)') && daterange(inicio, fim, '[)')
+    Intervalo semiaberto: a saída de um hóspede pode coincidir com a entrada do próximo.
+    """
+    template = "daterange(%(expressions)s, '[)') && daterange(%%s, %%s, '[)')"
+    output_field = BooleanField()
+
+    def __init__(self, start_date, end_date):
+        super().__init__(F('start_date'), F('end_date'))
+        self.range = (start_date, end_date)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return sql, (*params, *self.range)
+
+
+class AvailabilityService:
+    @staticmethod
+    def overlapping(start_date, end_date):
+        """
+        Alocações ATIVAS que cruzam o intervalo [start_date, end_date).
+        (Reservas canceladas ou finalizadas não bloqueiam o quarto.)
+        """
+        allocations = RoomAllocation.objects.filter(is_active=True)
+
+        if connection.vendor == 'postgresql':
+            return allocations.filter(DateRangeOverlaps(start_date, end_date))
+
+        return allocations.filter(
+            start_date__lt=end_date,  # Começa antes de eu sair
+            end_date__gt=start_date   # Termina depois de eu chegar
+        )
+
+    @staticmethod
+    def conflicts(room, start_date, end_date, exclude_id=None):
+        """Alocações que impedem reservar `room` no período."""
+        conflicts = AvailabilityService.overlapping(start_date, end_date).filter(room=room)
+        if exclude_id:
+            conflicts = conflicts.exclude(id=exclude_id)  # Ignora a si mesmo (edição)
+        return conflicts
+
+    @staticmethod
+    def lock_room(room_id):
+        """
+        Trava a linha do quarto até o fim da transação (SELECT ... FOR UPDATE).
+        Serializa quem grava alocações no MESMO quarto, inclusive quando ainda não
+        existe alocação nenhuma para travar. Precisa de transação aberta.
+        Já traz a categoria (preço da diária), sem travá-la.
+        """
+        return Room.objects.select_for_update(of=('self',)).select_related('category').get(pk=room_id)
+
+    @staticmethod
+    def lock_rooms(room_ids):
+        """Como lock_room, para vários quartos de uma vez ({pk: quarto}). Ordem fixa evita deadlock."""
+        rooms = Room.objects.select_for_update(of=('self',)).select_related('category')
+        return {room.pk: room for room in rooms.filter(pk__in=room_ids).order_by('pk')}
+
+    @staticmethod
+    def batch_conflicts(allocations):
+        """
+        Conflitos de um lote de alocações novas, com as ativas do banco e entre si.
+        Uma única query para o lote inteiro (quartos do lote dentro da janela de datas);
+        a sobreposição exata é conferida em memória.
+        Devolve [(alocação do lote, alocação que bloqueia)].
+        """
+        by_room = defaultdict(list)
+        for allocation in allocations:
+            by_room[allocation.room_id].append(allocation)
+        if not by_room:
+            return []
+
+        start = min(a.start_date for a in allocations)
+        end = max(a.end_date for a in allocations)
+        existing = defaultdict(list)
+        for allocation in AvailabilityService.overlapping(start, end).filter(
+            room__in=list(by_room)
+        ).select_related('booking__guest'):
+            existing[allocation.room_id].append(allocation)
+
+        found = []
+        for room_id, batch in by_room.items():
+            batch.sort(key=lambda a: a.start_date)
+            for i, allocation in enumerate(batch):
+                for other in existing[room_id]:
+                    if other.start_date < allocation.end_date and other.end_date > allocation.start_date:
+                        found.append((allocation, other))
+                # Dentro do lote: basta uma das duas bloquear o quarto
+                for other in batch[i + 1:]:
+                    if other.start_date >= allocation.end_date:
+                        break
+                    if allocation.is_active or other.is_active:
+                        found.append((other, allocation))
+        return found
+
+    @staticmethod
+    def is_room_free(room, start_date, end_date, exclude_id=None):
+        """Uma única query indexada (EXISTS)."""
+        return not AvailabilityService.conflicts(room, start_date, end_date, exclude_id).exists()
+
+    @staticmethod
+    def free_rooms(start_date, end_date, rooms=None):
+        """
+        Quartos sem nenhuma alocação ativa no período.
+        Anti-join (NOT EXISTS) em uma única query.
+        """
+        rooms = Room.objects.all() if rooms is None else rooms
+        busy = AvailabilityService.overlapping(start_date, end_date).filter(room=OuterRef('pk'))
+        return rooms.filter(~Exists(busy))
+
+    @staticmethod
+    def search(start_date, end_date, adults=1, children=0, category=None):
+        """
+        Busca de quartos livres para o balcão (uma query set-based).
+        Filtra por capacidade da categoria e já traz o preço da diária.
+        """
+        rooms = Room.objects.filter(
+            category__max_adults__gte=adults,
+            category__max_children__gte=children,
+        ).exclude(status=Room.Status.MAINTENANCE)
+
+        if category:
+            rooms = rooms.filter(category=category)
+
+        return AvailabilityService.free_rooms(start_date, end_date, rooms).select_related(
+            'category'
+        ).annotate(
+            price=F('category__base_price')
+        ).order_by('price', 'number')
@@ -2,7 +2,7 @@ from django import forms
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.guests.models import Guest
-from apps.accommodations.models import Room # <--- Importe o Room
+from apps.accommodations.models import Room, RoomCategory # <--- Importe o Room
 
 class QuickBookingForm(forms.Form):
     room = forms.ModelChoiceField(
@@ -29,6 +29,25 @@ class QuickBookingForm(forms.Form):
         widget=forms.DateInput(attrs={'type': 'date', 'class': 'input input-bordered w-full'})
     )
 
+    # O <select> de hóspedes mostra só os mais recentes (e o já escolhido);
+    # os demais chegam pela busca (guest_options). A validação vale para todos.
+    GUEST_CHOICES = 20
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Callable: só consulta ao renderizar (um POST válido não monta o select)
+        self.fields['guest'].choices = self._guest_choices
+
+    def _guest_choices(self):
+        guests = list(Guest.objects.order_by('-created_at')[:self.GUEST_CHOICES])
+        selected = self['guest'].value()
+        if selected and all(str(guest.pk) != str(selected) for guest in guests):
+            try:
+                guests = [*Guest.objects.filter(pk=selected), *guests]
+            except ValidationError:
+                pass  # Valor inválido: o próprio campo acusa o erro
+        return [('', self.fields['guest'].empty_label), *((guest.pk, str(guest)) for guest in guests)]
+
     def clean(self):
         cleaned_data = super().clean()
         start = cleaned_data.get('start_date')
@@ -41,3 +60,52 @@ class QuickBookingForm(forms.Form):
                 self.add_error('end_date', "A data de saída deve ser posterior à entrada.")
 
         return cleaned_data
+
+
+class AvailabilitySearchForm(forms.Form):
+    """
+    Filtros da busca de quartos livres (balcão e API).
+    """
+    start_date = forms.DateField(
+        label="Entrada",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'input input-bordered w-full'})
+    )
+
+    end_date = forms.DateField(
+        label="Saída",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'input input-bordered w-full'})
+    )
+
+    adults = forms.IntegerField(
+        label="Adultos",
+        min_value=1,
+        initial=1,
+        widget=forms.NumberInput(attrs={'class': 'input input-bordered w-full', 'min': '1'})
+    )
+
+    children = forms.IntegerField(
+        label="Crianças",
+        min_value=0,
+        initial=0,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'input input-bordered w-full', 'min': '0'})
+    )
+
+    category = forms.ModelChoiceField(
+        queryset=RoomCategory.objects.all().order_by('name'),
+        label="Categoria",
+        required=False,
+        empty_label="Todas",
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start_date')
+        end = cleaned_data.get('end_date')
+
+        if start and end and end <= start:
+            self.add_error('end_date', "A data de saída deve ser posterior à entrada.")
+
+        cleaned_data['children'] = cleaned_data.get('children') or 0
+        return cleaned_data
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.bookings.services import NightAuditService
+
+
+class Command(BaseCommand):
+    help = (
+        "Auditoria noturna: grava ocupação e receita de diárias por categoria em NightAudit. "
+        "Agende no fim do dia (cron); sem opções fotografa a noite de hoje. "
+        "Use --start/--end para preencher ou refazer um período."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Primeira noite (AAAA-MM-DD).")
+        parser.add_argument('--end', help="Última noite, inclusive (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start_date = self._parse(options['start'], '--start') or today
+        end_date = self._parse(options['end'], '--end') or (today if options['start'] else start_date)
+        if end_date < start_date:
+            raise CommandError("--end deve ser igual ou posterior a --start.")
+
+        # Uma leitura set-based para o período inteiro (mesmo um backfill de anos)
+        rows = NightAuditService.run(start_date, end_date)
+
+        nights = (end_date - start_date).days + 1
+        self.stdout.write(self.style.SUCCESS(f"{nights} noite(s) auditada(s), {rows} linha(s) gravada(s)."))
+
+    def _parse(self, value, option):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if not parsed:
+            raise CommandError(f"{option}: data inválida '{value}', use AAAA-MM-DD.")
+        return parsed
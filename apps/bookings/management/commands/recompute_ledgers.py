@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.bookings.models import Booking
+from apps.guests.models import Guest
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o ledger desnormalizado das reservas (diárias, consumo, pago e saldo) "
+        "a partir de RoomAllocation e Transaction, e depois o total gasto dos hóspedes "
+        "(soma do pago nas reservas). Use --check para apenas auditar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Apenas verifica divergências, sem gravar nada (sai com erro se houver drift).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Quantidade de reservas/hóspedes corrigidos por lote (bulk_update).",
+        )
+
+    def handle(self, *args, **options):
+        expressions = Booking.ledger_expressions()
+
+        # Anota os valores "reais" ao lado dos armazenados e filtra só quem divergiu
+        live = {f"live_{name}": expr for name, expr in expressions.items()}
+        drift_filter = Q()
+        for name in Booking.LEDGER_FIELDS:
+            drift_filter |= ~Q(**{name: F(f"live_{name}")})
+
+        drifted = Booking.objects.annotate(**live).filter(drift_filter).order_by('pk')
+        # Total gasto do hóspede sai do ledger das reservas: só confere depois de corrigi-lo
+        guests = Guest.objects.annotate(
+            live_total_spent=Guest.stay_expressions()['total_spent']
+        ).exclude(total_spent=F('live_total_spent')).order_by('pk')
+
+        if options['check']:
+            total = drifted.count()
+            for booking in drifted[:20]:
+                self.stdout.write(
+                    f"  {str(booking.id)[:8]}: saldo gravado R$ {booking.balance} "
+                    f"x real R$ {booking.live_balance}"
+                )
+            guest_total = guests.count()
+            for guest in guests[:20]:
+                self.stdout.write(
+                    f"  hóspede {str(guest.id)[:8]}: total gasto gravado R$ {guest.total_spent} "
+                    f"x real R$ {guest.live_total_spent}"
+                )
+            if total or guest_total:
+                raise CommandError(
+                    f"{total} reserva(s) com ledger divergente, "
+                    f"{guest_total} hóspede(s) com total gasto divergente."
+                )
+            self.stdout.write(self.style.SUCCESS("Ledger consistente."))
+            return
+
+        batch_size = options['batch_size']
+        fixed = self._fix(drifted, Booking, Booking.LEDGER_FIELDS, batch_size)
+        fixed_guests = self._fix(guests, Guest, ['total_spent'], batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{fixed} reserva(s) e {fixed_guests} hóspede(s) recalculado(s)."
+        ))
+
+    def _fix(self, drifted, model, fields, batch_size):
+        """Copia os valores live_* para os campos gravados, em lotes."""
+        batch = []
+        fixed = 0
+        for obj in drifted.iterator(chunk_size=batch_size):
+            for name in fields:
+                setattr(obj, name, getattr(obj, f"live_{name}"))
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                fixed += self._flush(model, batch, fields)
+                batch = []
+        if batch:
+            fixed += self._flush(model, batch, fields)
+        return fixed
+
+    def _flush(self, model, batch, fields):
+        with transaction.atomic():
+            model.objects.bulk_update(batch, fields)
+        return len(batch)
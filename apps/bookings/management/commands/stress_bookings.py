@@ -0,0 +1,238 @@
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.accommodations.models import Room, RoomCategory
+from apps.bookings.availability import AvailabilityService
+from apps.bookings.models import Booking, RoomAllocation
+from apps.bookings.services import create_booking_safely
+from apps.guests.models import Guest
+
+# Tempo gasto esperando o lock do quarto na tentativa atual (por thread/processo)
+_lock_wait = threading.local()
+
+
+@contextmanager
+def timed_room_locks():
+    """Cronometra cada AvailabilityService.lock_room enquanto o bloco roda."""
+    original = AvailabilityService.lock_room
+
+    def lock_room(room_id):
+        started = time.perf_counter()
+        try:
+            return original(room_id)
+        finally:
+            _lock_wait.seconds = getattr(_lock_wait, 'seconds', 0) + time.perf_counter() - started
+
+    AvailabilityService.lock_room = staticmethod(lock_room)
+    try:
+        yield
+    finally:
+        AvailabilityService.lock_room = staticmethod(original)
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de estresse do motor de reservas: vários workers (threads ou processos) "
+        "reservando os mesmos poucos quartos nas mesmas datas ao mesmo tempo, via "
+        "create_booking_safely. Mede vazão, latência e espera pelo lock do quarto e confere "
+        "que nenhuma alocação ativa se sobrepõe. Cria quartos e hóspede temporários e apaga "
+        "tudo no final. Rode contra o Postgres (no SQLite as escritas são serializadas pelo lock do arquivo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help="Workers simultâneos.")
+        parser.add_argument('--attempts', type=int, default=10, help="Reservas tentadas por worker.")
+        parser.add_argument('--rooms', type=int, default=2, help="Quartos disputados.")
+        parser.add_argument('--days', type=int, default=14, help="Janela de datas disputada (dias).")
+        parser.add_argument('--max-nights', type=int, default=3, help="Noites por reserva (1 a N).")
+        parser.add_argument('--processes', action='store_true', help="Usa processos em vez de threads.")
+        parser.add_argument('--seed', type=int, default=42, help="Semente dos quartos/datas sorteados.")
+        parser.add_argument(
+            '--max-error-rate', type=float, default=0.2,
+            help="Fração máxima de tentativas com erro de lock (acima disso o lock não foi testado).",
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        attempts = options['attempts']
+        if min(workers, attempts, options['rooms'], options['days'], options['max_nights']) < 1:
+            raise CommandError("Use valores positivos.")
+
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"Banco {connection.vendor}: os workers vão disputar o lock do arquivo; "
+                "erros de 'database is locked' são contados à parte."
+            ))
+
+        category = RoomCategory.objects.create(name="[estresse] Categoria", base_price=Decimal('100.00'))
+        rooms = [
+            Room.objects.create(number=f"ST{i:03d}", category=category)
+            for i in range(options['rooms'])
+        ]
+        guest = Guest.objects.create(name="Teste de Estresse (Reservas)", phone="0")
+        first_day = timezone.localdate() + timedelta(days=1)
+
+        def attempt_plan(index):
+            """Sequência de (quarto, entrada, saída) do worker: reprodutível pela --seed."""
+            rng = random.Random(options['seed'] * 1000 + index)
+            for _ in range(attempts):
+                start = first_day + timedelta(days=rng.randrange(options['days']))
+                nights = rng.randint(1, options['max_nights'])
+                yield rng.choice(rooms), start, start + timedelta(days=nights)
+
+        try:
+            with timed_room_locks():
+                if options['processes']:
+                    results, elapsed = self._run_processes(workers, attempt_plan, guest)
+                else:
+                    results, elapsed = self._run_threads(workers, attempt_plan, guest)
+            recorded, overlaps = self._check(rooms)
+        finally:
+            Booking.objects.filter(guest=guest).delete()
+            guest.delete()
+            for room in rooms:
+                room.delete()
+            category.delete()
+
+        self._report(results, elapsed, workers, attempts, options['processes'])
+
+        created = sum(r['created'] for r in results)
+        errors = sum(r['errors'] for r in results)
+        error_rate = errors / (workers * attempts)
+        problems = []
+        if overlaps:
+            problems.append(f"{overlaps} alocações ativas sobrepostas (overbooking)")
+        if recorded != created:
+            problems.append(f"{recorded} alocações gravadas para {created} reservas confirmadas")
+        if created == 0:
+            problems.append("nenhuma reserva criada")
+        # Com quase tudo dando erro (ex.: todo mundo estourando o timeout do lock), "nenhum
+        # quarto reservado duas vezes" vale trivialmente: o lock não foi realmente testado
+        if error_rate > options['max_error_rate']:
+            problems.append(
+                f"{error_rate:.0%} das tentativas com erro de lock (máx. {options['max_error_rate']:.0%})"
+            )
+
+        if problems:
+            raise CommandError("Falhou: " + "; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("OK: nenhum quarto reservado duas vezes."))
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _work(plan, guest, barrier):
+        """Um worker: tenta as reservas do plano e devolve contagens e tempos (ms)."""
+        stats = {'created': 0, 'refused': 0, 'errors': 0, 'latency': [], 'lock_wait': []}
+        try:
+            barrier.wait()  # Todos começam juntos: máximo de disputa
+            for room, start, end in plan:
+                _lock_wait.seconds = 0
+                started = time.perf_counter()
+                try:
+                    create_booking_safely(guest, room, start, end, None)
+                    outcome = 'created'
+                except ValidationError:
+                    outcome = 'refused'
+                except OperationalError:
+                    outcome = 'errors'
+                stats[outcome] += 1
+                stats['latency'].append((time.perf_counter() - started) * 1000)
+                stats['lock_wait'].append(_lock_wait.seconds * 1000)
+        finally:
+            connections.close_all()
+        return stats
+
+    def _run_threads(self, workers, attempt_plan, guest):
+        results = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(workers)
+
+        def worker(index):
+            stats = self._work(attempt_plan(index), guest, barrier)
+            with lock:
+                results.append(stats)
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return results, time.perf_counter() - started
+
+    def _run_processes(self, workers, attempt_plan, guest):
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(workers)
+        queue = context.Queue()
+
+        def worker(index):
+            queue.put(self._work(attempt_plan(index), guest, barrier))
+
+        # Cada processo abre a própria conexão: nada de socket herdado do pai
+        connections.close_all()
+        started = time.perf_counter()
+        pool = [context.Process(target=worker, args=(i,)) for i in range(workers)]
+        for process in pool:
+            process.start()
+        results = [queue.get() for _ in pool]
+        for process in pool:
+            process.join()
+        return results, time.perf_counter() - started
+
+    @staticmethod
+    def _check(rooms):
+        """Alocações gravadas e quantas se sobrepõem a outra ativa do mesmo quarto."""
+        allocations = RoomAllocation.objects.filter(room__in=rooms, is_active=True)
+        clash = RoomAllocation.objects.filter(
+            room=OuterRef('room'),
+            is_active=True,
+            start_date__lt=OuterRef('end_date'),
+            end_date__gt=OuterRef('start_date'),
+        ).exclude(pk=OuterRef('pk'))
+        return allocations.count(), allocations.filter(Exists(clash)).count()
+
+    def _report(self, results, elapsed, workers, attempts, processes):
+        created = sum(r['created'] for r in results)
+        refused = sum(r['refused'] for r in results)
+        errors = sum(r['errors'] for r in results)
+        latency = sorted(ms for r in results for ms in r['latency'])
+        lock_wait = sorted(ms for r in results for ms in r['lock_wait'])
+        total = len(latency)
+
+        def p95(values):
+            return values[min(len(values) - 1, int(len(values) * 0.95))] if values else 0
+
+        kind = 'processos' if processes else 'threads'
+        self.stdout.write(
+            f"{workers} {kind} x {attempts} tentativas em {elapsed:.2f}s: "
+            f"{created} reservas, {refused} recusadas (quarto ocupado), "
+            f"{errors} erros de lock ({errors / total if total else 0:.0%})."
+        )
+        self.stdout.write(
+            f"Vazão: {total / elapsed:.1f} tentativas/s, {created / elapsed:.1f} reservas/s."
+        )
+        if latency:
+            self.stdout.write(
+                f"Latência por tentativa: mediana {statistics.median(latency):.1f} ms, "
+                f"p95 {p95(latency):.1f} ms, máx {latency[-1]:.1f} ms."
+            )
+            share = sum(lock_wait) / sum(latency) if sum(latency) else 0
+            self.stdout.write(
+                f"Espera pelo lock do quarto: mediana {statistics.median(lock_wait):.1f} ms, "
+                f"p95 {p95(lock_wait):.1f} ms, máx {lock_wait[-1]:.1f} ms ({share:.0%} da latência)."
+            )
+
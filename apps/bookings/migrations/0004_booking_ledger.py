@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:32
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    """Preenche o ledger das reservas já existentes."""
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomAllocation = apps.get_model('bookings', 'RoomAllocation')
+    Transaction = apps.get_model('financials', 'Transaction')
+
+    rooms = dict(
+        RoomAllocation.objects.values('booking').annotate(total=Sum('agreed_price'))
+        .values_list('booking', 'total')
+    )
+    by_type = {}
+    for booking_id, kind, total in (
+        Transaction.objects.filter(booking__isnull=False, transaction_type__in=['INCOME', 'CONSUMPTION'])
+        .values('booking', 'transaction_type').annotate(total=Sum('amount'))
+        .values_list('booking', 'transaction_type', 'total')
+    ):
+        by_type[(booking_id, kind)] = total or Decimal('0.00')
+
+    batch = []
+    for booking in Booking.objects.all().iterator(chunk_size=1000):
+        booking.rooms_total = rooms.get(booking.pk) or Decimal('0.00')
+        booking.consumption_total = by_type.get((booking.pk, 'CONSUMPTION'), Decimal('0.00'))
+        booking.paid_total = by_type.get((booking.pk, 'INCOME'), Decimal('0.00'))
+        booking.balance = booking.rooms_total + booking.consumption_total - booking.paid_total
+        batch.append(booking)
+    Booking.objects.bulk_update(
+        batch, ['rooms_total', 'consumption_total', 'paid_total', 'balance'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_alter_booking_status'),
+        ('financials', '0005_alter_transaction_transaction_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Saldo Devedor'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='consumption_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total de Consumo'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='paid_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total Pago'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='rooms_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total de Diárias'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
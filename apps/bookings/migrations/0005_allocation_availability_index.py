@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+def sync_is_active(apps, schema_editor):
+    """Alocações de reservas canceladas/finalizadas não bloqueiam mais o quarto."""
+    RoomAllocation = apps.get_model('bookings', 'RoomAllocation')
+    RoomAllocation.objects.filter(
+        booking__status__in=['CANCELED', 'COMPLETED']
+    ).update(is_active=False)
+
+
+def check_overlaps(apps, schema_editor):
+    """
+    Antes da constraint: alocações ativas sobrepostas no mesmo quarto (o código antigo
+    permitia) fariam o ALTER TABLE falhar no meio. Aborta listando o que resolver.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    RoomAllocation = apps.get_model('bookings', 'RoomAllocation')
+    clash = RoomAllocation.objects.filter(
+        room=models.OuterRef('room'),
+        is_active=True,
+        start_date__lt=models.OuterRef('end_date'),
+        end_date__gt=models.OuterRef('start_date'),
+    ).exclude(pk=models.OuterRef('pk'))
+    overlaps = RoomAllocation.objects.filter(is_active=True).filter(models.Exists(clash)).values_list(
+        'room__number', 'booking_id', 'start_date', 'end_date'
+    ).order_by('room__number', 'start_date')
+
+    found = list(overlaps[:50])
+    if found:
+        lines = "\n".join(
+            f"  Quarto {number}: reserva {booking_id} de {start:%d/%m/%Y} a {end:%d/%m/%Y}"
+            for number, booking_id, start, end in found
+        )
+        raise RuntimeError(
+            f"Há {overlaps.count()} alocação(ões) ativa(s) sobreposta(s) (overbooking). "
+            f"Cancele ou mova uma de cada par e rode a migração de novo:\n{lines}"
+        )
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    """
+    PostgreSQL: impede overbooking no próprio banco.
+    GiST sobre (room_id, daterange) — apenas para alocações ativas.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE bookings_roomallocation ADD CONSTRAINT alloc_no_overlap "
+        "EXCLUDE USING gist (room_id WITH =, daterange(start_date, end_date, '[)') WITH &&) "
+        "WHERE (is_active)"
+    )
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE bookings_roomallocation DROP CONSTRAINT IF EXISTS alloc_no_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0001_initial'),
+        ('bookings', '0004_booking_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomallocation',
+            name='is_active',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Bloqueia o Quarto'),
+        ),
+        migrations.AddIndex(
+            model_name='roomallocation',
+            index=models.Index(fields=['room', 'start_date', 'end_date'], name='alloc_room_dates_idx'),
+        ),
+        migrations.RunPython(sync_is_active, migrations.RunPython.noop),
+        migrations.RunPython(check_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
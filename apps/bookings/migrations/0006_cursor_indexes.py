@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0001_initial'),
+        ('bookings', '0005_allocation_availability_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roomallocation',
+            index=models.Index(fields=['start_date', 'id'], name='alloc_start_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roomallocation',
+            index=models.Index(fields=['end_date', 'id'], name='alloc_end_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:59
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0001_initial'),
+        ('bookings', '0006_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NightAudit',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('date', models.DateField(verbose_name='Noite')),
+                ('rooms_total', models.PositiveIntegerField(default=0, verbose_name='Quartos')),
+                ('rooms_out_of_order', models.PositiveIntegerField(default=0, verbose_name='Em Manutenção')),
+                ('rooms_sold', models.PositiveIntegerField(default=0, verbose_name='Quartos Vendidos')),
+                ('room_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Receita de Diárias')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='night_audits', to='accommodations.roomcategory', verbose_name='Categoria')),
+            ],
+            options={
+                'verbose_name': 'Auditoria Noturna',
+                'verbose_name_plural': 'Auditorias Noturnas',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'category'), name='night_audit_unique_date_category')],
+            },
+        ),
+    ]
@@ -1,8 +1,13 @@
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from apps.core.mixins import UUIDModel, TimeStampedModel
+from apps.guests.models import Guest
+
+
+LEDGER_DECIMAL = models.DecimalField(max_digits=12, decimal_places=2)
 
 class Booking(UUIDModel, TimeStampedModel):
     """
@@ -33,29 +38,38 @@ class Booking(UUIDModel, TimeStampedModel):
 
     notes = models.TextField(_("Observações"), blank=True)
 
+    # --- LEDGER (Totais desnormalizados) ---
+    # Mantidos pelo CashierService e pelo RoomAllocation.save().
+    # Evita rodar SUM em payments/allocations a cada acesso no template.
+    # Em caso de divergência: python manage.py recompute_ledgers
+    rooms_total = models.DecimalField(
+        _("Total de Diárias"), max_digits=12, decimal_places=2,
+        default=Decimal("0.00"), editable=False
+    )
+    consumption_total = models.DecimalField(
+        _("Total de Consumo"), max_digits=12, decimal_places=2,
+        default=Decimal("0.00"), editable=False
+    )
+    paid_total = models.DecimalField(
+        _("Total Pago"), max_digits=12, decimal_places=2,
+        default=Decimal("0.00"), editable=False
+    )
+    balance = models.DecimalField(
+        _("Saldo Devedor"), max_digits=12, decimal_places=2,
+        default=Decimal("0.00"), editable=False
+    )
+
+    LEDGER_FIELDS = ['rooms_total', 'consumption_total', 'paid_total', 'balance']
+
     @property
     def total_value(self):
         """Soma Quartos + Consumos (Valor Bruto)"""
-        total_rooms = sum(a.agreed_price for a in self.allocations.all()) or Decimal(0)
-
-        # Soma consumos (que são do tipo CONSUMPTION e positivos)
-        from apps.financials.models import Transaction
-        total_consumption = self.payments.filter(
-            transaction_type=Transaction.Type.CONSUMPTION
-        ).aggregate(models.Sum('amount'))['amount__sum'] or Decimal(0)
-
-        return total_rooms + total_consumption
+        return self.rooms_total + self.consumption_total
 
     @property
     def amount_paid(self):
-        """Soma todas as transações do tipo INCOME vinculadas a esta reserva"""
-        from apps.financials.models import Transaction
-
-        paid = self.payments.filter(
-            transaction_type=Transaction.Type.INCOME
-        ).aggregate(models.Sum('amount'))['amount__sum']
-
-        return paid or Decimal(0)
+        """Total das transações INCOME (ledger gravado, mantido por Transaction.save)"""
+        return self.paid_total
 
     @property
     def balance_due(self):
@@ -63,9 +77,67 @@ class Booking(UUIDModel, TimeStampedModel):
         Saldo Devedor = (Total - Pago).
         Se for negativo, significa que tem crédito/troco.
         """
-        # CORREÇÃO: Antes você não estava subtraindo o valor pago!
-        return self.total_value - self.amount_paid
+        return self.balance
+
+    @staticmethod
+    def ledger_expressions():
+        """
+        Expressões (Subquery) que calculam o ledger direto das tabelas de origem.
+        Usadas para reconstruir/verificar os totais desnormalizados.
+        """
+        from apps.financials.models import Transaction
+
+        def _sum(queryset, field):
+            subquery = queryset.filter(booking=models.OuterRef('pk')).order_by().values(
+                'booking'
+            ).annotate(total=models.Sum(field)).values('total')
+            return Coalesce(
+                models.Subquery(subquery, output_field=LEDGER_DECIMAL),
+                models.Value(Decimal("0.00")),
+                output_field=LEDGER_DECIMAL
+            )
 
+        rooms = _sum(RoomAllocation.objects.all(), 'agreed_price')
+        consumption = _sum(
+            Transaction.objects.filter(transaction_type=Transaction.Type.CONSUMPTION), 'amount'
+        )
+        paid = _sum(
+            Transaction.objects.filter(transaction_type=Transaction.Type.INCOME), 'amount'
+        )
+        return {
+            'rooms_total': rooms,
+            'consumption_total': consumption,
+            'paid_total': paid,
+            'balance': models.ExpressionWrapper(
+                rooms + consumption - paid, output_field=LEDGER_DECIMAL
+            ),
+        }
+
+    def add_to_ledger(self, rooms=0, consumption=0, paid=0):
+        """
+        Aplica um delta no ledger com UPDATE atômico (F expressions).
+        Deve ser chamado dentro da mesma transação que gravou o lançamento.
+        """
+        rooms, consumption, paid = Decimal(rooms), Decimal(consumption), Decimal(paid)
+        Booking.objects.filter(pk=self.pk).update(
+            rooms_total=models.F('rooms_total') + rooms,
+            consumption_total=models.F('consumption_total') + consumption,
+            paid_total=models.F('paid_total') + paid,
+            balance=models.F('balance') + rooms + consumption - paid,
+        )
+        if paid:
+            # Total gasto do hóspede acompanha os pagamentos
+            Guest.objects.filter(pk=self.guest_id).update(total_spent=models.F('total_spent') + paid)
+        # Mantém a instância em memória coerente com o banco
+        self.refresh_from_db(fields=self.LEDGER_FIELDS)
+
+    def recompute_ledger(self):
+        """Recalcula o ledger desta reserva a partir das alocações e transações."""
+        Booking.objects.filter(pk=self.pk).update(**Booking.ledger_expressions())
+        self.refresh_from_db(fields=self.LEDGER_FIELDS)
+
+    # Status em que a reserva deixa de ocupar o quarto
+    RELEASED_STATUSES = [Status.CANCELED, Status.COMPLETED]
 
     class Meta:
         verbose_name = _("Reserva")
@@ -75,6 +147,48 @@ class Booking(UUIDModel, TimeStampedModel):
     def __str__(self):
         return f"Reserva #{str(self.id)[:8]} ({self.guest.name})"
 
+    def _reactivation(self, lock=False):
+        """
+        Alocações inativas que voltam a bloquear o quarto (ex.: reserva saiu de CANCELADA).
+        O quarto pode ter sido revendido nesse meio tempo: havendo conflito, recusa.
+        lock=True trava os quartos antes de checar (precisa de transação aberta).
+        """
+        from .availability import AvailabilityService
+
+        if self._state.adding or self.status in self.RELEASED_STATUSES:
+            return []
+        allocations = list(self.allocations.filter(is_active=False).select_related('room'))
+        if lock and allocations:
+            AvailabilityService.lock_rooms({allocation.room_id for allocation in allocations})
+        for allocation in allocations:
+            conflict = AvailabilityService.conflicts(
+                allocation.room_id, allocation.start_date, allocation.end_date, exclude_id=allocation.pk
+            ).select_related('booking__guest').first()
+            if conflict:
+                raise ValidationError(
+                    f"Não é possível reativar a reserva: o Quarto {allocation.room.number} "
+                    f"já está ocupado nestas datas por: {conflict.booking}"
+                )
+        return allocations
+
+    def clean(self):
+        # Admin: o conflito aparece no formulário (save() confere de novo, com o quarto travado)
+        self._reactivation()
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            reactivated = self._reactivation(lock=True)
+            super().save(*args, **kwargs)
+            # Sincroniza a flag de bloqueio das alocações (usada pelo motor de disponibilidade)
+            if self.status in self.RELEASED_STATUSES:
+                self.allocations.filter(is_active=True).update(is_active=False)
+            elif reactivated:
+                RoomAllocation.objects.filter(
+                    pk__in=[allocation.pk for allocation in reactivated]
+                ).update(is_active=True)
+            # Resumo de estadias do hóspede (contagens dependem do status)
+            Guest.refresh_stay_summary([self.guest_id])
+
 
 class RoomAllocation(UUIDModel):
     """
@@ -102,9 +216,19 @@ class RoomAllocation(UUIDModel):
         blank=True
     )
 
+    # Cópia desnormalizada de "booking.status não está CANCELED/COMPLETED".
+    # Permite checar conflitos sem JOIN e é o predicado da exclusion constraint (Postgres).
+    is_active = models.BooleanField(_("Bloqueia o Quarto"), default=True, editable=False)
+
     class Meta:
         verbose_name = _("Quarto da Reserva")
         verbose_name_plural = _("Quartos da Reserva")
+        indexes = [
+            models.Index(fields=['room', 'start_date', 'end_date'], name='alloc_room_dates_idx'),
+            # Cursores da lista de reservas (próximas / histórico)
+            models.Index(fields=['start_date', 'id'], name='alloc_start_cursor_idx'),
+            models.Index(fields=['end_date', 'id'], name='alloc_end_cursor_idx'),
+        ]
 
     def __str__(self):
         return f"{self.room} ({self.start_date} até {self.end_date})"
@@ -117,29 +241,136 @@ class RoomAllocation(UUIDModel):
         if self.start_date and self.end_date and self.start_date >= self.end_date:
             raise ValidationError("A data de saída deve ser depois da data de entrada.")
 
-        # Busca conflitos de datas
-        conflicts = RoomAllocation.objects.filter(
-            room=self.room,
-            start_date__lt=self.end_date,  # Começa antes de eu sair
-            end_date__gt=self.start_date   # Termina depois de eu chegar
-        ).exclude(id=self.id) # Ignora a si mesmo (caso seja uma edição)
-
-        conflicts = conflicts.exclude(
-            booking__status__in=[
-                Booking.Status.CANCELED,
-                Booking.Status.COMPLETED
-            ]
-        )
+        from .availability import AvailabilityService
+
+        # Busca conflitos de datas (já traz o hóspede para montar a mensagem).
+        # O quarto em si já vem carregado de quem chama (lock_room, formulário).
+        conflicts = list(AvailabilityService.conflicts(
+            self.room_id, self.start_date, self.end_date, exclude_id=self.id
+        ).select_related('booking__guest'))
 
-        if conflicts.exists():
-            conflict_list = ", ".join([str(c.booking) for c in conflicts])
+        if conflicts:
+            conflict_list = ", ".join(str(c.booking) for c in conflicts)
             raise ValidationError(
                 f"CONFLITO! O Quarto {self.room.number} já está ocupado nestas datas por: {conflict_list}"
             )
 
-    def save(self, *args, **kwargs):
-        if not self.agreed_price:
-            self.agreed_price = self.room.category.base_price
+    def save(self, *args, validate=True, **kwargs):
+        """
+        validate=False: quem chama já travou o quarto (AvailabilityService.lock_room)
+        e rodou clean() nesta mesma transação, como create_booking_safely.
+        Assim o overlap é checado uma única vez por gravação.
+        """
+        from .availability import AvailabilityService
+
+        with transaction.atomic():
+            if validate:
+                # Trava o quarto ANTES de checar conflitos: gravações simultâneas no
+                # mesmo quarto (admin, balcão) passam uma de cada vez.
+                # O quarto travado já vem com a categoria (preço padrão sem query extra).
+                self.room = AvailabilityService.lock_room(self.room_id)
+
+            if not self.agreed_price:
+                self.agreed_price = self.room.category.base_price
+
+            adding = self._state.adding
+            if adding:
+                self.is_active = self.booking.status not in Booking.RELEASED_STATUSES
+
+            if validate:
+                self.clean()
+            super().save(*args, **kwargs)
+
+            # Atualiza o total de diárias no ledger da reserva
+            if adding:
+                self.booking.add_to_ledger(rooms=self.agreed_price)
+            else:
+                self.booking.recompute_ledger()  # Preço pode ter mudado: recalcula tudo
+            # Datas mudaram: a última estadia do hóspede pode ter mudado
+            Guest.refresh_stay_summary([self.booking.guest_id])
+
+    @classmethod
+    def bulk_create_validated(cls, allocations, batch_size=500):
+        """
+        Importação em lote com as mesmas garantias do save(): trava os quartos,
+        checa os conflitos do lote inteiro numa query só (com o banco e entre si)
+        e grava com bulk_create. Qualquer conflito aborta o lote todo.
+        Ledger, resumo dos hóspedes e painel de quartos são atualizados em lote.
+        """
+        from apps.accommodations.services import RoomStatusService
+
+        from .availability import AvailabilityService
 
-        self.clean()
-        super().save(*args, **kwargs)
+        allocations = list(allocations)
+        invalid = [a for a in allocations if a.start_date >= a.end_date]
+        if invalid:
+            raise ValidationError([
+                f"{a.start_date} até {a.end_date}: a data de saída deve ser depois da data de entrada."
+                for a in invalid
+            ])
+        if not allocations:
+            return []
+
+        with transaction.atomic():
+            rooms = AvailabilityService.lock_rooms({a.room_id for a in allocations})
+            bookings = Booking.objects.only('status', 'guest_id').in_bulk({a.booking_id for a in allocations})
+            for allocation in allocations:
+                allocation.room = rooms[allocation.room_id]
+                allocation.booking = bookings[allocation.booking_id]
+                if not allocation.agreed_price:
+                    allocation.agreed_price = allocation.room.category.base_price
+                allocation.is_active = allocation.booking.status not in Booking.RELEASED_STATUSES
+
+            conflicts = AvailabilityService.batch_conflicts(allocations)
+            if conflicts:
+                raise ValidationError([
+                    f"CONFLITO! O Quarto {allocation.room.number} ({allocation.start_date} até "
+                    f"{allocation.end_date}) já está ocupado por: "
+                    f"{'outra linha do lote' if other._state.adding else other.booking}"
+                    for allocation, other in conflicts
+                ])
+
+            created = cls.objects.bulk_create(allocations, batch_size=batch_size)
+
+            # bulk_create não chama save(): ledger, hóspedes e painel numa query cada
+            Booking.objects.filter(pk__in=list(bookings)).update(**Booking.ledger_expressions())
+            Guest.refresh_stay_summary({b.guest_id for b in bookings.values()})
+            RoomStatusService.rooms_changed(rooms)
+        return created
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.booking.recompute_ledger()
+            Guest.refresh_stay_summary([self.booking.guest_id])
+        return result
+
+
+class NightAudit(UUIDModel, TimeStampedModel):
+    """
+    Fotografia de uma noite por categoria (auditoria noturna).
+    Ocupação, ADR e RevPAR históricos saem daqui sem expandir as estadias noite a noite.
+    """
+    date = models.DateField(_("Noite"))
+    category = models.ForeignKey(
+        'accommodations.RoomCategory',
+        on_delete=models.PROTECT,
+        related_name='night_audits',
+        verbose_name=_("Categoria")
+    )
+
+    rooms_total = models.PositiveIntegerField(_("Quartos"), default=0)
+    rooms_out_of_order = models.PositiveIntegerField(_("Em Manutenção"), default=0)
+    rooms_sold = models.PositiveIntegerField(_("Quartos Vendidos"), default=0)
+    room_revenue = models.DecimalField(_("Receita de Diárias"), max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        verbose_name = _("Auditoria Noturna")
+        verbose_name_plural = _("Auditorias Noturnas")
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category'], name='night_audit_unique_date_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y} {self.category}: {self.rooms_sold}/{self.rooms_total}"
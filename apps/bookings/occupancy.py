@@ -0,0 +1,104 @@
+"""
+Mapa de Ocupação (quartos x datas).
+
+Monta uma matriz densa em UMA passada pelas alocações da janela:
+cada linha (quarto) é uma lista com o índice da alocação que ocupa
+a noite, ou FREE quando o quarto está livre. A linha é preenchida
+por fatia (row[a:b] = ...), sem laço dia a dia em Python.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.db.models import Count
+
+from apps.accommodations.models import Room
+
+from .models import Booking, RoomAllocation
+
+FREE = -1
+
+# Janelas aceitas pela agenda (em dias)
+WINDOW_CHOICES = (15, 30, 90)
+
+# Maior janela que um único pedido (linhas ou colunas) pode montar
+MAX_WINDOW_DAYS = 366
+
+# Quartos por bloco carregado via HTMX (um andar grande vira vários blocos)
+BLOCK_SIZE = 40
+
+
+def calendar_blocks(block_size=BLOCK_SIZE):
+    """
+    Divide o hotel em blocos (andar + offset) para carregamento incremental.
+    Custa uma única query agregada, independente do número de quartos.
+    """
+    blocks = []
+    floors = Room.objects.values('floor').annotate(total=Count('id')).order_by('floor')
+    for entry in floors:
+        for offset in range(0, entry['total'], block_size):
+            blocks.append({
+                'floor': entry['floor'],
+                'offset': offset,
+                'size': min(block_size, entry['total'] - offset),
+            })
+    return blocks
+
+
+def block_rooms(floor, offset, block_size=BLOCK_SIZE):
+    """Quartos de um bloco, na mesma ordem usada por calendar_blocks()."""
+    return Room.objects.filter(floor=floor).order_by('number')[offset:offset + block_size]
+
+
+class OccupancyGrid:
+    def __init__(self, rooms, start_date, days=15):
+        self.rooms = list(rooms)
+        self.start_date = start_date
+        self.days = days
+        self.end_date = start_date + timedelta(days=days)
+        self.dates = [start_date + timedelta(days=i) for i in range(days)]
+        self.allocations = []
+        self.matrix = []
+
+    def allocations_queryset(self):
+        """Alocações que cruzam a janela [start_date, end_date) dos quartos exibidos."""
+        return RoomAllocation.objects.filter(
+            room__in=[room.pk for room in self.rooms],
+            start_date__lt=self.end_date,
+            end_date__gt=self.start_date,
+        ).exclude(
+            booking__status=Booking.Status.CANCELED
+        ).select_related('booking__guest').order_by('start_date')
+
+    def build(self):
+        row_of = {room.pk: i for i, room in enumerate(self.rooms)}
+        self.matrix = [[FREE] * self.days for _ in self.rooms]
+        self.allocations = list(self.allocations_queryset())
+
+        for index, alloc in enumerate(self.allocations):
+            # Noites ocupadas: [entrada, saída) recortadas pela janela
+            first = max((alloc.start_date - self.start_date).days, 0)
+            last = min((alloc.end_date - self.start_date).days, self.days)
+            if first < last:
+                self.matrix[row_of[alloc.room_id]][first:last] = [index] * (last - first)
+        return self
+
+    def occupied_nights(self):
+        return sum(self.days - row.count(FREE) for row in self.matrix)
+
+    def rows(self):
+        """
+        Para o template: (quarto, blocos), onde cada bloco é
+        (alocação ou None, data inicial, quantidade de dias).
+        Dias ocupados consecutivos pela mesma alocação viram um único bloco (colspan).
+        """
+        for room, row in zip(self.rooms, self.matrix):
+            blocks = []
+            day = 0
+            for index, run in groupby(row):
+                span = len(list(run))
+                if index == FREE:
+                    blocks.extend((None, self.dates[d], 1) for d in range(day, day + span))
+                else:
+                    blocks.append((self.allocations[index], self.dates[day], span))
+                day += span
+            yield room, blocks
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from apps.accommodations.models import Room
+
+
+class AvailableRoomSerializer(serializers.ModelSerializer):
+    category = serializers.CharField(source='category.name')
+    max_adults = serializers.IntegerField(source='category.max_adults')
+    max_children = serializers.IntegerField(source='category.max_children')
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        model = Room
+        fields = ['id', 'number', 'floor', 'category', 'max_adults', 'max_children', 'price']
@@ -1,13 +1,23 @@
-from django.db import transaction
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Sum, Value
+from django.db.models.functions import Greatest, Least, TruncMonth
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 # Importação relativa funciona bem aqui dentro do mesmo app
-from .models import Booking, RoomAllocation 
+from .availability import AvailabilityService
+from apps.guests.models import Guest
+
+from .models import Booking, NightAudit, RoomAllocation
 
-def create_booking_safely(guest, room, start_date, end_date, user):
+def create_booking_safely(guest, room, start_date, end_date, user, status=Booking.Status.PENDING):
     """
-    Cria uma reserva com TRAVAMENTO DE BANCO DE DADOS (Atomicidade).
-    Isso impede que dois usuários reservem o mesmo quarto ao mesmo tempo.
+    Porta de entrada única para criar reservas (balcão, modal HTMX, scripts).
+    Trava a linha do QUARTO antes de checar conflitos: duas reservas simultâneas
+    para o mesmo quarto passam uma de cada vez, mesmo com o quarto ainda vazio.
     """
     
     # Validação básica de datas (regra de negócio)
@@ -16,32 +26,266 @@ def create_booking_safely(guest, room, start_date, end_date, user):
 
     # Inicia uma transação atômica (Tudo ou Nada)
     with transaction.atomic():
-        # 1. Verifica disponibilidade TRAVANDO as linhas afetadas no banco
-        # O select_for_update() diz ao Postgres: "Ninguém mexe nessas linhas até eu terminar"
-        # Isso é a proteção contra Race Conditions.
-        conflicts = RoomAllocation.objects.select_for_update().filter(
-            room=room,
-            start_date__lt=end_date,  # Começa antes de eu sair
-            end_date__gt=start_date   # Termina depois de eu chegar
-        ).exclude(booking__status=Booking.Status.CANCELED)
-
-        if conflicts.exists():
-            raise ValidationError(f"O Quarto {room.number} acabou de ser ocupado por outra pessoa nestas datas.")
+        # 1. Trava o quarto. Travar só as alocações em conflito não basta: se ainda
+        # não existe nenhuma, não há linha para travar e as duas reservas passariam.
+        # Quem chega depois espera o COMMIT da primeira e já enxerga a alocação dela.
+        # O quarto travado já vem com a categoria (preço da diária).
+        room = AvailabilityService.lock_room(room.pk)
 
-        # 2. Cria a Reserva Pai (O Contrato)
+        # 2. Checa conflitos UMA vez, já com o quarto travado (antes de gravar qualquer coisa)
+        allocation = RoomAllocation(room=room, start_date=start_date, end_date=end_date)
+        allocation.clean()
+
+        # 3. Cria a Reserva Pai (O Contrato)
         booking = Booking.objects.create(
             guest=guest,
-            status=Booking.Status.PENDING, # Começa pendente até pagar
+            status=status,  # Balcão: pendente até pagar. Modal HTMX: já confirmada
             # Se quisermos registrar quem criou, podemos adicionar um campo 'created_by' no model depois
         )
 
-        # 3. Cria a Alocação (A Ocupação Física)
-        allocation = RoomAllocation.objects.create(
-            booking=booking,
-            room=room,
-            start_date=start_date,
-            end_date=end_date,
-            # Se não passar preço, o model já pega o preço base do quarto no save()
-        )
+        # 4. Cria a Alocação (A Ocupação Física). Quarto travado e validado acima:
+        # o save() não repete nada. Sem preço, o model pega o preço base da categoria.
+        allocation.booking = booking
+        try:
+            with transaction.atomic():
+                allocation.save(validate=False)
+        except IntegrityError:
+            # Exclusion constraint do Postgres (alloc_no_overlap): última barreira
+            raise ValidationError(f"O Quarto {room.number} acabou de ser ocupado por outra pessoa nestas datas.")
 
         return booking
+
+
+class StayService:
+    """
+    Check-in / Check-out de TODAS as alocações de uma ou várias reservas
+    (grupos, excursões) numa única transação.
+    Os status vão para o banco em UPDATEs em lote: o custo não cresce com o número de quartos.
+    """
+
+    @staticmethod
+    def check_in(booking_ids):
+        from apps.accommodations.models import Room
+
+        return StayService._apply(
+            booking_ids,
+            source=Booking.Status.CONFIRMED,
+            target=Booking.Status.CHECKED_IN,
+            room_status=Room.Status.OCCUPIED,
+            refused="Apenas reservas 'Confirmadas' podem fazer check-in.",
+        )
+
+    @staticmethod
+    def check_out(booking_ids):
+        from apps.accommodations.models import Room
+
+        return StayService._apply(
+            booking_ids,
+            source=Booking.Status.CHECKED_IN,
+            target=Booking.Status.COMPLETED,
+            room_status=Room.Status.DIRTY,  # Sujo, independente das regras de transição
+            refused="Apenas reservas com check-in podem fazer check-out.",
+        )
+
+    @staticmethod
+    def _apply(booking_ids, source, target, room_status, refused):
+        """
+        Devolve um resultado por quarto:
+        {'booking', 'allocation', 'ok', 'message'}
+        Reserva sem quarto alocado é recusada (allocation None), sem mudar de status.
+        """
+        from apps.accommodations.models import Room
+        from apps.accommodations.services import RoomStatusService
+
+        booking_ids = list(booking_ids)
+        results = []
+
+        with transaction.atomic():
+            # Trava as reservas: duas recepções não processam o mesmo grupo ao mesmo tempo
+            locked = set(
+                Booking.objects.select_for_update().filter(
+                    pk__in=booking_ids, status=source
+                ).values_list('pk', flat=True)
+            )
+
+            allocations = RoomAllocation.objects.filter(
+                booking_id__in=booking_ids
+            ).select_related('booking__guest', 'room').order_by('room__number')
+
+            room_ids = set()
+            for allocation in allocations:
+                booking = allocation.booking
+                ok = booking.pk in locked
+                if not ok:
+                    message = refused
+                elif target == Booking.Status.CHECKED_IN:
+                    message = f"Bem-vindo(a), {booking.guest.name}! Quarto {allocation.room.number} ocupado."
+                else:
+                    message = f"Quarto {allocation.room.number} marcado para limpeza."
+
+                if ok:
+                    room_ids.add(allocation.room_id)
+                results.append({'booking': booking, 'allocation': allocation, 'ok': ok, 'message': message})
+
+            seen = {result['booking'].pk for result in results}
+            if len(seen) < len({str(pk) for pk in booking_ids}):
+                for booking in Booking.objects.filter(pk__in=booking_ids).exclude(
+                    pk__in=seen
+                ).select_related('guest').order_by('guest__name'):
+                    locked.discard(booking.pk)
+                    results.append({
+                        'booking': booking, 'allocation': None, 'ok': False,
+                        'message': "Reserva sem quarto alocado.",
+                    })
+
+            if locked:
+                # Poucos UPDATEs para o lote inteiro (reservas, bloqueio das alocações, quartos).
+                # update() não chama Booking.save(): o is_active é sincronizado aqui.
+                now = timezone.now()
+                is_active = target not in Booking.RELEASED_STATUSES
+                Booking.objects.filter(pk__in=locked).update(status=target, updated_at=now)
+                RoomAllocation.objects.filter(booking_id__in=locked).exclude(
+                    is_active=is_active
+                ).update(is_active=is_active)
+                Room.objects.filter(pk__in=room_ids).update(status=room_status, updated_at=now)
+                Guest.refresh_stay_summary(
+                    Booking.objects.filter(pk__in=locked).values('guest_id')
+                )
+                RoomStatusService.rooms_changed(room_ids)
+
+        return results
+
+
+class NightAuditService:
+    """
+    Auditoria noturna: grava em NightAudit os quartos vendidos e a receita
+    de diárias (agreed_price) de cada noite, por categoria.
+    Os relatórios somam essas linhas (uma por noite e categoria).
+    """
+    # Noite vendida: reserva confirmada, em casa ou já finalizada
+    SOLD_STATUSES = [Booking.Status.CONFIRMED, Booking.Status.CHECKED_IN, Booking.Status.COMPLETED]
+
+    @staticmethod
+    def run(start_date, end_date=None):
+        """
+        Fotografa as noites de start_date a end_date (inclusive). Refazer uma noite a substitui.
+        Manutenção só é conhecida no momento: vale apenas para a noite de hoje.
+        """
+        from apps.accommodations.models import Room
+
+        end_date = end_date or start_date
+        today = timezone.localdate()
+
+        inventory = {
+            row['category']: row
+            for row in Room.objects.values('category').annotate(
+                total=Count('id'),
+                out_of_order=Count('id', filter=Q(status=Room.Status.MAINTENANCE)),
+            )
+        }
+
+        # Entradas e saídas do período (datas recortadas na janela), por categoria e dia,
+        # numa única query: a noite N tem as entradas até N menos as saídas até N.
+        sold = RoomAllocation.objects.filter(
+            start_date__lte=end_date,
+            end_date__gt=start_date,
+            booking__status__in=NightAuditService.SOLD_STATUSES,
+        )
+
+        def moves(day, sign):
+            return sold.annotate(day=day, sign=Value(sign)).values(
+                'room__category', 'day', 'sign'
+            ).annotate(rooms=Count('id'), revenue=Sum('agreed_price')).order_by()
+
+        arrivals = moves(Greatest('start_date', Value(start_date, output_field=DateField())), 1)
+        departures = moves(
+            Least('end_date', Value(end_date + timedelta(days=1), output_field=DateField())), -1
+        )
+
+        deltas = defaultdict(lambda: defaultdict(lambda: [0, Decimal('0.00')]))
+        for row in arrivals.union(departures, all=True):
+            delta = deltas[row['room__category']][row['day']]
+            delta[0] += row['sign'] * row['rooms']
+            delta[1] += row['sign'] * row['revenue']
+
+        audits = []
+        for category_id in inventory.keys() | deltas.keys():
+            rooms = inventory.get(category_id, {})
+            sold_rooms, revenue = 0, Decimal('0.00')
+            night = start_date
+            while night <= end_date:
+                day_rooms, day_revenue = deltas[category_id].get(night, (0, 0))
+                sold_rooms += day_rooms
+                revenue += day_revenue
+                audits.append(NightAudit(
+                    date=night,
+                    category_id=category_id,
+                    rooms_total=rooms.get('total', 0),
+                    rooms_out_of_order=rooms.get('out_of_order', 0) if night == today else 0,
+                    rooms_sold=sold_rooms,
+                    room_revenue=revenue,
+                ))
+                night += timedelta(days=1)
+
+        with transaction.atomic():
+            # Refazer o período substitui as noites (upsert); some quem não tem mais quartos
+            NightAudit.objects.filter(date__range=(start_date, end_date)).exclude(
+                category_id__in=inventory.keys() | deltas.keys()
+            ).delete()
+            NightAudit.objects.bulk_create(
+                audits,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['date', 'category'],
+                update_fields=[
+                    'rooms_total', 'rooms_out_of_order', 'rooms_sold', 'room_revenue', 'updated_at',
+                ],
+            )
+        return len(audits)
+
+    @staticmethod
+    def _aggregates():
+        return {
+            'rooms_available': Sum(F('rooms_total') - F('rooms_out_of_order')),
+            'rooms_sold': Sum('rooms_sold'),
+            'room_revenue': Sum('room_revenue'),
+        }
+
+    @staticmethod
+    def with_ratios(row):
+        """Acrescenta ocupação (%), ADR (diária média) e RevPAR à linha agregada."""
+        available = row.get('rooms_available') or 0
+        sold = row.get('rooms_sold') or 0
+        revenue = row.get('room_revenue') or Decimal('0.00')
+        cents = Decimal('0.01')
+        row['occupancy'] = (Decimal(sold * 100) / available).quantize(cents) if available else Decimal('0.00')
+        row['adr'] = (revenue / sold).quantize(cents) if sold else Decimal('0.00')
+        row['revpar'] = (revenue / available).quantize(cents) if available else Decimal('0.00')
+        return row
+
+    @staticmethod
+    def report(start_date, end_date):
+        """Totais do período, por mês e por categoria (cada um é uma query sobre NightAudit)."""
+        audits = NightAudit.objects.filter(date__range=(start_date, end_date))
+        aggregates = NightAuditService._aggregates()
+        return {
+            'totals': NightAuditService.with_ratios(audits.aggregate(**aggregates)),
+            'by_month': [
+                NightAuditService.with_ratios(row)
+                for row in audits.annotate(month=TruncMonth('date'))
+                .values('month').annotate(**aggregates).order_by('month')
+            ],
+            'by_category': [
+                NightAuditService.with_ratios(row)
+                for row in audits.values('category__name').annotate(**aggregates).order_by('category__name')
+            ],
+        }
+
+    @staticmethod
+    def daily(start_date, end_date):
+        """Uma linha por noite (todas as categorias somadas), para o CSV."""
+        rows = NightAudit.objects.filter(date__range=(start_date, end_date)).values('date').annotate(
+            **NightAuditService._aggregates()
+        ).order_by('date')
+        for row in rows:
+            yield NightAuditService.with_ratios(row)
@@ -0,0 +1,80 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+FREE_CELL = '<td class="p-1 border border-gray-50 min-w-[100px] h-16{}" data-date="{}"></td>'
+
+BOOKED_CELL = (
+    '<td colspan="{span}" class="p-1 border border-gray-50 h-16">'
+    '<div class="text-[10px] p-1 rounded h-full flex items-center justify-center text-center '
+    'leading-tight cursor-pointer {color}" title="{guest} ({start} - {end})" data-details="{details}">'
+    '{label}</div></td>'
+)
+
+
+def _cells(room, blocks, today):
+    details_url = reverse('room_details_modal', args=[room.pk])
+    html = []
+    for alloc, date, span in blocks:
+        if alloc is None:
+            highlight = ' bg-primary/5' if date == today else ''
+            html.append(FREE_CELL.format(highlight, date.isoformat()))
+            continue
+
+        guest = conditional_escape(alloc.booking.guest.name)
+        html.append(BOOKED_CELL.format(
+            span=span,
+            color='bg-rose-100 text-rose-700' if alloc.booking.status == 'CHECKED_IN'
+            else 'bg-primary/20 text-primary',
+            guest=guest,
+            start=alloc.start_date.strftime('%d/%m'),
+            end=alloc.end_date.strftime('%d/%m'),
+            details=details_url,
+            label=guest if span > 1 else conditional_escape(alloc.booking.guest.name[:3]),
+        ))
+    return html
+
+
+@register.simple_tag
+def occupancy_rows(grid, today=None):
+    """
+    Renderiza as linhas (<tr>) do mapa de ocupação a partir de um OccupancyGrid.
+    Uso: {% load occupancy %}{% occupancy_rows grid today %}
+
+    Monta o HTML direto em Python: 300 quartos x 90 dias são ~27 mil células,
+    e um {% include %} por célula deixaria a página lenta. Os cliques são
+    tratados por delegação de eventos no <tbody> (data-date / data-details).
+    """
+    rows_url = reverse('booking_calendar_rows')
+    html = []
+    for room, blocks in grid.rows():
+        # data-live-*: a linha é re-renderizada sozinha quando o quarto muda (SSE)
+        html.append(format_html(
+            '<tr id="room-row-{}" data-room="{}" data-live-room="{}" data-live-url="{}?room={}">'
+            '<td class="font-bold bg-gray-50">{}</td>',
+            room.pk, room.pk, room.pk, rows_url, room.pk, room.number
+        ))
+        html.extend(_cells(room, blocks, today))
+        html.append('</tr>')
+
+    if not html:
+        html.append('<tr><td class="text-center py-8 text-gray-400">Nenhum quarto cadastrado.</td></tr>')
+    return mark_safe(''.join(html))
+
+
+@register.simple_tag
+def occupancy_columns(grid, today=None):
+    """
+    Só as células novas de cada linha, como out-of-band swaps (beforeend).
+    Usado quando a janela de datas avança: as linhas já na tela ganham
+    colunas sem re-renderizar o que já foi carregado.
+    """
+    html = []
+    for room, blocks in grid.rows():
+        html.append(format_html('<tr id="room-row-{}" hx-swap-oob="beforeend">', room.pk))
+        html.extend(_cells(room, blocks, today))
+        html.append('</tr>')
+    return mark_safe(''.join(html))
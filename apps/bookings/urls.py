@@ -5,7 +5,10 @@ from . import views
 urlpatterns = [
     path("", views.booking_list, name="booking_list"),
     path("calendar/", views.booking_calendar, name="booking_calendar"),  # Nova Rota
+    path("calendar/rows/", views.booking_calendar_rows, name="booking_calendar_rows"),
+    path("calendar/columns/", views.booking_calendar_columns, name="booking_calendar_columns"),
     path("create/htmx/", views.create_booking_htmx, name="create_booking_htmx"),
+    path("availability/", views.availability_search, name="availability_search"),
     path(
         "cancel/<uuid:booking_id>/htmx/",
         views.cancel_booking_htmx,
@@ -13,6 +16,9 @@ urlpatterns = [
     ),
     path("checkout/<uuid:booking_id>/htmx/", views.checkout_htmx, name="checkout_htmx"),
     path("checkin/<uuid:booking_id>/htmx/", views.checkin_htmx, name="checkin_htmx"),
+    # Lote (grupos): POST com booking=<id> repetido
+    path("checkin/batch/", views.stay_batch_htmx, {"action": "checkin"}, name="checkin_batch_htmx"),
+    path("checkout/batch/", views.stay_batch_htmx, {"action": "checkout"}, name="checkout_batch_htmx"),
     path(
         "fnrh/<uuid:booking_id>/pdf/", views.booking_fnrh_pdf, name="booking_fnrh_pdf"
     ),
@@ -1,18 +1,32 @@
+import json
+import uuid
 from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db import transaction
 from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_POST
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError as ApiValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
 
 from apps.accommodations.models import Room
-from apps.bookings.forms import QuickBookingForm
+from apps.accommodations.views import room_modal_response
+from apps.bookings.availability import AvailabilityService
+from apps.bookings.forms import AvailabilitySearchForm, QuickBookingForm
 from apps.bookings.models import Booking, RoomAllocation
+from apps.bookings.occupancy import (MAX_WINDOW_DAYS, WINDOW_CHOICES,
+                                     OccupancyGrid, block_rooms,
+                                     calendar_blocks)
+from apps.bookings.serializers import AvailableRoomSerializer
+from apps.bookings.services import StayService, create_booking_safely
+from apps.core.pagination import CursorPaginator
 
 
 @login_required
@@ -31,24 +45,17 @@ def create_booking_htmx(request):
         form = QuickBookingForm(request.POST)
         if form.is_valid():
             try:
-                with transaction.atomic():
-                    selected_room = form.cleaned_data['room']
-
-                    # 1. Cria a Reserva
-                    booking = Booking.objects.create(
-                        guest=form.cleaned_data['guest'],
-                        status=Booking.Status.CONFIRMED
-                    )
-
-                    # 2. Cria a Alocação (Reserva do período no quarto)
-                    allocation = RoomAllocation(
-                        booking=booking,
-                        room=selected_room,
-                        start_date=form.cleaned_data['start_date'],
-                        end_date=form.cleaned_data['end_date']
-                    )
-                    allocation.full_clean()  # Valida conflitos de data
-                    allocation.save()
+                selected_room = form.cleaned_data['room']
+
+                # Mesma porta de entrada do balcão: trava o quarto e checa conflitos
+                booking = create_booking_safely(
+                    form.cleaned_data['guest'],
+                    selected_room,
+                    form.cleaned_data['start_date'],
+                    form.cleaned_data['end_date'],
+                    request.user,
+                    status=Booking.Status.CONFIRMED,
+                )
 
                 messages.success(request, f"Reserva criada para {booking.guest.name} no Quarto {selected_room.number}!")
 
@@ -72,9 +79,12 @@ def create_booking_htmx(request):
                 })
     else:
         # GET: Prepara formulário inicial
+        # Datas podem vir pré-preenchidas pela busca de disponibilidade (?start=&end=)
+        start = parse_date(request.GET.get('start', '')) or timezone.now().date()
+        end = parse_date(request.GET.get('end', '')) or start + timedelta(days=1)
         initial_data = {
-            'start_date': timezone.now().date(),
-            'end_date': timezone.now().date() + timedelta(days=1)
+            'start_date': start,
+            'end_date': end
         }
         
         if initial_room:
@@ -88,63 +98,93 @@ def create_booking_htmx(request):
     })
 
 
-@login_required
-@require_POST
-def checkin_htmx(request, booking_id):
+def _stay_response(request, results):
     """
-    Realiza o Check-in: Muda status para CHECKED_IN e Quarto para OCCUPIED.
+    Resposta do check-in/check-out de UMA reserva (modal do quarto):
+    re-renderiza o modal; os demais quartos do grupo chegam às telas via SSE.
     """
-    booking = get_object_or_404(Booking, pk=booking_id)
+    if not results:
+        return HttpResponse(status=204)
 
-    if booking.status != Booking.Status.CONFIRMED:
-        messages.error(request, "Apenas reservas 'Confirmadas' podem fazer check-in.")
+    if not results[0]['ok']:
+        messages.error(request, results[0]['message'])
         return HttpResponse(status=204)
 
-    try:
-        with transaction.atomic():
-            booking.status = Booking.Status.CHECKED_IN
-            booking.save()
+    if len(results) == 1:
+        messages.success(request, results[0]['message'])
+    else:
+        rooms = ", ".join(result['allocation'].room.number for result in results)
+        messages.success(request, f"{len(results)} quartos processados: {rooms}.")
+    return room_modal_response(request, results[0]['allocation'].room_id)
 
-            # Atualiza status do quarto vinculado
-            allocation = booking.allocations.first()
-            if allocation:
-                Room.objects.filter(pk=allocation.room.id).update(status='OCCUPIED')
 
-        messages.success(request, f"Check-in realizado! Bem-vindo(a), {booking.guest.name}.")
-        return HttpResponse(status=204, headers={'HX-Refresh': 'true'})
+@login_required
+@require_POST
+def checkin_htmx(request, booking_id):
+    """
+    Realiza o Check-in: Muda status para CHECKED_IN e TODOS os quartos da reserva para OCCUPIED.
+    """
+    booking = get_object_or_404(Booking, pk=booking_id)
 
+    try:
+        results = StayService.check_in([booking.pk])
     except Exception as e:
         messages.error(request, f"Erro ao processar check-in: {str(e)}")
         return HttpResponse(status=204)
 
+    return _stay_response(request, results)
+
 
 @login_required
 @require_POST
 def checkout_htmx(request, booking_id):
     """
-    Realiza o Check-out: Muda status para COMPLETED e Quarto para DIRTY.
+    Realiza o Check-out: Muda status para COMPLETED e TODOS os quartos da reserva para DIRTY.
     """
     booking = get_object_or_404(Booking, pk=booking_id)
 
-    if booking.balance_due > 0:
+    try:
+        results = StayService.check_out([booking.pk])
+    except Exception as e:
+        messages.error(request, f"Erro no checkout: {str(e)}")
+        return HttpResponse(status=204)
+
+    # Aviso de saldo só se o hóspede de fato saiu (checkout recusado não gera dívida)
+    if results and results[0]['ok'] and booking.balance_due > 0:
         messages.warning(request, f"Hóspede saiu devendo R$ {booking.balance_due:.2f}")
 
-    try:
-        with transaction.atomic():
-            booking.status = Booking.Status.COMPLETED
-            booking.save()
+    return _stay_response(request, results)
 
-            allocation = booking.allocations.first()
-            if allocation:
-                # Força status SUJO independente de regras de transição
-                Room.objects.filter(pk=allocation.room.id).update(status='DIRTY')
 
-        messages.success(request, f"Check-out realizado! Quarto marcado para limpeza.")
-        return HttpResponse(status=204, headers={'HX-Refresh': 'true'})
+@login_required
+@require_POST
+def stay_batch_htmx(request, action):
+    """
+    Check-in ou Check-out em lote (?booking= repetido, ex.: grupos e excursões).
+    Um único POST e uma transação para todos os quartos; devolve o resultado por quarto.
+    """
+    booking_ids = request.POST.getlist('booking')
+    if not booking_ids:
+        messages.warning(request, "Selecione ao menos uma reserva.")
+        return HttpResponse(status=204)
 
+    service = StayService.check_in if action == 'checkin' else StayService.check_out
+    try:
+        results = service(booking_ids)
     except Exception as e:
-        messages.error(request, f"Erro no checkout: {str(e)}")
-        return HttpResponse(status=204, headers={'HX-Refresh': 'true'})
+        messages.error(request, f"Erro ao processar o lote: {str(e)}")
+        return HttpResponse(status=204)
+
+    done = sum(1 for result in results if result['ok'])
+    response = render(request, 'booking/modals/stay_batch_results.html', {
+        'results': results,
+        'action': action,
+        'done': done,
+        'failed': len(results) - done,
+    })
+    # Lista de reservas se atualiza (status novos)
+    response['HX-Trigger'] = 'staysUpdated'
+    return response
 
 
 @login_required
@@ -180,7 +220,8 @@ def booking_list(request):
         'booking__guest', 
         'room', 
         'room__category'
-    ).order_by('start_date')
+    )
+    ordering = ('start_date', 'id')
 
     if filter_type == 'upcoming':
         # Filtro: Reservas que terminam hoje ou no futuro (inclui quem está na casa)
@@ -195,59 +236,184 @@ def booking_list(request):
             Q(end_date__lt=today) |
             Q(booking__status=Booking.Status.COMPLETED) |
             Q(booking__status=Booking.Status.CANCELED)
-        ).order_by('-end_date')
+        )
+        ordering = ('-end_date', '-id')
 
-    # Paginação
-    paginator = Paginator(allocations, 15) # 15 itens por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginação por cursor: "Carregar mais" custa o mesmo em qualquer profundidade
+    page = CursorPaginator(allocations, ordering, per_page=15).page(request.GET.get('cursor'))
 
     context = {
-        'allocations': page_obj,
+        'page': page,
         'filter_type': filter_type,
         'today': today
     }
+    if request.headers.get('HX-Target') == 'load-more-row':
+        return render(request, 'booking/partials/booking_rows.html', context)
     return render(request, 'booking/booking_list.html', context)
 
 
+def _calendar_window(request, default_days=15):
+    """Lê ?start= e ?days= (ou ?end=) da agenda, limitando o tamanho da janela."""
+    start_date = parse_date(request.GET.get('start', '')) or timezone.now().date()
+    end_date = parse_date(request.GET.get('end', ''))
+
+    if end_date and end_date > start_date:
+        days = (end_date - start_date).days
+    else:
+        days = request.GET.get('days', '')
+        days = int(days) if days.isdigit() else default_days
+
+    return start_date, max(1, min(days, MAX_WINDOW_DAYS))
+
+
 @login_required
 def booking_calendar(request):
     """
     Mapa de Ocupação (Agenda).
+    Aceita ?days=15|30|90 (tamanho da janela) e ?start=AAAA-MM-DD (paginação).
+
+    Devolve apenas a "casca" da página: cada andar (ou bloco de quartos)
+    é carregado via HTMX quando aparece na tela (hx-trigger="revealed").
     """
     today = timezone.now().date()
-    days_to_show = 15
-    end_date = today + timedelta(days=days_to_show)
-    dates = [today + timedelta(days=i) for i in range(days_to_show)]
-    
-    # Busca quartos
-    rooms = Room.objects.all().order_by('number')
-
-    # Busca alocações no período (Otimizado)
-    allocations = RoomAllocation.objects.filter(
-        end_date__gte=today,
-        start_date__lte=end_date
-    ).select_related('booking__guest', 'room').exclude(booking__status=Booking.Status.CANCELED)
-
-    # Cria mapa de alocação: {(room_id, date): allocation}
-    booking_map = {}
-    for alloc in allocations:
-        current_date = alloc.start_date
-        # Garante que só mapeia datas dentro do intervalo visualizado
-        start_loop = max(current_date, today)
-        end_loop = min(alloc.end_date, end_date)
-        
-        loop_date = start_loop
-        while loop_date <= end_loop:
-            booking_map[(alloc.room.id, loop_date)] = alloc
-            loop_date += timedelta(days=1)
+    start_date, days_to_show = _calendar_window(request)
+    if days_to_show not in WINDOW_CHOICES:
+        days_to_show = 15
+    end_date = start_date + timedelta(days=days_to_show)
 
     return render(request, 'booking/calendar.html', {
-        'rooms': rooms,
-        'dates': dates,
-        'booking_map': booking_map,
-        'today': today
+        'blocks': calendar_blocks(),
+        'dates': [start_date + timedelta(days=i) for i in range(days_to_show)],
+        'start_date': start_date,
+        'end_date': end_date,
+        'today': today,
+        'days': days_to_show,
+        'window_choices': WINDOW_CHOICES,
+        'previous_start': start_date - timedelta(days=days_to_show),
+        'next_start': end_date,
+    })
+
+
+@login_required
+def booking_calendar_rows(request):
+    """
+    Um bloco de linhas da agenda (?floor=&offset=&start=&end=).
+    Alocações buscadas só para os quartos do bloco e só dentro da janela.
+    Com ?room= devolve só a linha daquele quarto (atualização ao vivo).
+    """
+    start_date, days = _calendar_window(request)
+    room_id = request.GET.get('room')
+    if room_id:
+        try:
+            room_id = uuid.UUID(room_id)
+        except ValueError:
+            return HttpResponse("Quarto inválido.", status=400)
+        grid = OccupancyGrid(Room.objects.filter(pk=room_id), start_date, days).build()
+        return render(request, 'booking/partials/calendar_row.html', {
+            'grid': grid,
+            'today': timezone.now().date(),
+        })
+
+    offset = request.GET.get('offset', '0')
+    floor = request.GET.get('floor', '')
+    offset = int(offset) if offset.isdigit() else 0
+
+    rooms = block_rooms(floor, offset)
+    grid = OccupancyGrid(rooms, start_date, days).build()
+
+    return render(request, 'booking/partials/calendar_block.html', {
+        'grid': grid,
+        'floor': floor,
+        'offset': offset,
+        'today': timezone.now().date(),
+    })
+
+
+@login_required
+def booking_calendar_columns(request):
+    """
+    Avança a janela da agenda: devolve só as NOVAS colunas (datas)
+    para os blocos já carregados (?block=andar:offset, repetido).
+    """
+    start_date = parse_date(request.GET.get('end', '')) or timezone.now().date()
+    days = request.GET.get('days', '')
+    days = min(int(days), MAX_WINDOW_DAYS) if days.isdigit() and int(days) > 0 else 15
+
+    rooms = []
+    for block in request.GET.getlist('block'):
+        floor, _, offset = block.rpartition(':')
+        if offset.isdigit():
+            rooms.extend(block_rooms(floor, int(offset)))
+
+    grid = OccupancyGrid(rooms, start_date, days).build()
+
+    response = render(request, 'booking/partials/calendar_columns.html', {
+        'grid': grid,
+        'today': timezone.now().date(),
     })
+    # O JS da página atualiza o fim da janela (usado pelos blocos ainda não carregados)
+    response['HX-Trigger'] = json.dumps({'calendarExtended': {'end': grid.end_date.isoformat()}})
+    return response
+
+
+@login_required
+def availability_search(request):
+    """
+    Busca de Quartos Livres (Balcão).
+    Uma única query com NOT EXISTS + filtros de capacidade/categoria.
+    """
+    today = timezone.now().date()
+    form = AvailabilitySearchForm(request.GET or None, initial={
+        'start_date': today,
+        'end_date': today + timedelta(days=1),
+    })
+
+    page_obj = None
+    if form.is_valid():
+        rooms = AvailabilityService.search(
+            form.cleaned_data['start_date'],
+            form.cleaned_data['end_date'],
+            adults=form.cleaned_data['adults'],
+            children=form.cleaned_data['children'],
+            category=form.cleaned_data['category'],
+        )
+        paginator = Paginator(rooms, 24)
+        page_obj = paginator.get_page(request.GET.get('page'))
+
+    context = {'form': form, 'page_obj': page_obj}
+
+    # Só devolve os resultados quando o HTMX pede especificamente a grade
+    if request.headers.get('HX-Request') and request.headers.get('HX-Target') == 'availability-results':
+        return render(request, 'booking/partials/availability_results.html', context)
+
+    return render(request, 'booking/availability.html', context)
+
+
+class AvailabilityPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class AvailableRoomsApiView(generics.ListAPIView):
+    """
+    GET /api/availability/?start_date=2026-01-10&end_date=2026-01-12&adults=2&children=0&category=<uuid>
+    """
+    serializer_class = AvailableRoomSerializer
+    pagination_class = AvailabilityPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        form = AvailabilitySearchForm(self.request.query_params)
+        if not form.is_valid():
+            raise ApiValidationError(form.errors)
+        return AvailabilityService.search(
+            form.cleaned_data['start_date'],
+            form.cleaned_data['end_date'],
+            adults=form.cleaned_data['adults'],
+            children=form.cleaned_data['children'],
+            category=form.cleaned_data['category'],
+        )
 
 
 @login_required
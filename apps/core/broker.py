@@ -0,0 +1,103 @@
+"""
+Broker de eventos (pub/sub) para atualizações ao vivo via SSE.
+
+- InProcessBroker: filas asyncio na memória do processo. Funciona sem Redis
+  (dev, testes, um único worker ASGI).
+- RedisBroker: usado quando REDIS_URL está configurado, para que eventos
+  publicados por um worker cheguem aos navegadores conectados em outro.
+
+Publicar é síncrono e seguro a partir de views comuns (threads);
+escutar é assíncrono (usado pela view de streaming).
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+
+
+class InProcessBroker:
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+            except RuntimeError:
+                pass  # Loop do assinante já foi encerrado
+
+    @staticmethod
+    def _offer(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass  # Cliente lento: descarta (o próximo evento do quarto corrige a tela)
+
+    async def listen(self, channel, heartbeat=15):
+        """
+        Gera as mensagens do canal. Gera None a cada `heartbeat` segundos
+        sem eventos (para a view mandar um keep-alive).
+        """
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(entry)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers.get(channel, set()).discard(entry)
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class RedisBroker:
+    """Mesmo contrato do InProcessBroker, sobre Redis PUB/SUB (exige o pacote `redis`)."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self._client.publish(channel, json.dumps(message))
+
+    async def listen(self, channel, heartbeat=15):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            while True:
+                raw = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                yield json.loads(raw['data']) if raw else None
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+            await client.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            redis_url = getattr(settings, 'REDIS_URL', '')
+            _broker = RedisBroker(redis_url) if redis_url else InProcessBroker()
+        return _broker
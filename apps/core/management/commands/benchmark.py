@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.models import Booking
+from benchmarks import BENCHMARKS, runner
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os caminhos quentes (benchmarks/) contra os dados do banco e grava o resultado em JSON. "
+        "Gere os dados antes com generate_hotel. Com --baseline compara com uma execução anterior "
+        "e falha se alguma mediana piorar além da tolerância. O banco não é alterado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', action='append', help="Só este benchmark (pode repetir).")
+        parser.add_argument('--repeat', type=int, help="Execuções medidas por benchmark (padrão: o de cada um).")
+        parser.add_argument('--output', default='benchmark-results.json', help="Arquivo JSON de saída.")
+        parser.add_argument('--baseline', help="JSON de uma execução anterior para comparar.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Piora aceita na mediana (0.2 = 20%%).")
+        parser.add_argument('--list', action='store_true', help="Só lista os benchmarks.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, (_, repeat) in sorted(BENCHMARKS.items()):
+                self.stdout.write(f"{name}  (x{repeat})")
+            return
+
+        unknown = set(options['only'] or ()) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Benchmark desconhecido: {', '.join(sorted(unknown))}. Veja --list.")
+        if options['repeat'] is not None and options['repeat'] < 1:
+            raise CommandError("--repeat deve ser positivo.")
+        if not Booking.objects.exists():
+            raise CommandError("Banco sem reservas. Gere os dados antes: python manage.py generate_hotel")
+        baseline = runner.load(options['baseline']) if options['baseline'] else None
+
+        document = runner.report({})
+        self.stdout.write(
+            f"Dados: {document['dataset']['rooms']} quartos, {document['dataset']['bookings']} reservas, "
+            f"{document['dataset']['transactions']} lançamentos ({document['database']})."
+        )
+        document['results'] = runner.run(options['only'], options['repeat'], log=self.stdout.write)
+        runner.save(options['output'], document)
+        self.stdout.write(f"Resultado gravado em {options['output']}.")
+
+        if not baseline:
+            return
+        if baseline.get('dataset') != document['dataset']:
+            self.stdout.write(self.style.WARNING("Baseline gerado com outro volume de dados: compare com cuidado."))
+
+        rows, regressions = runner.compare(document['results'], baseline, options['tolerance'])
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nComparado com {options['baseline']}:"))
+        for name, current, previous, change in rows:
+            line = f"  {name:<40} {previous:>9.2f} -> {current:>9.2f} ms  ({change:+.0%})"
+            self.stdout.write(self.style.ERROR(line) if name in regressions else line)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) pioraram mais de {options['tolerance']:.0%}.")
+        self.stdout.write(self.style.SUCCESS("Nenhuma regressão."))
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from apps.core.synthetic import HotelGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera um hotel sintético para testes de carga e benchmarks: categorias, quartos, "
+        "hóspedes, anos de reservas sem sobreposição, turnos de caixa e lançamentos. "
+        "Mesma --seed, mesmos dados. Ex.: --rooms 500 --years 5 --consumption 4 "
+        "chega a ~1 milhão de lançamentos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=100, help="Quartos.")
+        parser.add_argument('--guests', type=int, default=5000, help="Hóspedes.")
+        parser.add_argument('--categories', type=int, default=4, help="Categorias de quarto (máx. 6).")
+        parser.add_argument('--years', type=float, default=1, help="Anos de histórico.")
+        parser.add_argument('--future-days', type=int, default=90, help="Dias de reservas futuras.")
+        parser.add_argument('--consumption', type=int, default=2, help="Consumos médios por estadia.")
+        parser.add_argument('--cancel-rate', type=float, default=0.08, help="Fração de reservas canceladas.")
+        parser.add_argument('--cashiers', type=int, default=3, help="Recepcionistas que revezam o caixa.")
+        parser.add_argument('--seed', type=int, default=42, help="Semente (dados reproduzíveis).")
+        parser.add_argument('--prefix', default='G', help="Prefixo dos números de quarto e e-mails gerados.")
+        parser.add_argument('--chunk-size', type=int, default=HotelGenerator.CHUNK_SIZE, help="Linhas por INSERT.")
+        parser.add_argument('--force', action='store_true', help="Permite rodar com DEBUG=False.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("DEBUG=False: isto enche o banco de dados falsos. Use --force se for mesmo o caso.")
+        if min(options['rooms'], options['guests'], options['categories'], options['cashiers']) < 1:
+            raise CommandError("Use valores positivos.")
+        if options['years'] <= 0 or not 0 <= options['cancel_rate'] < 1:
+            raise CommandError("--years deve ser positivo e --cancel-rate entre 0 e 1.")
+
+        generator = HotelGenerator(
+            rooms=options['rooms'],
+            guests=options['guests'],
+            categories=options['categories'],
+            days=round(options['years'] * 365),
+            future_days=options['future_days'],
+            consumption=options['consumption'],
+            cancel_rate=options['cancel_rate'],
+            cashiers=options['cashiers'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            chunk_size=options['chunk_size'],
+            log=self.stdout.write,
+        )
+        try:
+            counts = generator.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+        except IntegrityError as e:
+            raise CommandError(f"Os dados gerados colidem com registros existentes ({e}). Use outro --prefix ou --seed.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pronto em {counts['seconds']}s: {counts['rooms']} quartos, {counts['guests']} hóspedes, "
+            f"{counts['bookings']} reservas, {counts['sessions']} turnos, {counts['transactions']} lançamentos."
+        ))
+        self.stdout.write(
+            f"Para os relatórios de ocupação: python manage.py night_audit "
+            f"--start {generator.start} --end {generator.today}"
+        )
@@ -0,0 +1,368 @@
+import logging
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, reset_queries, transaction
+from django.test import Client
+from django.test.client import MULTIPART_CONTENT
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from apps.accommodations.models import Room
+from apps.accommodations.services import RoomStatusService
+from apps.bookings.availability import AvailabilityService
+from apps.bookings.models import Booking, RoomAllocation
+from apps.core.models import User
+from apps.core.synthetic import HotelGenerator
+from apps.financials.models import CashRegisterSession, PaymentMethod, Product
+from apps.financials.services import CashierService
+from apps.guests.search import search_index
+
+# Orçamento por rota: (máx. de queries, máx. de milissegundos).
+# Medido com a massa de dados do comando: uma rota com N+1 estoura na hora.
+DEFAULT_BUDGET = (12, 500)
+BUDGETS = {
+    'dashboard': (6, 300),
+    'dashboard_counters_partial': (6, 200),
+    'dashboard_alerts_partial': (8, 300),
+    'cashier_status': (3, 100),
+    'room_details_modal': (6, 200),
+    'room_card': (5, 100),
+    'housekeeping_dashboard': (6, 300),
+    'booking_list': (8, 400),
+    'create_booking_htmx': (6, 300),
+    'booking_calendar': (6, 300),
+    'booking_calendar_rows': (8, 500),
+    'booking_calendar_columns': (8, 500),
+    'guest_list': (6, 400),
+    'guest_detail': (8, 300),
+    'receive_payment_htmx': (8, 200),
+    'add_consumption_htmx': (6, 200),
+    'consumption_cart_htmx': (6, 200),
+    'shift_history': (10, 500),
+    'shift_details_modal': (8, 300),
+    'financial_dashboard': (10, 500),
+    'occupancy_report': (10, 500),
+    'export_transactions_csv': (6, 2000),
+    'export_bookings_csv': (6, 2000),
+    'stock_dashboard': (8, 300),
+    'api_availability': (6, 300),
+    'availability_search': (7, 300),
+}
+
+# Rotas de escrita: medidas com POST (dados em Command._writes), cada acesso num
+# savepoint desfeito (toda medição parte do mesmo estado). Rota só POST sem dados aqui
+# responde 405 no GET e reprova: a escrita precisa ser medida.
+WRITE_BUDGETS = {
+    'checkin_htmx': (20, 300),
+    'checkout_htmx': (20, 300),
+    'checkin_batch_htmx': (20, 500),
+    'checkout_batch_htmx': (20, 500),
+    'cancel_booking_htmx': (12, 200),
+    'clean_room_action': (16, 300),
+    'open_register_action': (6, 100),
+    'close_register_action': (10, 100),
+    'receive_payment_htmx': (24, 300),
+    'add_consumption_htmx': (24, 300),
+    'consumption_cart_htmx': (30, 300),
+    'api_consumption_cart': (24, 300),
+    'create_booking_htmx': (22, 300),
+    'guest_create': (10, 200),
+    'restock_product_modal': (16, 200),
+    'product_edit_htmx': (8, 200),
+}
+BATCH_SIZE = 10  # Reservas por POST de check-in/check-out em lote
+
+TIMED_RUNS = 3
+
+SKIPPED = {
+    'room_events_stream',  # Stream infinito no ASGI (no cliente de teste responde 204)
+    'logout_to_login',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Orçamento de queries e de tempo por rota. Gera uma massa de dados realista, "
+        "acessa (GET) toda rota nomeada dos apps com um usuário de cada cargo, envia (POST) "
+        "dados válidos às rotas de escrita e falha se alguma quebrar (5xx), ficar sem medição "
+        "(405) ou passar do orçamento (BUDGETS/WRITE_BUDGETS). Tudo roda numa transação desfeita no final: "
+        "o banco não é alterado. Use no CI para pegar N+1 e consultas que crescem com a tabela."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=300, help="Quartos gerados.")
+        parser.add_argument('--guests', type=int, default=2000, help="Hóspedes gerados.")
+        parser.add_argument('--days', type=int, default=180, help="Dias de histórico de reservas.")
+        parser.add_argument('--seed', type=int, default=42, help="Semente (massa reproduzível).")
+        parser.add_argument('--route', action='append', help="Só esta rota (pode repetir).")
+        parser.add_argument('--role', action='append', choices=User.Roles.values, help="Só este cargo.")
+
+    def handle(self, *args, **options):
+        if min(options['rooms'], options['guests'], options['days']) < 1:
+            raise CommandError("Use valores positivos.")
+
+        failures = []
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                samples = self._seed(options)
+                self.stdout.write(f"Massa de dados gerada em {time.perf_counter() - started:.1f}s.")
+
+                roles = options['role'] or User.Roles.values
+                routes = self._routes(samples, options['route'])
+                writes = self._writes(samples, options['route'])
+                for role in roles:
+                    failures += self._walk(samples['users'][role], routes, writes)
+                transaction.set_rollback(True)
+        finally:
+            # Caches/índice em memória podem ter guardado dados da transação desfeita
+            search_index.invalidate()
+            RoomStatusService.invalidate()
+
+        if failures:
+            raise CommandError(f"{len(set(failures))} rota(s) com erro ou acima do orçamento: {', '.join(sorted(set(failures)))}")
+        self.stdout.write(self.style.SUCCESS("Todas as rotas dentro do orçamento."))
+
+    # --- Massa de dados ---
+
+    def _seed(self, options):
+        generator = HotelGenerator(
+            rooms=options['rooms'], guests=options['guests'], days=options['days'], future_days=60,
+            seed=options['seed'], prefix='QB',
+        )
+        try:
+            counts = generator.run()
+        except (ValueError, IntegrityError) as e:
+            raise CommandError(f"Não foi possível gerar a massa de dados: {e}")
+        self.stdout.write(
+            f"{counts['rooms']} quartos, {counts['guests']} hóspedes, {counts['bookings']} reservas, "
+            f"{counts['transactions']} lançamentos."
+        )
+
+        # Usuários de cada cargo, cada um com o caixa aberto
+        users = {
+            role: User.objects.create_user(
+                f"orcamento-{role.lower()}@example.com", None, role=role,
+                is_staff=role in (User.Roles.ADMIN, User.Roles.MANAGER, User.Roles.FINANCIAL),
+            )
+            for role in User.Roles.values
+        }
+        CashRegisterSession.objects.bulk_create([
+            CashRegisterSession(user=user, opening_balance=Decimal('100.00')) for user in users.values()
+        ])
+
+        current = RoomAllocation.objects.select_related('room', 'booking__guest').filter(
+            room__number__startswith='QB', booking__status=Booking.Status.CHECKED_IN
+        ).first()
+        qb_bookings = Booking.objects.filter(allocations__room__number__startswith='QB').order_by('pk')
+        start = timezone.localdate() + timedelta(days=30)
+        return {
+            'users': users,
+            'room': current.room,
+            'booking': current.booking,
+            'guest': current.booking.guest,
+            'product': Product.objects.filter(is_active=True).first(),
+            'session': CashRegisterSession.objects.filter(
+                user__email__startswith='qbcaixa', status=CashRegisterSession.Status.CLOSED
+            ).first(),
+            # Para as rotas de escrita
+            'products': list(Product.objects.filter(is_active=True, stock__gte=5)[:3]),
+            'method': PaymentMethod.objects.filter(is_active=True).first(),
+            'in_house': list(qb_bookings.filter(status=Booking.Status.CHECKED_IN, balance__gte=10)[:BATCH_SIZE]),
+            'arriving': list(qb_bookings.filter(status=Booking.Status.CONFIRMED)[:BATCH_SIZE]),
+            'free_room': AvailabilityService.free_rooms(start, start + timedelta(days=2)).filter(
+                number__startswith='QB'
+            ).first(),
+            'dates': (start, start + timedelta(days=2)),
+        }
+
+    # --- Rotas ---
+
+    def _routes(self, samples, only=None):
+        """(nome, url) de cada rota nomeada dos apps, com ids de exemplo nos parâmetros."""
+        ids = {
+            'room_id': samples['room'].pk,
+            'booking_id': samples['booking'].pk,
+            'guest_id': samples['guest'].pk,
+            'session_id': samples['session'].pk,
+            'product_id': samples['product'].pk,
+            'pk': samples['product'].pk,
+        }
+        room = samples['room']
+        start = timezone.localdate() + timedelta(days=7)
+        # Parâmetros válidos: a rota é medida no caminho que responde 200, não no 400 da validação
+        search = {'start_date': start, 'end_date': start + timedelta(days=2), 'adults': 1, 'children': 0}
+        query = {
+            'api_availability': search,
+            'availability_search': search,
+            'booking_calendar_rows': {'floor': room.floor, 'offset': 0, 'days': 30},
+            'booking_calendar_columns': {'block': f"{room.floor}:0", 'days': 30},
+            'guest_list': {'q': 'silva'},
+        }
+
+        routes = {}
+        for name, pattern in self._named_patterns(get_resolver().url_patterns):
+            if name in routes or name in SKIPPED or (only and name not in only):
+                continue
+            params = [p for p in pattern.pattern.regex.groupindex if p != 'format']
+            if any(p not in ids for p in params):
+                continue
+            routes[name] = (reverse(name, kwargs={p: ids[p] for p in params}), query.get(name, {}))
+        return routes
+
+    def _writes(self, samples, only=None):
+        """
+        {nome: (url, dados, preparo)} das rotas de escrita (api_*: corpo JSON).
+        preparo (opcional) roda dentro do savepoint, antes do POST, com o usuário da vez.
+        """
+        in_house, arriving = samples['in_house'], samples['arriving']
+        products = samples['products']
+        start, end = samples['dates']
+
+        def close_register(user):
+            CashRegisterSession.objects.filter(
+                user=user, status=CashRegisterSession.Status.OPEN
+            ).update(status=CashRegisterSession.Status.CLOSED)
+            CashierService.forget_session(user.pk)
+
+        def dirty_room(user):
+            Room.objects.filter(pk=samples['free_room'].pk).update(status=Room.Status.DIRTY)
+
+        writes = {
+            'checkin_htmx': ({'booking_id': arriving[0].pk}, {}, None),
+            'checkout_htmx': ({'booking_id': in_house[0].pk}, {}, None),
+            'checkin_batch_htmx': ({}, {'booking': [b.pk for b in arriving]}, None),
+            'checkout_batch_htmx': ({}, {'booking': [b.pk for b in in_house]}, None),
+            'cancel_booking_htmx': ({'booking_id': arriving[0].pk}, {}, None),
+            'clean_room_action': ({'room_id': samples['free_room'].pk}, {}, dirty_room),
+            'open_register_action': ({}, {'opening_balance': '100.00'}, close_register),
+            'close_register_action': ({}, {'closing_balance': '100.00', 'notes': ''}, None),
+            'receive_payment_htmx': ({'booking_id': in_house[0].pk}, {
+                'amount': '1.00', 'payment_method': samples['method'].pk, 'description': '',
+            }, None),
+            'add_consumption_htmx': ({'booking_id': in_house[0].pk}, {
+                'product': products[0].pk, 'quantity': 1,
+            }, None),
+            'consumption_cart_htmx': ({'booking_id': in_house[0].pk}, {
+                f'qty_{product.pk}': 1 for product in products
+            }, None),
+            'api_consumption_cart': ({'booking_id': in_house[0].pk}, {
+                'items': [{'product': str(product.pk), 'quantity': 1} for product in products],
+            }, None),
+            'create_booking_htmx': ({}, {
+                'room': samples['free_room'].pk, 'guest': samples['guest'].pk,
+                'start_date': start, 'end_date': end,
+            }, None),
+            'guest_create': ({}, {
+                'name': 'Orçamento de Queries', 'email': 'orcamento-hospede@example.com',
+                'phone': '11999990000', 'document': '', 'address': '',
+            }, None),
+            'restock_product_modal': ({'product_id': products[0].pk}, {
+                'quantity': 5, 'cost_price': '10.00',
+            }, None),
+            'product_edit_htmx': ({'product_id': products[0].pk}, {
+                'name': products[0].name, 'price': products[0].price, 'is_active': 'on',
+            }, None),
+        }
+        return {
+            name: (reverse(name, kwargs=kwargs), data, setup)
+            for name, (kwargs, data, setup) in writes.items()
+            if not only or name in only
+        }
+
+    def _named_patterns(self, patterns):
+        for entry in patterns:
+            if isinstance(entry, URLResolver):
+                yield from self._named_patterns(entry.url_patterns)
+            elif isinstance(entry, URLPattern) and entry.name and entry.lookup_str.startswith('apps.'):
+                yield entry.name, entry
+
+    def _walk(self, user, routes, writes):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{user.role}"))
+        # IP fora de INTERNAL_IPS: sem a debug toolbar (dev), que pesa na renderização
+        client = Client(raise_request_exception=False, REMOTE_ADDR='10.0.0.1')
+        client.force_login(user)
+
+        # 403/405 são esperados (cargo sem acesso, GET em rota só POST): sem o aviso do Django para cada um
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                failures = self._measure(client, routes, writes)
+                failures += self._measure_writes(client, user, writes)
+        finally:
+            request_logger.setLevel(level)
+        return failures
+
+    def _measure(self, client, routes, writes):
+        failures = []
+        for name, (url, params) in sorted(routes.items()):
+            self._get(client, url, params)  # Aquece caches (o orçamento é do acesso seguinte)
+            reset_queries()  # O log de queries da conexão é limitado (9000): começa do zero
+            with CaptureQueriesContext(connection) as queries:
+                status = self._get(client, url, params)
+            if status == 405 and name in writes:
+                continue  # Só POST: medida em _measure_writes
+            # Tempo: o melhor de TIMED_RUNS acessos (um pico da máquina não reprova a rota)
+            elapsed = min(self._timed(self._get, client, url, params) for _ in range(TIMED_RUNS))
+            failures += self._report(name, status, len(queries), elapsed, BUDGETS.get(name, DEFAULT_BUDGET))
+        return failures
+
+    def _measure_writes(self, client, user, writes):
+        failures = []
+        for name, (url, data, setup) in sorted(writes.items()):
+            request = (client, user, url, data, setup, name.startswith('api_'))
+            self._post(*request)  # Aquece caches
+            reset_queries()
+            captured = []
+            status = self._post(*request, captured)
+            elapsed = min(self._timed(self._post, *request) for _ in range(TIMED_RUNS))
+            failures += self._report(
+                f"{name} (POST)", status, len(captured[0]), elapsed, WRITE_BUDGETS.get(name, DEFAULT_BUDGET)
+            )
+        return failures
+
+    def _report(self, name, status, queries, elapsed, budget):
+        max_queries, max_ms = budget
+        # Rota que quebra (5xx) ou que não foi medida (405) reprova mesmo dentro do orçamento
+        failed = status >= 500 or status == 405 or queries > max_queries or elapsed > max_ms
+        line = f"  {name:<37} {status:>3}  {queries:>3}/{max_queries:<3} queries  {elapsed:>7.1f}/{max_ms} ms"
+        self.stdout.write(self.style.ERROR(line) if failed else line)
+        return [name] if failed else []
+
+    def _timed(self, request, *args):
+        started = time.perf_counter()
+        request(*args)
+        return (time.perf_counter() - started) * 1000
+
+    def _get(self, client, url, params):
+        response = client.get(url, params)
+        if response.streaming:
+            for _ in response.streaming_content:  # Exportações: conta o stream inteiro
+                pass
+        return response.status_code
+
+    def _post(self, client, user, url, data, setup, json, captured=None):
+        """POST num savepoint desfeito em seguida; captured recebe as queries do POST."""
+        savepoint = transaction.savepoint()
+        try:
+            if setup:
+                setup(user)
+            content_type = 'application/json' if json else MULTIPART_CONTENT
+            with CaptureQueriesContext(connection) as queries:
+                status = client.post(url, data, content_type=content_type).status_code
+            if captured is not None:
+                captured.append(queries)
+            return status
+        finally:
+            transaction.savepoint_rollback(savepoint)
+            # Caches em memória podem ter visto o estado desfeito
+            RoomStatusService.invalidate()
+            search_index.invalidate()
+            CashierService.forget_session(user.pk)
@@ -42,4 +42,4 @@ class User(AbstractUser, UUIDModel, TimeStampedModel):
 
     @property
     def is_manager_or_admin(self):
-        return self.is_superuser or self.role in [self.Role.ADMIN, self.Role.MANAGER]
+        return self.is_superuser or self.role in [self.Roles.ADMIN, self.Roles.MANAGER]
@@ -0,0 +1,123 @@
+"""
+Paginação por cursor (keyset) para as listas com "Carregar mais" via HTMX.
+
+Em vez de COUNT(*) + OFFSET (cada página mais funda fica mais lenta), a
+próxima página é buscada a partir da chave do último item visto:
+
+    WHERE (start_date, id) > (último start_date, último id)
+    ORDER BY start_date, id LIMIT 21
+
+Com um índice na ordenação, a página 500 custa o mesmo que a página 1.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    """
+    ordering: campos da chave, o último precisa ser único. Ex.: ('start_date', 'id')
+    ou ('-created_at', '-id'). Todos na mesma direção.
+
+    Sem ordering, a lista já vem ordenada (ex.: resultado ranqueado de uma busca)
+    e o cursor é só a posição do próximo item.
+    """
+
+    def __init__(self, object_list, ordering=None, per_page=20):
+        self.object_list = object_list
+        self.ordering = tuple(ordering or ())
+        self.per_page = per_page
+
+        if self.ordering:
+            directions = {name.startswith('-') for name in self.ordering}
+            if len(directions) > 1:
+                raise ValueError("Todos os campos do cursor precisam ter a mesma direção.")
+            self.descending = directions.pop()
+            self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def page(self, cursor=None):
+        values = self.decode(cursor)
+
+        if not self.ordering:
+            start = values[0] if values else 0
+            rows = list(self.object_list[start:start + self.per_page + 1])
+            next_cursor = self.encode([start + self.per_page]) if len(rows) > self.per_page else None
+            return CursorPage(rows[:self.per_page], next_cursor)
+
+        queryset = self.object_list.order_by(*self.ordering)
+        if values:
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode([self._value(rows[-1], name) for name in self.fields])
+        return CursorPage(rows, next_cursor)
+
+    def _after(self, values):
+        """
+        (a, b, c) > (x, y, z) sem depender de comparação de tuplas no banco:
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        """
+        lookup = 'lt' if self.descending else 'gt'
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for previous, value in zip(self.fields[:i], values[:i]):
+                step &= Q(**{previous: value})
+            condition |= step
+        # Limite redundante no 1º campo: deixa o banco "pular" direto no índice
+        return Q(**{f'{self.fields[0]}__{lookup}e': values[0]}) & condition
+
+    def _value(self, obj, name):
+        value = getattr(obj, name)
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+    def decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(cursor + padding).decode())
+        except (ValueError, UnicodeDecodeError):
+            return None  # Cursor inválido/adulterado: volta para o início
+        if not isinstance(values, list):
+            return None
+
+        if not self.ordering:
+            return values if values and isinstance(values[0], int) and values[0] >= 0 else None
+
+        if len(values) != len(self.fields):
+            return None
+        meta = self.object_list.model._meta
+        try:
+            return [
+                (meta.pk if name == 'pk' else meta.get_field(name)).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError):
+            return None
+
+    @staticmethod
+    def encode(values):
+        # Sem o padding "=" (fica limpo na URL); decode() recoloca
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
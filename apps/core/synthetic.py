@@ -0,0 +1,359 @@
+"""
+Gerador de hotel sintético para testes de carga, benchmarks e orçamento de queries.
+
+Tudo é inserido com bulk_create em lotes (memória constante, milhões de linhas
+em minutos) e sai igual a cada execução com a mesma semente, inclusive os ids.
+Como bulk_create não passa pelo save() nem pelos signals, o ledger das reservas
+e o resumo de estadias dos hóspedes são calculados aqui mesmo; o resto (resumo
+financeiro diário, índice de busca, status dos quartos) é refeito no final.
+"""
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from datetime import time as day_time
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accommodations.models import Room, RoomCategory
+from apps.accommodations.services import RoomStatusService
+from apps.bookings.models import Booking, RoomAllocation
+from apps.core.models import User
+from apps.financials.models import (CashRegisterSession, DailyFinancialSummary,
+                                    PaymentMethod, Product, Transaction)
+from apps.guests.models import Guest
+from apps.guests.search import build_search_text, search_index
+
+# Catálogo base (o mesmo do seed.py)
+CATEGORIES = [
+    ('Standard', '180.00'), ('Vista Mar', '260.00'), ('Suíte Luxo', '450.00'),
+    ('Família', '320.00'), ('Econômico', '120.00'), ('Executivo', '380.00'),
+]
+PAYMENT_METHODS = [('Dinheiro', 'dinheiro'), ('Pix', 'pix'), ('Cartão de Crédito', 'cartao-de-credito'),
+                   ('Cartão de Débito', 'cartao-de-debito')]
+PRODUCTS = [
+    ('Água Mineral 500ml', '5.00'), ('Refrigerante Lata', '7.00'), ('Cerveja Long Neck', '12.00'),
+    ('Batata Chips', '14.00'), ('Chocolate', '9.00'), ('Vinho Tinto 375ml', '68.00'),
+]
+FIRST_NAMES = ['João', 'Maria', 'José', 'Ana', 'Antônio', 'Francisca', 'Carlos', 'Juliana', 'Paulo',
+               'Márcia', 'Lucas', 'Fernanda', 'Pedro', 'Patrícia', 'Rafael', 'Aline', 'Bruno', 'Camila']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Araújo', 'Melo']
+CITIES = [('Cuiabá', 'MT'), ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'),
+          ('Campo Grande', 'MS'), ('Goiânia', 'GO'), ('Curitiba', 'PR'), ('Brasília', 'DF')]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Desliga auto_now/auto_now_add dos modelos: o histórico gerado precisa
+    de created_at no passado (relatórios por período). Só para comandos.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class HotelGenerator:
+    """
+    Hotel com N categorias, quartos e hóspedes e `days` dias de histórico
+    (mais `future_days` de reservas futuras). Cada quarto tem a sua agenda sem
+    sobreposição; estadias concluídas/em curso ganham consumo do frigobar e
+    pagamento, lançados no turno de caixa (um por dia) do dia em que ocorreram.
+
+    Volume de lançamentos ~ reservas x (1 + consumption). Ex.: 500 quartos,
+    5 anos e consumption=4 dão ~200 mil reservas e ~1 milhão de lançamentos.
+    """
+    CHUNK_SIZE = 5000
+    OPENING_BALANCE = Decimal('200.00')
+
+    def __init__(self, rooms=100, guests=2000, categories=4, days=365, future_days=90,
+                 consumption=2, cancel_rate=0.08, cashiers=3, seed=42, prefix='G',
+                 chunk_size=CHUNK_SIZE, log=None):
+        self.rooms = rooms
+        self.guests = guests
+        self.categories = min(categories, len(CATEGORIES))
+        self.days = days
+        self.future_days = future_days
+        self.consumption = consumption
+        self.cancel_rate = cancel_rate
+        self.cashiers = cashiers
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+        # Misturado a cada id: prefixos diferentes nunca geram os mesmos ids no mesmo banco
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_OID, f"hotel-generator:{prefix}:{seed}").int
+        self.log = log or (lambda message: None)
+
+        self.today = timezone.localdate()
+        self.start = self.today - timedelta(days=days)
+        self.counts = {}
+
+    def _uuid(self):
+        # Ids da semente e do prefixo: a mesma execução gera os mesmos registros
+        return uuid.UUID(int=self.rng.getrandbits(128) ^ self.namespace, version=4)
+
+    def _moment(self, day, start_hour=7, end_hour=22):
+        moment = datetime.combine(day, day_time(self.rng.randint(start_hour, end_hour), self.rng.randint(0, 59)))
+        return timezone.make_aware(moment)
+
+    def check(self):
+        """Recusa (ValueError) gerar de novo sobre dados deste mesmo prefixo: os ids colidiriam."""
+        if Room.objects.filter(number__startswith=self.prefix).exists():
+            raise ValueError(f"Já existem quartos com o prefixo '{self.prefix}'. Use outro prefixo.")
+        if Guest.objects.filter(email__startswith=f"{self.prefix.lower()}hospede").exists():
+            raise ValueError(f"Já existem hóspedes gerados com o prefixo '{self.prefix}'. Use outro prefixo.")
+
+    def run(self):
+        self.check()
+        started = time.perf_counter()
+        with transaction.atomic(), explicit_timestamps(Booking, CashRegisterSession, Transaction):
+            self._catalog()
+            self._people()
+            self._sessions()
+            self._stays()
+            self._close_sessions()
+        self._refresh()
+        self.counts['seconds'] = round(time.perf_counter() - started, 1)
+        return self.counts
+
+    # --- Cadastros ---
+
+    def _catalog(self):
+        self.methods = []
+        for name, slug in PAYMENT_METHODS:
+            method, _ = PaymentMethod.objects.get_or_create(slug=slug, defaults={'name': name})
+            self.methods.append(method.pk)
+
+        products = list(Product.objects.filter(is_active=True).values_list('pk', 'name', 'price'))
+        if not products:
+            created = Product.objects.bulk_create([
+                Product(name=name, price=Decimal(price), stock=self.rng.randint(20, 80))
+                for name, price in PRODUCTS
+            ])
+            products = [(p.pk, p.name, p.price) for p in created]
+        self.products = products
+
+        self.category_prices = []
+        for name, price in CATEGORIES[:self.categories]:
+            category, _ = RoomCategory.objects.get_or_create(name=name, defaults={'base_price': Decimal(price)})
+            self.category_prices.append((category.pk, category.base_price))
+
+        digits = max(3, len(str(self.rooms)))
+        self.room_list = []
+        rooms = []
+        for i in range(self.rooms):
+            category_id, price = self.category_prices[i % len(self.category_prices)]
+            room = Room(id=self._uuid(), number=f"{self.prefix}{i + 1:0{digits}d}", floor=str(i // 20 + 1),
+                        category_id=category_id)
+            rooms.append(room)
+            self.room_list.append((room.pk, price))
+        Room.objects.bulk_create(rooms, batch_size=self.chunk_size)
+        self.counts['rooms'] = len(rooms)
+        self.log(f"{len(rooms)} quartos em {len(self.category_prices)} categorias.")
+
+    def _people(self):
+        self.guest_list = []
+        batch = []
+        for i in range(self.guests):
+            city, state = self.rng.choice(CITIES)
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            guest = Guest(
+                id=self._uuid(), name=name, email=f"{self.prefix.lower()}hospede{i}@example.com",
+                phone=f"65 9{self.rng.randint(1000, 9999)}-{self.rng.randint(1000, 9999)}",
+                document=f"{self.rng.randint(0, 99999999999):011d}", city=city, state=state,
+            )
+            guest.search_text = build_search_text(guest)
+            batch.append(guest)
+            self.guest_list.append(guest)
+            if len(batch) >= self.chunk_size:
+                Guest.objects.bulk_create(batch)
+                batch = []
+        Guest.objects.bulk_create(batch)
+        self.counts['guests'] = len(self.guest_list)
+        self.log(f"{len(self.guest_list)} hóspedes.")
+
+        self.cashier_ids = []
+        for i in range(self.cashiers):
+            user, created = User.objects.get_or_create(
+                email=f"{self.prefix.lower()}caixa{i}@example.com",
+                defaults={'role': User.Roles.RECEPTIONIST, 'first_name': 'Caixa', 'last_name': str(i + 1)},
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            self.cashier_ids.append(user.pk)
+
+    def _sessions(self):
+        """Um turno por dia, revezando os caixas; o de hoje fica aberto."""
+        self.sessions = {}
+        self.session_sums = {}
+        open_users = set(CashRegisterSession.objects.filter(
+            status=CashRegisterSession.Status.OPEN
+        ).values_list('user_id', flat=True))
+
+        batch = []
+        for offset in range(self.days + 1):
+            day = self.start + timedelta(days=offset)
+            user_id = self.cashier_ids[offset % len(self.cashier_ids)]
+            opened = self._moment(day, 6, 7)
+            is_today = day == self.today
+            if is_today and user_id in open_users:
+                continue  # O caixa já tem um turno aberto: hoje fica sem lançamentos
+            session = CashRegisterSession(
+                id=self._uuid(), user_id=user_id, opening_balance=self.OPENING_BALANCE,
+                status=CashRegisterSession.Status.OPEN if is_today else CashRegisterSession.Status.CLOSED,
+                closed_at=None if is_today else self._moment(day, 23, 23),
+                created_at=opened, updated_at=opened,
+            )
+            batch.append(session)
+            self.sessions[day] = session
+            self.session_sums[day] = Decimal('0.00')
+        CashRegisterSession.objects.bulk_create(batch, batch_size=self.chunk_size)
+        self.counts['sessions'] = len(batch)
+
+    # --- Reservas e lançamentos ---
+
+    def _stays(self):
+        self.bookings, self.allocations, self.transactions = [], [], []
+        self.counts.update(bookings=0, transactions=0)
+        self.occupied = []
+
+        horizon = self.today + timedelta(days=self.future_days)
+        for room_id, price in self.room_list:
+            day = self.start + timedelta(days=self.rng.randint(0, 3))
+            while day < horizon:
+                nights = self.rng.choice((1, 1, 2, 2, 2, 3, 3, 4, 5, 7))
+                end = day + timedelta(days=nights)
+                self._stay(room_id, price, day, end)
+                if len(self.transactions) >= self.chunk_size or len(self.bookings) >= self.chunk_size:
+                    self._flush()
+                # Ocupação ~75%: às vezes o quarto vira no mesmo dia, às vezes fica vazio uns dias
+                day = end + timedelta(days=self.rng.choice((0, 0, 0, 1, 1, 2, 3, 5)))
+        self._flush()
+
+    def _stay(self, room_id, price, start, end):
+        rng = self.rng
+        if end <= self.today:
+            status = Booking.Status.CANCELED if rng.random() < self.cancel_rate else Booking.Status.COMPLETED
+        elif start <= self.today:
+            status = Booking.Status.CHECKED_IN
+            self.occupied.append(room_id)
+        elif rng.random() < self.cancel_rate:
+            status = Booking.Status.CANCELED
+        else:
+            status = Booking.Status.PENDING if rng.random() < 0.15 else Booking.Status.CONFIRMED
+
+        booked = min(self._moment(start - timedelta(days=rng.randint(0, 60))), timezone.now())
+        # agreed_price é a diária; o ledger soma agreed_price (mesma regra de Booking.ledger_expressions)
+        rooms_total = price
+        guest = rng.choice(self.guest_list)
+        booking = Booking(
+            id=self._uuid(), guest_id=guest.pk, status=status,
+            rooms_total=rooms_total, created_at=booked, updated_at=booked,
+        )
+        self.bookings.append(booking)
+        self.allocations.append(RoomAllocation(
+            id=self._uuid(), booking_id=booking.pk, room_id=room_id, start_date=start, end_date=end,
+            agreed_price=price, is_active=status not in Booking.RELEASED_STATUSES,
+        ))
+
+        if status != Booking.Status.CANCELED:
+            guest.stays_count += 1
+        if status not in (Booking.Status.COMPLETED, Booking.Status.CHECKED_IN):
+            return
+
+        # Frigobar ao longo da estadia (só dias que já passaram)
+        last_day = min(end - timedelta(days=1), self.today)
+        for _ in range(rng.randint(0, 2 * self.consumption)):
+            day = start + timedelta(days=rng.randint(0, (last_day - start).days))
+            product_id, name, product_price = rng.choice(self.products)
+            quantity = rng.choice((1, 1, 1, 2))
+            amount = product_price * quantity
+            # O ledger só soma o que virou lançamento (dia sem turno não grava nada)
+            if self._transaction(day, Transaction.Type.CONSUMPTION, amount, booking, product_id=product_id,
+                                 description=f"Consumo: {quantity}x {name}"):
+                booking.consumption_total += amount
+
+        # Concluída: paga tudo no check-out. Em curso: diárias adiantadas no check-in.
+        if status == Booking.Status.COMPLETED:
+            amount, day = booking.rooms_total + booking.consumption_total, end
+        else:
+            amount, day = booking.rooms_total, start
+        if self._transaction(day, Transaction.Type.INCOME, amount, booking,
+                             payment_method_id=rng.choice(self.methods), description="Pagamento de hospedagem"):
+            booking.paid_total += amount
+
+        # Resumo de estadias (mesmas regras de Guest.stay_expressions)
+        guest.total_spent += booking.paid_total
+        if status == Booking.Status.COMPLETED:
+            guest.completed_stays += 1
+        if guest.last_stay_date is None or end > guest.last_stay_date:
+            guest.last_stay_date = end
+
+    def _transaction(self, day, transaction_type, amount, booking, **fields):
+        """Lança no turno do dia. Devolve False se o dia não tem turno (nada gravado)."""
+        session = self.sessions.get(day)
+        if session is None:
+            return False  # Antes do período ou caixa de hoje já ocupado
+        moment = self._moment(day)
+        self.session_sums[day] += amount
+        self.transactions.append(Transaction(
+            id=self._uuid(), session_id=session.pk, booking_id=booking.pk, transaction_type=transaction_type,
+            amount=amount, created_at=moment, updated_at=moment, **fields,
+        ))
+        return True
+
+    def _flush(self):
+        for booking in self.bookings:
+            booking.balance = booking.rooms_total + booking.consumption_total - booking.paid_total
+        Booking.objects.bulk_create(self.bookings)
+        RoomAllocation.objects.bulk_create(self.allocations)
+        Transaction.objects.bulk_create(self.transactions)
+
+        self.counts['bookings'] += len(self.bookings)
+        self.counts['transactions'] += len(self.transactions)
+        self.log(f"  {self.counts['bookings']} reservas, {self.counts['transactions']} lançamentos...")
+        self.bookings, self.allocations, self.transactions = [], [], []
+
+    def _close_sessions(self):
+        """Saldo calculado de cada turno; ~5% fecham com quebra ou sobra."""
+        closed = []
+        for day, session in self.sessions.items():
+            if session.status != CashRegisterSession.Status.CLOSED:
+                continue
+            session.calculated_balance = session.opening_balance + self.session_sums[day]
+            difference = Decimal(0)
+            if self.rng.random() < 0.05:
+                difference = Decimal(self.rng.randint(-3000, 2000)) / 100
+            session.closing_balance = session.calculated_balance + difference
+            session.difference = difference
+            closed.append(session)
+        CashRegisterSession.objects.bulk_update(
+            closed, ['calculated_balance', 'closing_balance', 'difference'], batch_size=self.chunk_size
+        )
+
+    # --- Dados derivados ---
+
+    def _refresh(self):
+        started = time.perf_counter()
+        # Hóspedes gerados só têm reservas geradas: o resumo já foi somado em _stay()
+        Guest.objects.bulk_update(self.guest_list, Guest.STAY_FIELDS, batch_size=1000)
+        for i in range(0, len(self.occupied), self.chunk_size):
+            Room.objects.filter(pk__in=self.occupied[i:i + self.chunk_size]).update(status=Room.Status.OCCUPIED)
+        DailyFinancialSummary.rebuild(self.start, self.today)
+        search_index.invalidate()
+        RoomStatusService.invalidate()
+        self.log(f"Resumos recalculados em {time.perf_counter() - started:.1f}s.")
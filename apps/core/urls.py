@@ -1,7 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from apps.bookings.views import AvailableRoomsApiView
 from apps.core.views import dashboard, logout_and_redirect_login
+from apps.financials.views import ConsumptionCartApiView
 
 from . import views
 
@@ -16,7 +18,11 @@ urlpatterns = [
     path('accommodations/', include('apps.accommodations.urls')),
     path('logout-to-login/', logout_and_redirect_login, name='logout_to_login'),
     path('dashboard/partial/alerts/', views.dashboard_alerts_partial, name='dashboard_alerts_partial'),
+    path('dashboard/partial/counters/', views.dashboard_counters_partial, name='dashboard_counters_partial'),
 
+    # Api
+    path('api/availability/', AvailableRoomsApiView.as_view(), name='api_availability'),
+    path('api/bookings/<uuid:booking_id>/consumption/', ConsumptionCartApiView.as_view(), name='api_consumption_cart'),
     # Api de Testes
     path('api/', include(router.urls))
 ]
@@ -8,6 +8,7 @@ from django.utils import timezone
 from rest_framework import viewsets
 
 from apps.accommodations.models import Room
+from apps.accommodations.services import RoomStatusService
 from apps.bookings.models import Booking, RoomAllocation
 from apps.financials.models import Product
 from apps.financials.serializers import ProductSerializer
@@ -32,11 +33,12 @@ def dashboard_alerts_partial(request):
 
     # OTIMIZAÇÃO: 
     # 1. select_related('guest') -> Traz o hóspede (evita query no template)
-    # 2. prefetch_related('allocations') -> Traz os quartos (evita query N+1 no loop)
+    # 2. prefetch_related('allocations__room') -> Traz os quartos (evita query N+1 no loop)
+    # 3. Saldo devedor vem do ledger gravado na reserva (sem agregação por linha)
     ending_soon = Booking.objects.filter(
         status='CHECKED_IN',
         allocations__end_date__range=(today, tomorrow) # Correção: check_out -> end_date
-    ).select_related('guest').prefetch_related('allocations').distinct()
+    ).select_related('guest').prefetch_related('allocations__room').distinct()
 
     return render(request, 'core/partials/alerts_widget.html', {
         'ending_soon': ending_soon,
@@ -45,36 +47,27 @@ def dashboard_alerts_partial(request):
 
 
 @login_required
-def dashboard(request):
-    today = timezone.now().date()
+def dashboard_counters_partial(request):
+    """
+    Cards de métricas do Dashboard, re-renderizados quando um quarto muda
+    de status (evento roomStatusChanged, com debounce no cliente).
+    """
+    return render(request, 'core/partials/room_counters.html', RoomStatusService.summary())
 
-    # Busca quartos ordenados
-    rooms = Room.objects.all().order_by('number')
 
-    # Métricas Rápidas (Direto do Banco)
-    total_rooms = rooms.count()
-    occupied_count = rooms.filter(status='OCCUPIED').count()
-    cleaning_count = rooms.filter(status='DIRTY').count()
-    available_count = rooms.filter(status='AVAILABLE').count()
+@login_required
+def dashboard(request):
+    today = timezone.now().date()
 
-    # Taxa de Ocupação
-    occupancy_rate = 0
-    if total_rooms > 0:
-        occupancy_rate = int((occupied_count / total_rooms) * 100)
+    # Busca quartos ordenados (só os campos usados no mapa de quartos)
+    rooms = RoomStatusService.label_rooms(Room.objects.only('id', 'number', 'status').order_by('number'))
 
-    # Movimentação do Dia
-    check_ins = RoomAllocation.objects.filter(start_date=today).count()
-    check_outs = RoomAllocation.objects.filter(end_date=today).count()
+    # Métricas Rápidas (1 query agrupada, em cache e invalidada por signals)
+    summary = RoomStatusService.summary()
 
     context = {
         'rooms': rooms,
-        'total_rooms': total_rooms,
-        'occupied_rooms': occupied_count,
-        'cleaning_rooms': cleaning_count,
-        'available_rooms': available_count,
-        'occupancy_rate': occupancy_rate,
-        'check_ins': check_ins,
-        'check_outs': check_outs,
+        **summary,
         'today': today,
     }
 
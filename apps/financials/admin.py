@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.db.models import Sum
-from .models import PaymentMethod, CashRegisterSession, Transaction, Product
+from .models import PaymentMethod, CashRegisterSession, Transaction, Product, DailyFinancialSummary
 
 @admin.register(PaymentMethod)
 class PaymentMethodAdmin(admin.ModelAdmin):
@@ -29,3 +29,10 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ('created_at', 'amount', 'transaction_type', 'payment_method', 'booking', 'product')
     list_filter = ('transaction_type', 'payment_method')
     search_fields = ('description', 'booking__guest__name')
+
+@admin.register(DailyFinancialSummary)
+class DailyFinancialSummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'transaction_type', 'payment_method', 'total', 'count')
+    list_filter = ('transaction_type', 'payment_method')
+    date_hierarchy = 'date'
+    readonly_fields = ('date', 'transaction_type', 'payment_method', 'total', 'count')
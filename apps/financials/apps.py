@@ -4,3 +4,6 @@ class FinancialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.financials'
     verbose_name = 'Financeiro'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registra os receivers)
@@ -1,6 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import PaymentMethod, Product
+from .models import CashRegisterSession, PaymentMethod, Product
+from .services import ShiftReportService
 from decimal import Decimal
 
 class ReceivePaymentForm(forms.Form):
@@ -68,6 +69,49 @@ class ConsumptionForm(forms.Form):
         })
     )
 
+class ConsumptionCartForm(forms.Form):
+    """
+    Conferência do frigobar: um campo de quantidade por produto com estoque.
+    Campos "qty_<id do produto>"; zero ou vazio = não consumido.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.products = list(Product.objects.filter(is_active=True, stock__gt=0).order_by('name'))
+        for product in self.products:
+            self.fields[f'qty_{product.pk}'] = forms.IntegerField(
+                label=product.name,
+                min_value=0,
+                max_value=product.stock,
+                required=False,
+                widget=forms.NumberInput(attrs={
+                    'class': 'input input-bordered input-sm w-20 text-center font-bold',
+                    'min': '0',
+                    'max': str(product.stock),
+                    'placeholder': '0',
+                    'data-price': str(product.price),
+                    'oninput': 'updateCartTotal()',
+                })
+            )
+
+    def rows(self):
+        """(produto, campo) para o template."""
+        return [(product, self[f'qty_{product.pk}']) for product in self.products]
+
+    def items(self):
+        """[(produto, quantidade)] só dos itens consumidos."""
+        return [
+            (product, self.cleaned_data[f'qty_{product.pk}'])
+            for product in self.products
+            if self.cleaned_data.get(f'qty_{product.pk}')
+        ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.errors and not self.items():
+            raise ValidationError("Informe a quantidade de ao menos um item.")
+        return cleaned_data
+
 class RestockForm(forms.Form):
     quantity = forms.IntegerField(
         label="Quantidade Recebida",
@@ -99,3 +143,62 @@ class ProductForm(forms.ModelForm):
             'price': 'Preço de Venda (R$)',
             'is_active': 'Disponível para Venda?'
         }
+
+
+class ShiftFilterForm(forms.Form):
+    """
+    Filtros da Auditoria de Caixa. Sem datas, vale a janela padrão do relatório.
+    """
+    OUTCOME_CHOICES = [
+        ('', 'Todos'),
+        ('shortage', 'Só quebras'),
+        ('surplus', 'Só sobras'),
+    ]
+
+    start_date = forms.DateField(
+        label="De",
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'input input-bordered input-sm w-full'})
+    )
+
+    end_date = forms.DateField(
+        label="Até",
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'input input-bordered input-sm w-full'})
+    )
+
+    user = forms.ModelChoiceField(
+        queryset=None,
+        label="Funcionário",
+        required=False,
+        empty_label="Todos",
+        widget=forms.Select(attrs={'class': 'select select-bordered select-sm w-full'})
+    )
+
+    outcome = forms.ChoiceField(
+        label="Resultado",
+        choices=OUTCOME_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'select select-bordered select-sm w-full'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from apps.core.models import User
+
+        # Só quem já fechou algum caixa
+        self.fields['user'].queryset = User.objects.filter(
+            cashregistersession__status=CashRegisterSession.Status.CLOSED
+        ).distinct().order_by('first_name', 'email')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start_date')
+        end = cleaned_data.get('end_date')
+
+        if start and end:
+            if end < start:
+                self.add_error('end_date', "A data final deve ser depois da inicial.")
+            elif (end - start).days > ShiftReportService.MAX_WINDOW_DAYS:
+                self.add_error('start_date', f"O período máximo é de {ShiftReportService.MAX_WINDOW_DAYS} dias.")
+        return cleaned_data
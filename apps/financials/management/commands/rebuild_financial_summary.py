@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.financials.models import DailyFinancialSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o resumo financeiro diário (DailyFinancialSummary) a partir das "
+        "transações. Sem datas, recalcula todo o histórico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Primeiro dia (AAAA-MM-DD).")
+        parser.add_argument('--end', help="Último dia, inclusive (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        start_date = self._parse(options['start'], '--start')
+        end_date = self._parse(options['end'], '--end')
+        if start_date and end_date and end_date < start_date:
+            raise CommandError("--end deve ser igual ou posterior a --start.")
+
+        rows = DailyFinancialSummary.rebuild(start_date, end_date)
+        self.stdout.write(self.style.SUCCESS(f"{rows} linha(s) de resumo gravada(s)."))
+
+    def _parse(self, value, option):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if not parsed:
+            raise CommandError(f"{option}: data inválida '{value}', use AAAA-MM-DD.")
+        return parsed
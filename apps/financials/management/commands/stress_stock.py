@@ -0,0 +1,132 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from apps.bookings.models import Booking
+from apps.core.models import User
+from apps.financials.models import CashRegisterSession, Product, Transaction
+from apps.financials.services import CashierService
+from apps.guests.models import Guest
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de estresse da baixa de estoque: várias threads lançando consumo do mesmo "
+        "produto ao mesmo tempo. Confere que nunca se vende mais do que o estoque. "
+        "Cria produto, hóspede, reserva e caixas (um por thread) temporários e apaga tudo no final. "
+        "Rode contra o Postgres (no SQLite as escritas são serializadas pelo lock do arquivo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=20, help="Threads simultâneas.")
+        parser.add_argument('--attempts', type=int, default=5, help="Vendas tentadas por thread.")
+        parser.add_argument('--stock', type=int, default=50, help="Estoque inicial do produto.")
+        parser.add_argument('--quantity', type=int, default=1, help="Unidades por venda.")
+        parser.add_argument(
+            '--max-error-rate', type=float, default=0.2,
+            help="Fração máxima de tentativas com erro de lock (acima disso a disputa não foi testada).",
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        attempts = options['attempts']
+        stock = options['stock']
+        quantity = options['quantity']
+        if min(threads, attempts, quantity) < 1 or stock < 0:
+            raise CommandError("Use valores positivos.")
+        if threads * attempts * quantity <= stock:
+            # Sem demanda além do estoque ninguém disputa a última unidade
+            raise CommandError("A demanda (threads x tentativas x unidades) precisa passar do estoque.")
+
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"Banco {connection.vendor}: as threads vão disputar o lock do arquivo; "
+                "erros de 'database is locked' são contados à parte."
+            ))
+
+        # Um caixa aberto por thread (vários bares/recepcionistas lançando ao mesmo tempo)
+        cashiers = [
+            User.objects.create_user(f"estresse-estoque-{i}@example.com", None, role=User.Roles.RECEPTIONIST)
+            for i in range(threads)
+        ]
+        for cashier in cashiers:
+            CashierService.open_session(cashier, Decimal('0.00'))
+        guest = Guest.objects.create(name="Teste de Estresse (Estoque)", phone="0")
+        booking = Booking.objects.create(guest=guest, status=Booking.Status.CONFIRMED)
+        product = Product.objects.create(name="[estresse] Produto", price=Decimal('1.00'), stock=stock)
+
+        results = {'sold': 0, 'refused': 0, 'errors': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker(cashier):
+            try:
+                barrier.wait()  # Todas começam juntas: máximo de disputa
+                for _ in range(attempts):
+                    try:
+                        CashierService.register_consumption(booking, product, quantity, cashier)
+                        outcome = 'sold'
+                    except ValidationError:
+                        outcome = 'refused'
+                    except OperationalError:
+                        outcome = 'errors'
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connections.close_all()
+
+        try:
+            started = time.perf_counter()
+            pool = [threading.Thread(target=worker, args=(cashier,)) for cashier in cashiers]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            final_stock = Product.objects.get(pk=product.pk).stock
+            recorded = Transaction.objects.filter(booking=booking).count()
+            booking.refresh_from_db()
+        finally:
+            Transaction.objects.filter(booking=booking).delete()
+            booking.delete()
+            guest.delete()
+            product.delete()
+            CashRegisterSession.objects.filter(user__in=cashiers).delete()
+            for cashier in cashiers:
+                CashierService.forget_session(cashier.pk)
+                cashier.delete()
+
+        sold_units = results['sold'] * quantity
+        error_rate = results['errors'] / (threads * attempts)
+        self.stdout.write(
+            f"{threads} threads x {attempts} tentativas em {elapsed:.2f}s: "
+            f"{results['sold']} vendas, {results['refused']} recusadas (sem estoque), "
+            f"{results['errors']} erros de lock ({error_rate:.0%}). Estoque final: {final_stock}."
+        )
+
+        problems = []
+        if final_stock != stock - sold_units:
+            problems.append(f"estoque final {final_stock} != {stock} - {sold_units} vendidos")
+        if sold_units > stock:
+            problems.append(f"vendeu {sold_units} unidades com estoque de {stock}")
+        if recorded != results['sold']:
+            problems.append(f"{recorded} lançamentos para {results['sold']} vendas")
+        if booking.consumption_total != product.price * sold_units:
+            problems.append(f"consumo da reserva R$ {booking.consumption_total} != R$ {product.price * sold_units}")
+        if results['refused'] and results['sold'] < min(threads * attempts, stock // quantity):
+            problems.append("vendas recusadas com estoque ainda disponível")
+        # Os erros de lock não podem dominar: com quase tudo falhando, "não vendeu além
+        # do estoque" vale trivialmente e a disputa pela última unidade nunca aconteceu
+        if error_rate > options['max_error_rate']:
+            problems.append(f"{error_rate:.0%} das tentativas com erro de lock (máx. {options['max_error_rate']:.0%})")
+        if final_stock >= quantity:
+            problems.append(f"estoque não chegou ao fim ({final_stock} restantes): a disputa não foi exercitada")
+
+        if problems:
+            raise CommandError("Falhou: " + "; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("OK: nenhuma venda além do estoque."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0005_alter_transaction_transaction_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashregistersession',
+            index=models.Index(fields=['closed_at', 'id'], name='session_closed_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:58
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_summary(apps, schema_editor):
+    """Gera o resumo diário das transações já existentes."""
+    Transaction = apps.get_model('financials', 'Transaction')
+    DailyFinancialSummary = apps.get_model('financials', 'DailyFinancialSummary')
+
+    rows = Transaction.objects.annotate(day=TruncDate('created_at')).values(
+        'day', 'transaction_type', 'payment_method_id'
+    ).annotate(day_total=Sum('amount'), day_count=Count('id')).order_by()
+
+    DailyFinancialSummary.objects.bulk_create([
+        DailyFinancialSummary(
+            date=row['day'],
+            transaction_type=row['transaction_type'],
+            payment_method_id=row['payment_method_id'],
+            total=row['day_total'],
+            count=row['day_count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0006_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFinancialSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='Data')),
+                ('transaction_type', models.CharField(choices=[('INCOME', 'Receita (Entrada)'), ('EXPENSE', 'Despesa (Saída)'), ('REFUND', 'Estorno'), ('CONSUMPTION', 'Consumo (Frigobar/Bar)')], max_length=20, verbose_name='Tipo')),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Total')),
+                ('count', models.IntegerField(default=0, verbose_name='Transações')),
+                ('payment_method', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='financials.paymentmethod', verbose_name='Método de Pagamento')),
+            ],
+            options={
+                'verbose_name': 'Resumo Financeiro Diário',
+                'verbose_name_plural': 'Resumos Financeiros Diários',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('payment_method__isnull', False)), fields=('date', 'transaction_type', 'payment_method'), name='daily_summary_unique_method'), models.UniqueConstraint(condition=models.Q(('payment_method__isnull', True)), fields=('date', 'transaction_type'), name='daily_summary_unique_no_method')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0008_transaction_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashregistersession',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['user'], name='session_open_user_idx'),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from apps.core.mixins import UUIDModel, TimeStampedModel
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
 class PaymentMethod(UUIDModel, TimeStampedModel):
@@ -60,6 +64,14 @@ class CashRegisterSession(UUIDModel, TimeStampedModel):
         verbose_name = _("Sessão de Caixa")
         verbose_name_plural = _("Sessões de Caixa")
         ordering = ['-created_at']
+        indexes = [
+            # Cursor da auditoria de caixas
+            models.Index(fields=['closed_at', 'id'], name='session_closed_cursor_idx'),
+            # Caixa aberto do usuário (badge/transações): só as sessões abertas entram
+            models.Index(
+                fields=['user'], condition=models.Q(status='OPEN'), name='session_open_user_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Caixa de {self.user} ({self.created_at.strftime('%d/%m %H:%M')})"
@@ -120,6 +132,10 @@ class Transaction(UUIDModel, TimeStampedModel):
         verbose_name = _("Transação Financeira")
         verbose_name_plural = _("Transações Financeiras")
         ordering = ['-created_at']
+        indexes = [
+            # Exportações e relatórios por período
+            models.Index(fields=['created_at'], name='transaction_created_idx'),
+        ]
 
     def __str__(self):
         icon = "+" if self.transaction_type == 'INCOME' else "-"
@@ -136,4 +152,142 @@ class Transaction(UUIDModel, TimeStampedModel):
 
         # Consumo é positivo (Aumenta a dívida), Pagamento é positivo (Abate a dívida na lógica do Booking)
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Transaction.objects.filter(pk=self.pk).values(
+                    'created_at', 'transaction_type', 'payment_method_id', 'amount', 'booking_id'
+                ).first()
+
+            super().save(*args, **kwargs)
+
+            # Mantém o resumo diário em dia (edição = estorna o valor antigo e lança o novo)
+            if previous:
+                DailyFinancialSummary.record(
+                    timezone.localdate(previous['created_at']), previous['transaction_type'],
+                    previous['payment_method_id'], -previous['amount'], count=-1,
+                )
+            DailyFinancialSummary.record(
+                timezone.localdate(self.created_at), self.transaction_type,
+                self.payment_method_id, self.amount,
+            )
+
+            # Ledger da reserva idem: admin e inlines também passam por aqui
+            if previous:
+                self.post_to_ledger(previous['booking_id'], previous['transaction_type'], -previous['amount'])
+            self.post_to_ledger(self.booking_id, self.transaction_type, self.amount)
+
+    def post_to_ledger(self, booking_id, transaction_type, amount):
+        """
+        Aplica o lançamento no ledger da reserva `booking_id` (amount negativo estorna).
+        Só INCOME (pagamento) e CONSUMPTION (consumo) entram no saldo.
+        """
+        if transaction_type == self.Type.INCOME:
+            delta = {'paid': amount}
+        elif transaction_type == self.Type.CONSUMPTION:
+            delta = {'consumption': amount}
+        else:
+            return
+        if not booking_id:
+            return
+        if booking_id == self.booking_id:
+            booking = self.booking  # Reaproveita a instância (quem chamou vê o saldo novo)
+        else:
+            booking = Transaction.booking.field.related_model.objects.filter(pk=booking_id).first()
+        if booking:
+            booking.add_to_ledger(**delta)
+
+
+class DailyFinancialSummary(UUIDModel):
+    """
+    Resumo diário das transações por tipo e método de pagamento.
+    O Dashboard Financeiro lê daqui (no máximo 366 dias) em vez de varrer Transaction.
+    Atualizado a cada Transaction.save(); rebuild_financial_summary reconstrói do zero.
+    """
+    date = models.DateField(_("Data"))
+    transaction_type = models.CharField(_("Tipo"), max_length=20, choices=Transaction.Type.choices)
+    payment_method = models.ForeignKey(
+        PaymentMethod,
+        on_delete=models.PROTECT,
+        null=True, blank=True,
+        verbose_name=_("Método de Pagamento")
+    )
+
+    total = models.DecimalField(_("Total"), max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.IntegerField(_("Transações"), default=0)
+
+    class Meta:
+        verbose_name = _("Resumo Financeiro Diário")
+        verbose_name_plural = _("Resumos Financeiros Diários")
+        ordering = ['-date']
+        constraints = [
+            # NULL não conta como repetido num UNIQUE: o "sem método" precisa do seu
+            models.UniqueConstraint(
+                fields=['date', 'transaction_type', 'payment_method'],
+                condition=Q(payment_method__isnull=False),
+                name='daily_summary_unique_method',
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'transaction_type'],
+                condition=Q(payment_method__isnull=True),
+                name='daily_summary_unique_no_method',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y} {self.get_transaction_type_display()}: R$ {self.total}"
+
+    @staticmethod
+    def record(date, transaction_type, payment_method_id, amount, count=1):
+        """Soma (UPDATE com F) na linha do dia, criando-a na primeira transação."""
+        key = {
+            'date': date,
+            'transaction_type': transaction_type,
+            'payment_method_id': payment_method_id,
+        }
+        changes = {'total': F('total') + amount, 'count': F('count') + count}
+        if DailyFinancialSummary.objects.filter(**key).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                DailyFinancialSummary.objects.create(**key, total=amount, count=count)
+        except IntegrityError:
+            # Outra transação criou a linha ao mesmo tempo: agora o UPDATE pega
+            DailyFinancialSummary.objects.filter(**key).update(**changes)
+
+    @staticmethod
+    def rebuild(start_date=None, end_date=None):
+        """
+        Recalcula o resumo a partir de Transaction (datas inclusivas; sem datas, tudo).
+        Devolve a quantidade de linhas gravadas.
+        """
+        transactions = Transaction.objects.all()
+        summaries = DailyFinancialSummary.objects.all()
+        if start_date:
+            transactions = transactions.filter(
+                created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min))
+            )
+            summaries = summaries.filter(date__gte=start_date)
+        if end_date:
+            transactions = transactions.filter(
+                created_at__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+            )
+            summaries = summaries.filter(date__lte=end_date)
+
+        rows = transactions.annotate(day=TruncDate('created_at')).values(
+            'day', 'transaction_type', 'payment_method_id'
+        ).annotate(day_total=Sum('amount'), day_count=Count('id')).order_by()
+
+        with transaction.atomic():
+            summaries.delete()
+            created = DailyFinancialSummary.objects.bulk_create([
+                DailyFinancialSummary(
+                    date=row['day'],
+                    transaction_type=row['transaction_type'],
+                    payment_method_id=row['payment_method_id'],
+                    total=row['day_total'],
+                    count=row['day_count'],
+                )
+                for row in rows
+            ], batch_size=1000)
+        return len(created)
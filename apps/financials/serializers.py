@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from apps.financials.models import Product
+from apps.financials.models import Product, Transaction
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -8,3 +8,30 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = '__all__'
         
+
+
+class ConsumptionItemSerializer(serializers.Serializer):
+    # Só o id: os produtos do carrinho são buscados de uma vez em ConsumptionCartSerializer
+    product = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class ConsumptionCartSerializer(serializers.Serializer):
+    """POST /api/bookings/<id>/consumption/ {"items": [{"product": "<uuid>", "quantity": 2}, ...]}"""
+    items = ConsumptionItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        """Troca os ids pelos produtos ativos numa única query (não uma por item)."""
+        products = Product.objects.filter(is_active=True).in_bulk({item['product'] for item in items})
+        missing = sorted({str(item['product']) for item in items if item['product'] not in products})
+        if missing:
+            raise serializers.ValidationError(f"Produto inválido ou inativo: {', '.join(missing)}.")
+        return [{**item, 'product': products[item['product']]} for item in items]
+
+
+class ConsumptionSerializer(serializers.ModelSerializer):
+    product = serializers.CharField(source='product.name')
+
+    class Meta:
+        model = Transaction
+        fields = ['id', 'product', 'description', 'amount', 'created_at']
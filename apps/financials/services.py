@@ -1,106 +1,323 @@
-from django.db.models import Sum
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from .models import CashRegisterSession, Transaction
+from .models import CashRegisterSession, DailyFinancialSummary, Product, Transaction
 
 class CashierService:
+    # Caixa aberto de cada usuário (ou None), em cache entre requisições.
+    # Invalidado pelos signals de CashRegisterSession (abrir/fechar/editar).
+    SESSION_CACHE_KEY = 'financials:open-session:{user_id}'
+    SESSION_CACHE_TIMEOUT = 300  # Segurança extra caso algum update escape dos signals
+    _MISSING = object()
+
+    @staticmethod
+    def _session_key(user_id):
+        return CashierService.SESSION_CACHE_KEY.format(user_id=user_id)
+
+    @staticmethod
+    def forget_session(user_id):
+        cache.delete(CashierService._session_key(user_id))
+
     @staticmethod
     def open_session(user, opening_balance):
         if CashRegisterSession.objects.filter(user=user, status=CashRegisterSession.Status.OPEN).exists():
             raise ValidationError("Você já possui um caixa aberto.")
 
-        return CashRegisterSession.objects.create(
+        session = CashRegisterSession.objects.create(
             user=user,
             opening_balance=opening_balance,
             status=CashRegisterSession.Status.OPEN
         )
+        user._open_cash_session = session
+        return session
 
     @staticmethod
     def get_current_session(user):
-        return CashRegisterSession.objects.filter(
-            user=user,
-            status=CashRegisterSession.Status.OPEN
+        """
+        Caixa aberto do usuário.
+        Resolvido uma vez por requisição (guardado no próprio request.user) e,
+        entre requisições, no cache: o badge do caixa faz polling constante.
+        """
+        if user is None or not user.is_authenticated:
+            return None
+
+        session = getattr(user, '_open_cash_session', CashierService._MISSING)
+        if session is CashierService._MISSING:
+            key = CashierService._session_key(user.pk)
+            session = cache.get(key, CashierService._MISSING)
+            if session is CashierService._MISSING:
+                session = CashRegisterSession.objects.filter(
+                    user=user,
+                    status=CashRegisterSession.Status.OPEN
+                ).first()
+                cache.set(key, session, CashierService.SESSION_CACHE_TIMEOUT)
+            user._open_cash_session = session
+
+        # Fechado nesta mesma requisição (a instância memorizada é a mesma)
+        if session is not None and session.status != CashRegisterSession.Status.OPEN:
+            return None
+        return session
+
+    @staticmethod
+    def lock_current_session(user):
+        """
+        Caixa aberto do usuário lido do BANCO e travado até o fim da transação.
+        Para os lançamentos: o cache de get_current_session é por processo e outro
+        worker pode ter aberto/fechado o caixa. Com a linha travada, o fechamento
+        espera o lançamento em curso. Precisa de transação aberta.
+        """
+        if user is None or not user.is_authenticated:
+            return None
+        session = CashRegisterSession.objects.select_for_update().filter(
+            user=user, status=CashRegisterSession.Status.OPEN
         ).first()
+        user._open_cash_session = session  # O resto da requisição vê o mesmo estado
+        return session
+
+    @staticmethod
+    def close_current_session(user, declared_balance, notes=""):
+        """Fecha o caixa aberto do usuário, lido e travado no banco (não no cache)."""
+        with transaction.atomic():
+            session = CashierService.lock_current_session(user)
+            if not session:
+                raise ValidationError("Você não possui caixa aberto para fechar.")
+            return CashierService.close_session(session, declared_balance, notes)
 
     @staticmethod
     def close_session(session, declared_balance, notes=""):
-        if session.status == CashRegisterSession.Status.CLOSED:
-            raise ValidationError("Este caixa já foi fechado.")
-
-        all_transactions_sum = session.transactions.aggregate(Sum('amount'))['amount__sum'] or Decimal(0)
-        calculated_balance = session.opening_balance + all_transactions_sum
-
-        session.closing_balance = declared_balance
-        session.calculated_balance = calculated_balance
-        session.difference = Decimal(declared_balance) - calculated_balance
-        session.closing_notes = notes
-        session.closed_at = timezone.now()
-        session.status = CashRegisterSession.Status.CLOSED
-        session.save()
+        with transaction.atomic():
+            # Relê travando: lançamentos em curso terminam antes do fechamento e
+            # uma cópia velha (cache de outro processo) não fecha o caixa duas vezes
+            status = CashRegisterSession.objects.select_for_update().values_list(
+                'status', flat=True
+            ).get(pk=session.pk)
+            if status == CashRegisterSession.Status.CLOSED:
+                raise ValidationError("Este caixa já foi fechado.")
+
+            all_transactions_sum = session.transactions.aggregate(Sum('amount'))['amount__sum'] or Decimal(0)
+            calculated_balance = session.opening_balance + all_transactions_sum
+
+            session.closing_balance = declared_balance
+            session.calculated_balance = calculated_balance
+            session.difference = Decimal(declared_balance) - calculated_balance
+            session.closing_notes = notes
+            session.closed_at = timezone.now()
+            session.status = CashRegisterSession.Status.CLOSED
+            session.save()
         return session
 
     @staticmethod
     def register_transaction(user, amount, transaction_type, method, description, booking=None):
-        session = CashierService.get_current_session(user)
-        if not session:
-            raise ValidationError("Você precisa abrir o caixa antes de realizar transações.")
-
-        return Transaction.objects.create(
-            session=session,
-            amount=amount,
-            transaction_type=transaction_type,
-            payment_method=method,
-            description=description,
-            booking=booking
-        )
+        with transaction.atomic():
+            session = CashierService.lock_current_session(user)
+            if not session:
+                raise ValidationError("Você precisa abrir o caixa antes de realizar transações.")
+
+            created = Transaction.objects.create(
+                session=session,
+                amount=amount,
+                transaction_type=transaction_type,
+                payment_method=method,
+                description=description,
+                booking=booking
+            )
+        return created
 
     @staticmethod
     def register_consumption(booking, product, quantity, user):
         """
         Lança consumo e baixa estoque.
+        A baixa é um UPDATE condicional (stock >= quantidade) na mesma transação
+        do lançamento: dois bares vendendo a última unidade ao mesmo tempo,
+        só um consegue.
         """
-        if product.stock < quantity:
-            raise ValidationError(f"Estoque insuficiente! Só restam {product.stock} unidades.")
-
-        total_price = product.price * quantity
-        session = CashierService.get_current_session(user)
-
-        # Cria Transação
-        Transaction.objects.create(
-            session=session,
-            booking=booking,
-            product=product,
-            amount=total_price,
-            transaction_type=Transaction.Type.CONSUMPTION,
-            payment_method=None,
-            description=f"Consumo: {quantity}x {product.name}"
-        )
+        with transaction.atomic():
+            session = CashierService.lock_current_session(user)
+            if not session:
+                raise ValidationError("Você precisa abrir o caixa antes de realizar transações.")
+
+            # Baixa Estoque (só a coluna stock, sem reescrever o produto)
+            sold = Product.objects.filter(pk=product.pk, stock__gte=quantity).update(
+                stock=F('stock') - quantity
+            )
+            if not sold:
+                stock = Product.objects.filter(pk=product.pk).values_list('stock', flat=True).first() or 0
+                raise ValidationError(f"Estoque insuficiente! Só restam {stock} unidades.")
 
-        # Baixa Estoque
-        product.stock -= quantity
-        product.save()
+            # Cria Transação
+            consumption = Transaction.objects.create(
+                session=session,
+                booking=booking,
+                product=product,
+                amount=product.price * quantity,
+                transaction_type=Transaction.Type.CONSUMPTION,
+                payment_method=None,
+                description=f"Consumo: {quantity}x {product.name}"
+            )
 
+        product.refresh_from_db(fields=['stock'])
+        return consumption
 
     @staticmethod
-    def register_restock(product, quantity, cost, user):
+    def register_consumption_cart(booking, items, user):
         """
-        Adiciona estoque e lança despesa no caixa (se houver custo).
+        Lança vários itens de uma vez (conferência do frigobar).
+        items: [(produto, quantidade), ...]; o mesmo produto repetido é somado.
+
+        Uma transação: trava os produtos, confere o estoque de todos, baixa o
+        estoque num único UPDATE e grava os lançamentos com bulk_create.
+        Ou entra tudo, ou nada.
         """
-        # 1. Atualiza Estoque
-        product.stock += quantity
-        product.save()
+        quantities = {}
+        for product, quantity in items:
+            if quantity > 0:
+                quantities[product.pk] = quantities.get(product.pk, 0) + quantity
+        if not quantities:
+            raise ValidationError("Informe ao menos um item.")
 
-        # 2. Se teve custo, lança Despesa no Caixa
-        if cost and cost > 0:
-            session = CashierService.get_current_session(user)
+        with transaction.atomic():
+            # Antes de travar produtos e baixar estoque: sem caixa aberto, nada é lançado
+            session = CashierService.lock_current_session(user)
             if not session:
-                raise ValidationError("Abra o caixa para lançar o custo desta reposição.")
+                raise ValidationError("Você precisa abrir o caixa antes de realizar transações.")
 
-            Transaction.objects.create(
-                session=session,
-                amount=cost, # Será convertido para negativo no save() do model
-                transaction_type=Transaction.Type.EXPENSE,
-                payment_method=None, # Saída de Caixa (Dinheiro)
-                description=f"Compra Estoque: {quantity}x {product.name}"
+            # Ordem fixa (pk) no lock: dois carrinhos com os mesmos itens não se travam
+            products = list(
+                Product.objects.select_for_update().filter(pk__in=quantities, is_active=True).order_by('pk')
+            )
+            if len(products) != len(quantities):
+                raise ValidationError("Algum produto do carrinho não está mais disponível.")
+
+            missing = [
+                f"{product.name} (restam {product.stock})"
+                for product in products if product.stock < quantities[product.pk]
+            ]
+            if missing:
+                raise ValidationError(f"Estoque insuficiente: {', '.join(missing)}.")
+
+            # Baixa de todos os itens numa única query
+            Product.objects.filter(pk__in=quantities).update(stock=Case(
+                *[When(pk=pk, then=F('stock') - quantity) for pk, quantity in quantities.items()],
+                default=F('stock'),
+                output_field=IntegerField(),
+            ))
+
+            consumptions = Transaction.objects.bulk_create([
+                Transaction(
+                    session=session,
+                    booking=booking,
+                    product=product,
+                    amount=product.price * quantities[product.pk],
+                    transaction_type=Transaction.Type.CONSUMPTION,
+                    payment_method=None,
+                    description=f"Consumo: {quantities[product.pk]}x {product.name}"
+                )
+                for product in sorted(products, key=lambda p: p.name)
+            ])
+
+            # bulk_create não passa pelo Transaction.save(): ledger e resumo diário aqui, uma vez só
+            total = sum((c.amount for c in consumptions), Decimal('0.00'))
+            booking.add_to_ledger(consumption=total)
+            DailyFinancialSummary.record(
+                timezone.localdate(), Transaction.Type.CONSUMPTION, None, total, count=len(consumptions)
             )
+
+        return consumptions
+
+    @staticmethod
+    def register_restock(product, quantity, cost, user):
+        """
+        Adiciona estoque e lança despesa no caixa (se houver custo), tudo ou nada.
+        """
+        with transaction.atomic():
+            session = None
+            if cost and cost > 0:
+                session = CashierService.lock_current_session(user)
+                if not session:
+                    raise ValidationError("Abra o caixa para lançar o custo desta reposição.")
+
+            # 1. Atualiza Estoque (incremento atômico: não perde vendas simultâneas)
+            Product.objects.filter(pk=product.pk).update(stock=F('stock') + quantity)
+
+            # 2. Se teve custo, lança Despesa no Caixa
+            if session:
+                Transaction.objects.create(
+                    session=session,
+                    amount=cost, # Será convertido para negativo no save() do model
+                    transaction_type=Transaction.Type.EXPENSE,
+                    payment_method=None, # Saída de Caixa (Dinheiro)
+                    description=f"Compra Estoque: {quantity}x {product.name}"
+                )
+
+        product.refresh_from_db(fields=['stock'])
+
+
+class ShiftReportService:
+    """
+    Auditoria de Caixa: totais de quebras/sobras calculados no banco
+    (Sum condicional) sobre uma janela limitada de turnos fechados.
+    """
+    DEFAULT_WINDOW_DAYS = 90
+    MAX_WINDOW_DAYS = 366
+
+    @staticmethod
+    def window(start_date=None, end_date=None):
+        """Período do relatório (datas inclusivas), nunca maior que MAX_WINDOW_DAYS."""
+        end_date = end_date or timezone.localdate()
+        start_date = start_date or end_date - timedelta(days=ShiftReportService.DEFAULT_WINDOW_DAYS)
+        max_start = end_date - timedelta(days=ShiftReportService.MAX_WINDOW_DAYS)
+        return max(start_date, max_start), end_date
+
+    @staticmethod
+    def sessions(start_date=None, end_date=None, user=None, outcome=None):
+        start_date, end_date = ShiftReportService.window(start_date, end_date)
+        # Intervalo em datetime (e não closed_at__date): usa o índice de closed_at
+        sessions = CashRegisterSession.objects.filter(
+            status=CashRegisterSession.Status.CLOSED,
+            closed_at__gte=timezone.make_aware(datetime.combine(start_date, time.min)),
+            closed_at__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+        )
+        if user:
+            sessions = sessions.filter(user=user)
+        if outcome == 'shortage':
+            sessions = sessions.filter(difference__lt=0)
+        elif outcome == 'surplus':
+            sessions = sessions.filter(difference__gt=0)
+        return sessions
+
+    @staticmethod
+    def _aggregates():
+        zero = Value(Decimal('0.00'))
+        return {
+            'count': Count('id'),
+            'shortage': Coalesce(Sum('difference', filter=Q(difference__lt=0)), zero),
+            'surplus': Coalesce(Sum('difference', filter=Q(difference__gt=0)), zero),
+            'shortage_count': Count('id', filter=Q(difference__lt=0)),
+            'surplus_count': Count('id', filter=Q(difference__gt=0)),
+        }
+
+    @staticmethod
+    def totals(sessions):
+        """Contagem e totais de quebras/sobras em uma única query."""
+        totals = sessions.aggregate(**ShiftReportService._aggregates())
+        totals['net'] = totals['shortage'] + totals['surplus']
+        return totals
+
+    @staticmethod
+    def by_user(sessions):
+        """Totais por funcionário, quem mais quebrou primeiro."""
+        return sessions.values(
+            'user_id', 'user__email', 'user__first_name', 'user__last_name'
+        ).annotate(**ShiftReportService._aggregates()).order_by('shortage', 'user__email')
+
+    @staticmethod
+    def by_month(sessions):
+        """Totais por mês de fechamento, do mais recente ao mais antigo."""
+        return sessions.annotate(
+            month=TruncMonth('closed_at')
+        ).values('month').annotate(**ShiftReportService._aggregates()).order_by('-month')
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CashRegisterSession, DailyFinancialSummary, Transaction
+from .services import CashierService
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_deleted(sender, instance, **kwargs):
+    # Cobre também o delete em massa (admin), que não passa por Transaction.delete()
+    DailyFinancialSummary.record(
+        timezone.localdate(instance.created_at), instance.transaction_type,
+        instance.payment_method_id, -instance.amount, count=-1,
+    )
+    instance.post_to_ledger(instance.booking_id, instance.transaction_type, -instance.amount)
+
+
+@receiver(post_save, sender=CashRegisterSession)
+@receiver(post_delete, sender=CashRegisterSession)
+def cash_session_changed(sender, instance, **kwargs):
+    # Caixa aberto/fechado/editado: o cache do caixa atual do usuário cai.
+    # De novo no commit: uma leitura concorrente pode ter recacheado o estado antigo.
+    CashierService.forget_session(instance.user_id)
+    transaction.on_commit(lambda: CashierService.forget_session(instance.user_id))
@@ -12,11 +12,16 @@ urlpatterns = [
     # Operação
     path('receive/<uuid:booking_id>/htmx/', views.receive_payment_htmx, name='receive_payment_htmx'),
     path('consumption/<uuid:booking_id>/add/', views.add_consumption_htmx, name='add_consumption_htmx'),
+    path('consumption/<uuid:booking_id>/cart/', views.consumption_cart_htmx, name='consumption_cart_htmx'),
 
     # Relatórios
     path('reports/shifts/', views.shift_history, name='shift_history'),
     path('reports/shifts/<uuid:session_id>/', views.shift_details_modal, name='shift_details_modal'),
     path('reports/dashboard/', views.financial_dashboard, name='financial_dashboard'),
+    path('reports/occupancy/', views.occupancy_report, name='occupancy_report'),
+    path('reports/occupancy/csv/', views.occupancy_report_csv, name='occupancy_report_csv'),
+    path('reports/export/transactions/', views.export_transactions_csv, name='export_transactions_csv'),
+    path('reports/export/bookings/', views.export_bookings_csv, name='export_bookings_csv'),
     path('print/<uuid:booking_id>/receipt/', views.print_receipt_pdf, name='print_receipt_pdf'),
 
     # Estoque
@@ -1,33 +1,72 @@
 import json
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import Sum
-from django.db.models.functions import TruncDate
+from django.db.models import Q, Sum
 from django.http import HttpResponse
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-from django.views.decorators.http import require_http_methods
+from django.utils.dateparse import parse_date
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_http_methods
+from rest_framework import status
+from rest_framework.exceptions import ValidationError as ApiValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from apps.accommodations.views import room_details_modal
 # Imports locais
-from apps.bookings.models import Booking
-from apps.financials.forms import (ConsumptionForm, ProductForm,
-                                   ReceivePaymentForm, RestockForm)
-from apps.financials.models import (CashRegisterSession, PaymentMethod,
+from apps.bookings.models import Booking, RoomAllocation
+from apps.bookings.services import NightAuditService
+from apps.core.exports import stream_csv
+from apps.core.pagination import CursorPaginator
+from apps.financials.forms import (ConsumptionCartForm, ConsumptionForm,
+                                   ProductForm, ReceivePaymentForm,
+                                   RestockForm, ShiftFilterForm)
+from apps.financials.models import (CashRegisterSession,
+                                    DailyFinancialSummary, PaymentMethod,
                                     Product, Transaction)
-from apps.financials.services import CashierService
+from apps.financials.serializers import (ConsumptionCartSerializer,
+                                         ConsumptionSerializer)
+from apps.financials.services import CashierService, ShiftReportService
 
 # --- Views de Caixa ---
 
+CASHIER_BADGE_CACHE_KEY = 'financials:cashier-badge:{etag}'
+CASHIER_BADGE_CACHE_TIMEOUT = 60 * 60
+
+
+def cashier_status_etag(request):
+    # Muda quando o caixa abre, fecha ou é editado (updated_at)
+    session = CashierService.get_current_session(request.user)
+    if session is None:
+        return 'closed'
+    return f'{session.pk}-{session.updated_at.timestamp()}'
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@etag(cashier_status_etag)
 def cashier_status(request):
-    session = CashierService.get_current_session(request.user)
-    return render(request, 'financials/htmx/cashier_status_badge.html', {'session': session})
+    """
+    Badge do caixa no topo (recarregado em todas as abas abertas).
+    Com o caixa em cache (get_current_session) e o ETag, uma consulta sem
+    mudança responde 304 sem tocar no banco nem renderizar o template.
+    """
+    key = CASHIER_BADGE_CACHE_KEY.format(etag=cashier_status_etag(request))
+    html = cache.get(key)
+    if html is None:
+        session = CashierService.get_current_session(request.user)
+        html = render_to_string('financials/htmx/cashier_status_badge.html', {'session': session}, request)
+        cache.set(key, html, CASHIER_BADGE_CACHE_TIMEOUT)
+    return HttpResponse(html)
 
 @login_required
 def open_register_modal(request):
@@ -44,9 +83,15 @@ def open_register_action(request):
     except Exception as e:
         return render(request, 'financials/modals/open_register.html', {'error': str(e)})
 
+def _open_session(user):
+    """Caixa aberto lido do banco: o cache é por processo e outro worker pode tê-lo aberto/fechado."""
+    return CashRegisterSession.objects.filter(
+        user=user, status=CashRegisterSession.Status.OPEN
+    ).first()
+
 @login_required
 def close_register_modal(request):
-    session = CashierService.get_current_session(request.user)
+    session = _open_session(request.user)
     if not session:
         return HttpResponse("Sem caixa aberto.", status=400)
     return render(request, 'financials/modals/close_register.html', {'session': session})
@@ -55,11 +100,10 @@ def close_register_modal(request):
 @require_http_methods(["POST"])
 def close_register_action(request):
     try:
-        session = CashierService.get_current_session(request.user)
         declared = Decimal(request.POST.get('closing_balance', '0'))
         notes = request.POST.get('notes', '')
 
-        closed = CashierService.close_session(session, declared, notes)
+        closed = CashierService.close_current_session(request.user, declared, notes)
 
         if closed.difference < 0:
             messages.warning(request, f"Caixa fechado com QUEBRA de R$ {closed.difference}!")
@@ -70,7 +114,9 @@ def close_register_action(request):
 
         return HttpResponse(status=204, headers={'HX-Trigger': 'updateCashierStatus, closeModal'})
     except Exception as e:
-        session = CashierService.get_current_session(request.user)
+        session = _open_session(request.user)
+        if not session:
+            return HttpResponse("Sem caixa aberto.", status=400)
         return render(request, 'financials/modals/close_register.html', {'session': session, 'error': str(e)})
 
 # --- Views de Transações ---
@@ -92,7 +138,9 @@ def receive_payment_htmx(request, booking_id):
                     booking=booking
                 )
                 messages.success(request, "Pagamento registrado!")
-                room = booking.allocations.first().room
+                room = _booking_room(booking)
+                if room is None:
+                    return _no_room_response()
                 response = room_details_modal(request, room.id)
                 response['HX-Trigger'] = 'updateCashierStatus'
                 return response
@@ -105,9 +153,21 @@ def receive_payment_htmx(request, booking_id):
 
     return render(request, 'financials/modals/receive_payment.html', {'form': form, 'booking': booking})
 
+def _booking_room(booking):
+    """Quarto da reserva (primeira alocação), já carregado numa única query."""
+    allocation = booking.allocations.select_related('room').first()
+    return allocation.room if allocation else None
+
+
+def _no_room_response():
+    """Lançamento gravado, mas a reserva não tem quarto para reabrir o modal."""
+    return HttpResponse(status=204, headers={'HX-Trigger': 'updateCashierStatus, closeModal'})
+
+
 @login_required
 def add_consumption_htmx(request, booking_id):
-    booking = get_object_or_404(Booking, pk=booking_id)
+    booking = get_object_or_404(Booking.objects.select_related('guest'), pk=booking_id)
+    room = _booking_room(booking)
 
     if request.method == "POST":
         form = ConsumptionForm(request.POST)
@@ -118,7 +178,8 @@ def add_consumption_htmx(request, booking_id):
                 CashierService.register_consumption(booking, product, qty, request.user)
 
                 messages.success(request, f"{qty}x {product.name} adicionado!")
-                room = booking.allocations.first().room
+                if room is None:
+                    return _no_room_response()
                 return room_details_modal(request, room.id)
             except Exception as e:
                 return render(request, 'financials/modals/add_consumption.html', {
@@ -127,7 +188,57 @@ def add_consumption_htmx(request, booking_id):
     else:
         form = ConsumptionForm()
 
-    return render(request, 'financials/modals/add_consumption.html', {'form': form, 'booking': booking})
+    return render(request, 'financials/modals/add_consumption.html', {'form': form, 'booking': booking, 'room': room})
+
+@login_required
+def consumption_cart_htmx(request, booking_id):
+    """
+    Conferência do frigobar: vários itens num único POST.
+    Um lançamento em lote (CashierService.register_consumption_cart) e um único refresh do modal.
+    """
+    booking = get_object_or_404(Booking.objects.select_related('guest'), pk=booking_id)
+    room = _booking_room(booking)
+
+    if request.method == "POST":
+        form = ConsumptionCartForm(request.POST)
+        if form.is_valid():
+            try:
+                consumptions = CashierService.register_consumption_cart(booking, form.items(), request.user)
+                total = sum(c.amount for c in consumptions)
+                messages.success(request, f"{len(consumptions)} item(ns) lançado(s): R$ {total}")
+                if room is None:
+                    return _no_room_response()
+                return room_details_modal(request, room.id)
+            except ValidationError as e:
+                form.add_error(None, e)
+    else:
+        form = ConsumptionCartForm()
+
+    return render(request, 'financials/modals/consumption_cart.html', {'form': form, 'booking': booking, 'room': room})
+
+
+class ConsumptionCartApiView(APIView):
+    """
+    POST /api/bookings/<id>/consumption/
+    {"items": [{"product": "<uuid>", "quantity": 2}, ...]}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, booking_id):
+        booking = get_object_or_404(Booking, pk=booking_id)
+        serializer = ConsumptionCartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        items = [(item['product'], item['quantity']) for item in serializer.validated_data['items']]
+        try:
+            consumptions = CashierService.register_consumption_cart(booking, items, request.user)
+        except ValidationError as e:
+            raise ApiValidationError({'items': e.messages})
+
+        return Response({
+            'consumptions': ConsumptionSerializer(consumptions, many=True).data,
+            'balance': booking.balance,
+        }, status=status.HTTP_201_CREATED)
 
 # --- Views de Relatórios ---
 
@@ -135,23 +246,37 @@ def add_consumption_htmx(request, booking_id):
 def shift_history(request):
     if not request.user.is_manager_or_admin:
         raise PermissionDenied()
-    sessions = CashRegisterSession.objects.filter(status=CashRegisterSession.Status.CLOSED).order_by('-closed_at')
-
-    total_shortage = sum(s.difference for s in sessions if s.difference and s.difference < 0)
-    total_surplus = sum(s.difference for s in sessions if s.difference and s.difference > 0)
-
-    return render(request, 'financials/reports/shift_list.html', {
-        'sessions': sessions,
-        'total_shortage': total_shortage,
-        'total_surplus': total_surplus
+    form = ShiftFilterForm(request.GET or None)
+    filters = form.cleaned_data if form.is_valid() else {}
+    start_date, end_date = ShiftReportService.window(filters.get('start_date'), filters.get('end_date'))
+
+    sessions = ShiftReportService.sessions(
+        start_date, end_date, user=filters.get('user'), outcome=filters.get('outcome')
+    )
+    page = CursorPaginator(
+        sessions.select_related('user'), ('-closed_at', '-id'), per_page=20
+    ).page(request.GET.get('cursor'))
+
+    context = {'page': page}
+    if request.headers.get('HX-Target') == 'load-more-row':
+        return render(request, 'financials/partials/shift_rows.html', context)
+
+    context.update({
+        'form': form,
+        'start_date': start_date,
+        'end_date': end_date,
+        'totals': ShiftReportService.totals(sessions),
+        'by_user': ShiftReportService.by_user(sessions),
+        'by_month': ShiftReportService.by_month(sessions),
     })
+    return render(request, 'financials/reports/shift_list.html', context)
 
 @login_required
 def shift_details_modal(request, session_id):
     if not request.user.is_manager_or_admin:
         raise PermissionDenied()
-    session = get_object_or_404(CashRegisterSession, pk=session_id)
-    transactions = session.transactions.all().select_related('payment_method', 'booking', 'product')
+    session = get_object_or_404(CashRegisterSession.objects.select_related('user'), pk=session_id)
+    transactions = session.transactions.all().select_related('payment_method', 'booking__guest', 'product')
     return render(request, 'financials/reports/shift_details_modal.html', {
         'session': session, 'transactions': transactions
     })
@@ -167,61 +292,44 @@ def financial_dashboard(request):
 
     # 1. Configuração do Período
     period = request.GET.get('period', '30days')
-    today = timezone.now().date()
-    # Usamos datetime combinada com min.time para garantir comparação correta (00:00:00)
-    now = timezone.now()
+    # Datas locais: o resumo diário é agrupado pelo dia no fuso do hotel
+    today = timezone.localdate()
 
     if period == 'month':
-        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        start_date = today.replace(day=1)
         label_chart = "Receita deste Mês"
     elif period == 'year':
-        start_date = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        start_date = today.replace(month=1, day=1)
         label_chart = "Receita deste Ano"
     else:
         # Default: 30 dias atrás
-        start_date = now - timezone.timedelta(days=30)
+        start_date = today - timedelta(days=30)
         label_chart = "Últimos 30 Dias"
 
-    # 2. KPIs (Totais do Período)
-    # Usamos Transaction.Type.INCOME para garantir consistência com o Model
-    kpi_income = Transaction.objects.filter(
-        transaction_type=Transaction.Type.INCOME,
-        created_at__gte=start_date
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    kpi_consumption = Transaction.objects.filter(
-        transaction_type=Transaction.Type.CONSUMPTION,
-        created_at__gte=start_date
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    # 3. Dados para o Gráfico (Agrupado por Dia)
-    daily_revenue = Transaction.objects.filter(
-        created_at__gte=start_date,
-        transaction_type=Transaction.Type.INCOME
-    ).annotate(
-        date=TruncDate('created_at')
+    # 2. KPIs e Gráfico a partir do resumo diário (DailyFinancialSummary):
+    # uma linha por dia, no máximo 366, em vez de varrer Transaction.
+    daily_summary = DailyFinancialSummary.objects.filter(
+        date__gte=start_date
     ).values('date').annotate(
-        total=Sum('amount')
+        income=Sum('total', filter=Q(transaction_type=Transaction.Type.INCOME)),
+        consumption=Sum('total', filter=Q(transaction_type=Transaction.Type.CONSUMPTION)),
     ).order_by('date')
 
+    kpi_income = 0
+    kpi_consumption = 0
+
+    # 3. Dados para o Gráfico (Agrupado por Dia)
     # Processamento para JSON (JavaScript não entende Decimal ou Date python)
     dates = []
     values = []
 
-    for entry in daily_revenue:
-        d = entry['date']
-        val = entry['total'] or 0
-        
-        # Correção para SQLite (que às vezes retorna string) vs Postgres (date object)
-        if isinstance(d, str):
-            try:
-                d = datetime.strptime(d, '%Y-%m-%d').date()
-            except ValueError:
-                pass
-        
-        if d:
-            dates.append(d.strftime('%d/%m'))
-            values.append(float(val)) # Converte Decimal para Float
+    for entry in daily_summary:
+        kpi_consumption += entry['consumption'] or 0
+        if entry['income'] is None:
+            continue
+        kpi_income += entry['income']
+        dates.append(entry['date'].strftime('%d/%m'))
+        values.append(float(entry['income'])) # Converte Decimal para Float
 
     # Fallback para gráfico não ficar vazio feio
     if not dates:
@@ -235,10 +343,143 @@ def financial_dashboard(request):
         'chart_dates': json.dumps(dates),
         'chart_values': json.dumps(values),
         'period': period,
-        'label_chart': label_chart
+        'label_chart': label_chart,
+        'export_start': today.replace(day=1),
+        'export_end': today,
     }
     return render(request, 'financials/reports/dashboard.html', context)
 
+def _report_period(request):
+    """?start= e ?end= do relatório de ocupação (padrão: do início do ano até ontem)."""
+    yesterday = timezone.localdate() - timedelta(days=1)
+    end_date = parse_date(request.GET.get('end', '')) or yesterday
+    start_date = parse_date(request.GET.get('start', '')) or end_date.replace(month=1, day=1)
+    return min(start_date, end_date), end_date
+
+
+@login_required
+def occupancy_report(request):
+    """
+    Ocupação, ADR e RevPAR históricos, lidos da auditoria noturna (NightAudit).
+    """
+    if not request.user.is_manager_or_admin:
+        raise PermissionDenied()
+
+    start_date, end_date = _report_period(request)
+    return render(request, 'financials/reports/occupancy.html', {
+        **NightAuditService.report(start_date, end_date),
+        'start_date': start_date,
+        'end_date': end_date,
+    })
+
+
+@login_required
+def occupancy_report_csv(request):
+    if not request.user.is_manager_or_admin:
+        raise PermissionDenied()
+
+    start_date, end_date = _report_period(request)
+    rows = (
+        [
+            row['date'].strftime('%d/%m/%Y'), row['rooms_available'], row['rooms_sold'],
+            row['occupancy'], row['room_revenue'], row['adr'], row['revpar'],
+        ]
+        for row in NightAuditService.daily(start_date, end_date)
+    )
+    return stream_csv(
+        f"ocupacao_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv",
+        ['Noite', 'Quartos Disponíveis', 'Quartos Vendidos', 'Ocupação (%)', 'Receita', 'ADR', 'RevPAR'],
+        rows,
+    )
+
+
+# --- Exportações para a Contabilidade (CSV em streaming) ---
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _export_period(request):
+    """?start= e ?end= das exportações (padrão: mês atual até hoje)."""
+    today = timezone.localdate()
+    end_date = parse_date(request.GET.get('end', '')) or today
+    start_date = parse_date(request.GET.get('start', '')) or end_date.replace(day=1)
+    return min(start_date, end_date), end_date
+
+
+@login_required
+def export_transactions_csv(request):
+    """
+    Livro de lançamentos do período, com caixa, reserva, hóspede, produto e método.
+    values_list + iterator: nenhuma instância de model, memória constante.
+    """
+    if not request.user.is_manager_or_admin:
+        raise PermissionDenied()
+
+    start_date, end_date = _export_period(request)
+    transactions = Transaction.objects.filter(
+        created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min)),
+        created_at__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+    ).order_by('created_at').values_list(
+        'created_at', 'transaction_type', 'description', 'amount',
+        'payment_method__name', 'product__name',
+        'booking_id', 'booking__guest__name', 'booking__guest__cpf', 'booking__guest__document',
+        'session_id', 'session__user__email',
+    )
+    # Resolvidos uma vez: traduzir o rótulo ou buscar o fuso a cada linha domina o tempo
+    types = {value: str(label) for value, label in Transaction.Type.choices}
+    tz = timezone.get_current_timezone()
+
+    def rows():
+        for (created_at, kind, description, amount, method, product,
+             booking_id, guest, cpf, document, session_id, cashier) in transactions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                created_at.astimezone(tz).strftime('%d/%m/%Y %H:%M'), types.get(kind, kind),
+                description, amount, method or '', product or '',
+                str(booking_id)[:8] if booking_id else '', guest or '', cpf or document or '',
+                str(session_id)[:8] if session_id else '', cashier or '',
+            ]
+
+    return stream_csv(
+        f"lancamentos_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv",
+        ['Data/Hora', 'Tipo', 'Descrição', 'Valor', 'Método', 'Produto',
+         'Reserva', 'Hóspede', 'Documento', 'Caixa', 'Operador'],
+        rows(),
+    )
+
+
+@login_required
+def export_bookings_csv(request):
+    """Quartos reservados com estadia dentro do período (uma linha por quarto)."""
+    if not request.user.is_manager_or_admin:
+        raise PermissionDenied()
+
+    start_date, end_date = _export_period(request)
+    allocations = RoomAllocation.objects.filter(
+        start_date__lte=end_date, end_date__gt=start_date
+    ).order_by('start_date', 'id').values_list(
+        'booking_id', 'booking__status', 'booking__guest__name',
+        'booking__guest__cpf', 'booking__guest__document',
+        'room__number', 'room__category__name', 'start_date', 'end_date', 'agreed_price',
+    )
+    statuses = {value: str(label) for value, label in Booking.Status.choices}
+
+    def rows():
+        for (booking_id, status, guest, cpf, document, room, category,
+             check_in, check_out, price) in allocations.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            nights = (check_out - check_in).days
+            yield [
+                str(booking_id)[:8], statuses.get(status, status), guest, cpf or document or '',
+                room, category, check_in.strftime('%d/%m/%Y'), check_out.strftime('%d/%m/%Y'),
+                nights, price, price * nights,
+            ]
+
+    return stream_csv(
+        f"reservas_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv",
+        ['Reserva', 'Status', 'Hóspede', 'Documento', 'Quarto', 'Categoria',
+         'Entrada', 'Saída', 'Diárias', 'Valor da Diária', 'Total'],
+        rows(),
+    )
+
 @login_required
 def print_receipt_pdf(request, booking_id):
     booking = get_object_or_404(Booking, pk=booking_id)
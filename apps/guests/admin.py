@@ -3,5 +3,5 @@ from .models import Guest
 
 @admin.register(Guest)
 class GuestAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'phone', 'city', 'created_at')
+    list_display = ('name', 'email', 'phone', 'city', 'stays_count', 'last_stay_date', 'created_at')
     search_fields = ('name', 'email', 'cpf')
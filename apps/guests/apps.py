@@ -4,3 +4,6 @@ class GuestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.guests' # Adicione o 'apps.'
     verbose_name = 'Hóspedes'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registra os receivers)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.guests.models import Guest
+from apps.guests.search import build_search_text, search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o texto de busca dos hóspedes (search_text) em lotes e reconstrói o índice "
+        "de pesquisa. Rode após mudar build_search_text. Use --check para apenas auditar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Apenas verifica divergências, sem gravar nada (sai com erro se houver drift).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Quantidade de hóspedes recalculados por UPDATE.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        check = options['check']
+        guests = Guest.objects.order_by('pk')
+        last_pk = None
+        total = drifted = 0
+        while True:
+            # Paginação por chave (pk > último): cada lote custa o mesmo, do início ao fim da tabela
+            page = guests.filter(pk__gt=last_pk) if last_pk else guests
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            stale = []
+            for guest in batch:
+                text = build_search_text(guest)
+                if guest.search_text != text:
+                    guest.search_text = text
+                    stale.append(guest)
+            if stale and not check:
+                with transaction.atomic():
+                    # bulk_update não passa por save()/signals: o índice é invalidado no fim
+                    Guest.objects.bulk_update(stale, ['search_text'])
+            total += len(batch)
+            drifted += len(stale)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"  {total} hóspede(s) processado(s)...")
+
+        if check:
+            if drifted:
+                raise CommandError(f"{drifted} hóspede(s) com texto de busca desatualizado.")
+            self.stdout.write(self.style.SUCCESS("Texto de busca consistente."))
+            return
+
+        if drifted:
+            search_index.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"{drifted} de {total} hóspede(s) atualizado(s)."))
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.guests.models import Guest
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o resumo de estadias dos hóspedes (estadias, concluídas, última estadia "
+        "e total gasto) a partir das reservas, em lotes. Use --check para apenas auditar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Apenas verifica divergências, sem gravar nada (sai com erro se houver drift).",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Quantidade de hóspedes recalculados por UPDATE.",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            return self._check()
+
+        batch_size = options['batch_size']
+        ids = Guest.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = None
+        total = 0
+        while True:
+            # Paginação por chave (pk > último): cada lote custa o mesmo, do início ao fim da tabela
+            page = ids.filter(pk__gt=last_pk) if last_pk else ids
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                Guest.refresh_stay_summary(batch)
+            total += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f"  {total} hóspede(s) processado(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} hóspede(s) recalculado(s)."))
+
+    def _check(self):
+        live = {f"live_{name}": expr for name, expr in Guest.stay_expressions().items()}
+        drift_filter = Q()
+        for name in Guest.STAY_FIELDS:
+            differs = ~Q(**{name: F(f"live_{name}")})
+            if name == 'last_stay_date':
+                # NULL dos dois lados é igual; NULL só de um lado é divergência
+                differs = (
+                    (differs & ~Q(last_stay_date__isnull=True, live_last_stay_date__isnull=True))
+                    | Q(last_stay_date__isnull=False, live_last_stay_date__isnull=True)
+                )
+            drift_filter |= differs
+        drifted = Guest.objects.annotate(**live).filter(drift_filter)
+        total = drifted.count()
+
+        for guest in drifted[:20]:
+            self.stdout.write(
+                f"  {guest.name}: {guest.stays_count} estadia(s) gravada(s) x {guest.live_stays_count} real"
+            )
+        if total:
+            raise CommandError(f"{total} hóspede(s) com resumo de estadias divergente.")
+        self.stdout.write(self.style.SUCCESS("Resumo de estadias consistente."))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+from apps.guests.search import build_search_text
+
+
+def fill_search_text(apps, schema_editor):
+    Guest = apps.get_model('guests', 'Guest')
+    batch = []
+    for guest in Guest.objects.only(
+        'id', 'name', 'email', 'cpf', 'document', 'passport', 'phone'
+    ).iterator(chunk_size=2000):
+        guest.search_text = build_search_text(guest)
+        batch.append(guest)
+        if len(batch) >= 2000:
+            Guest.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Guest.objects.bulk_update(batch, ['search_text'])
+
+
+def add_trigram_index(apps, schema_editor):
+    """PostgreSQL: LIKE '%termo%' e similaridade usam o índice GIN de trigramas."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS guest_search_trgm_idx "
+        "ON guests_guest USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS guest_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guests', '0003_alter_guest_cpf_alter_guest_email_alter_guest_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guest',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Texto de Busca'),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:49
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_stay_summary(apps, schema_editor):
+    """Preenche o resumo de estadias dos hóspedes já existentes."""
+    Guest = apps.get_model('guests', 'Guest')
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomAllocation = apps.get_model('bookings', 'RoomAllocation')
+
+    summary = {
+        row['guest']: row
+        for row in Booking.objects.values('guest').annotate(
+            stays=Count('id', filter=~Q(status='CANCELED')),
+            completed=Count('id', filter=Q(status='COMPLETED')),
+            spent=Sum('paid_total'),
+        )
+    }
+    last_stay = dict(
+        RoomAllocation.objects.filter(booking__status__in=['CHECKED_IN', 'COMPLETED'])
+        .values('booking__guest').annotate(last=Max('end_date'))
+        .values_list('booking__guest', 'last')
+    )
+
+    batch = []
+    for guest in Guest.objects.filter(pk__in=summary.keys()).only('id').iterator(chunk_size=1000):
+        row = summary[guest.pk]
+        guest.stays_count = row['stays']
+        guest.completed_stays = row['completed']
+        guest.total_spent = row['spent'] or Decimal('0.00')
+        guest.last_stay_date = last_stay.get(guest.pk)
+        batch.append(guest)
+    Guest.objects.bulk_update(
+        batch, ['stays_count', 'completed_stays', 'total_spent', 'last_stay_date'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_allocation_availability_index'),
+        ('guests', '0004_guest_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guest',
+            name='completed_stays',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Estadias Concluídas'),
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='last_stay_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Última Estadia'),
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='stays_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Estadias'),
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='total_spent',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Total Gasto'),
+        ),
+        migrations.RunPython(backfill_stay_summary, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 from apps.core.mixins import UUIDModel, TimeStampedModel
 
+from .search import build_search_text
+
 class Guest(UUIDModel, TimeStampedModel):
     name = models.CharField(_("Nome Completo"), max_length=255, db_index=True)
     email = models.EmailField(_("E-mail"), blank=True, db_index=True)
@@ -18,10 +22,85 @@ class Guest(UUIDModel, TimeStampedModel):
     state = models.CharField(_("Estado"), max_length=50, blank=True)
     country = models.CharField(_("País"), max_length=50, default='Brasil')
 
+    # Texto normalizado para a pesquisa (ver apps/guests/search.py).
+    # Postgres: índice GIN pg_trgm criado na migration 0004.
+    search_text = models.TextField(_("Texto de Busca"), blank=True, default='', editable=False)
+
+    # --- RESUMO DE ESTADIAS (desnormalizado) ---
+    # Mantido por Booking.save(), StayService, RoomAllocation e pelo ledger (pagamentos).
+    # Evita o COUNT com JOIN em bookings na lista de hóspedes.
+    # Em caso de divergência: python manage.py recompute_guest_stays
+    stays_count = models.PositiveIntegerField(_("Estadias"), default=0, editable=False)
+    completed_stays = models.PositiveIntegerField(_("Estadias Concluídas"), default=0, editable=False)
+    last_stay_date = models.DateField(_("Última Estadia"), null=True, blank=True, editable=False)
+    total_spent = models.DecimalField(
+        _("Total Gasto"), max_digits=12, decimal_places=2,
+        default=Decimal("0.00"), editable=False
+    )
+
+    STAY_FIELDS = ['stays_count', 'completed_stays', 'last_stay_date', 'total_spent']
+
     class Meta:
         verbose_name = _("Hóspede")
         verbose_name_plural = _("Hóspedes")
         ordering = ['name']
+        indexes = [
+            # Cursor da lista de hóspedes (mais recentes primeiro)
+            models.Index(fields=['created_at', 'id'], name='guest_created_cursor_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.city})"
+
+    @staticmethod
+    def stay_expressions():
+        """
+        Expressões (Subquery) que calculam o resumo de estadias direto das reservas.
+        - Estadias: reservas não canceladas
+        - Última estadia: maior data de saída entre hospedagens (atuais ou concluídas)
+        - Total gasto: soma do que foi pago (ledger das reservas)
+        """
+        from apps.bookings.models import Booking, RoomAllocation
+
+        def _aggregate(queryset, field, function, output_field, default):
+            subquery = queryset.filter(**{field: models.OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=function).values('total')
+            return Coalesce(
+                models.Subquery(subquery, output_field=output_field),
+                default,
+                output_field=output_field
+            )
+
+        count = models.PositiveIntegerField()
+        stays = Booking.objects.exclude(status=Booking.Status.CANCELED)
+        return {
+            'stays_count': _aggregate(stays, 'guest', models.Count('id'), count, models.Value(0)),
+            'completed_stays': _aggregate(
+                stays.filter(status=Booking.Status.COMPLETED), 'guest',
+                models.Count('id'), count, models.Value(0)
+            ),
+            'last_stay_date': models.Subquery(
+                RoomAllocation.objects.filter(
+                    booking__guest=models.OuterRef('pk'),
+                    booking__status__in=[Booking.Status.CHECKED_IN, Booking.Status.COMPLETED],
+                ).order_by('-end_date').values('end_date')[:1],
+                output_field=models.DateField()
+            ),
+            'total_spent': _aggregate(
+                Booking.objects.all(), 'guest', models.Sum('paid_total'),
+                models.DecimalField(max_digits=12, decimal_places=2), models.Value(Decimal("0.00"))
+            ),
+        }
+
+    @staticmethod
+    def refresh_stay_summary(guest_ids):
+        """Recalcula o resumo de estadias (1 UPDATE para todos os hóspedes informados)."""
+        Guest.objects.filter(pk__in=guest_ids).update(**Guest.stay_expressions())
+
+    def save(self, *args, **kwargs):
+        self.search_text = build_search_text(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
@@ -0,0 +1,259 @@
+"""
+Busca de hóspedes (campo de pesquisa HTMX da lista de hóspedes).
+
+Tudo é comparado contra Guest.search_text: nome sem acentos, e-mail e os
+dígitos de CPF/documento/telefone, em minúsculas. Assim "joao" acha
+"João" e "12345678900" acha "123.456.789-00".
+
+- PostgreSQL: índice GIN com pg_trgm (LIKE '%termo%' usa o índice)
+  e ranking por prefixo + similaridade de trigramas.
+- Outros bancos (SQLite no dev): índice de trigramas em memória
+  (GuestSearchIndex), mantido pelos signals de Guest.
+"""
+import heapq
+import threading
+import unicodedata
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+def normalize(text):
+    """Minúsculas e sem acentos ("João" -> "joao")."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def digits(text):
+    return ''.join(c for c in text or '' if c.isdigit())
+
+
+def build_search_text(guest):
+    """
+    Conteúdo de Guest.search_text.
+    Nome sem acentos primeiro (o ranking dá prioridade a quem começa pelo termo).
+    """
+    parts = [
+        normalize(guest.name),
+        (guest.email or '').lower(),
+        digits(guest.cpf),
+        digits(guest.document),
+        normalize(guest.document),
+        normalize(guest.passport),
+        digits(guest.phone),
+    ]
+    return ' '.join(part for part in parts if part)
+
+
+def query_terms(query):
+    """
+    Quebra a pesquisa em termos normalizados.
+    Termos sem letras (CPF, telefone) viram só dígitos: "123.456-78" -> "12345678".
+    """
+    terms = []
+    for term in normalize(query).split():
+        if not any(c.isalpha() for c in term):
+            term = digits(term)
+        if term:
+            terms.append(term)
+    return terms
+
+
+def trigrams(text):
+    """Trigramas internos: um termo contido no texto tem todos os seus no texto."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class GuestSearchIndex:
+    """
+    Índice invertido de trigramas em memória (fallback sem pg_trgm).
+    Uma pesquisa cruza as listas de trigramas dos termos e só confere
+    substring nos candidatos: o custo não cresce com a tabela inteira.
+
+    Cada processo tem o seu índice; a versão no cache avisa os outros
+    processos que algo mudou. Cada versão guarda no cache o hóspede alterado:
+    quem ficou para trás relê só esses (uma query), sem reconstruir tudo.
+    Reconstrução completa só na primeira pesquisa do processo, após invalidate()
+    ou se o log de alterações se perdeu (ex.: expirou no cache).
+    """
+    VERSION_KEY = 'guests:search-index:version'
+    CHANGE_KEY = 'guests:search-index:change:{version}'
+    CHANGE_TIMEOUT = 24 * 60 * 60
+    MAX_REPLAY = 1000  # Mais alterações que isso: sai mais barato reconstruir
+    FULL = '*'  # Alteração "tudo": bulk_create/update() sem signals
+    MAX_RESULTS = 500  # Suficiente para a paginação da pesquisa
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._texts = {}
+        self._postings = {}
+        self._version = None
+
+    @staticmethod
+    def _current_version():
+        return cache.get(GuestSearchIndex.VERSION_KEY, 0)
+
+    def _rebuild(self, version):
+        from .models import Guest
+
+        self._texts = {}
+        self._postings = {}
+        for pk, text in Guest.objects.values_list('pk', 'search_text').iterator(chunk_size=5000):
+            self._add(pk, text)
+        self._version = version
+
+    def _add(self, pk, text):
+        self._texts[pk] = text
+        for gram in trigrams(text):
+            self._postings.setdefault(gram, set()).add(pk)
+
+    def _remove(self, pk):
+        text = self._texts.pop(pk, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            ids = self._postings.get(gram)
+            if ids:
+                ids.discard(pk)
+
+    def _bump_version(self, change):
+        try:
+            version = cache.incr(self.VERSION_KEY)
+        except ValueError:
+            version = 1
+            cache.set(self.VERSION_KEY, version, None)
+        cache.set(self.CHANGE_KEY.format(version=version), change, self.CHANGE_TIMEOUT)
+        return version
+
+    def _catch_up(self, version):
+        """Aplica as alterações das versões que este processo ainda não viu."""
+        from .models import Guest
+
+        behind = version - (self._version or 0)
+        if self._version is None or not 0 < behind <= self.MAX_REPLAY:
+            self._rebuild(version)
+            return
+        keys = [self.CHANGE_KEY.format(version=v) for v in range(self._version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys) or self.FULL in changes.values():
+            self._rebuild(version)
+            return
+
+        pks = {uuid.UUID(pk) for pk in changes.values()}
+        for pk in pks:
+            self._remove(pk)
+        for pk, text in Guest.objects.filter(pk__in=pks).values_list('pk', 'search_text'):
+            self._add(pk, text)  # Excluídos não voltam
+        self._version = version
+
+    def invalidate(self):
+        """Após bulk_create/update() (sem signals): todos os processos reconstroem."""
+        with self._lock:
+            self._bump_version(self.FULL)
+
+    def changed(self, pk, text=None):
+        """Chamado pelos signals: atualiza este processo e avisa os outros."""
+        with self._lock:
+            in_sync = self._version is not None and self._version == self._current_version()
+            version = self._bump_version(str(pk))
+            if in_sync:
+                self._remove(pk)
+                if text is not None:
+                    self._add(pk, text)
+                self._version = version
+
+    def search(self, terms):
+        """Ids dos hóspedes que contêm todos os termos, do mais relevante ao menos."""
+        with self._lock:
+            version = self._current_version()
+            if self._version != version:
+                self._catch_up(version)
+
+            # Termos curtos ("jo") não têm trigramas: só a conferência final vale
+            grams = set().union(*(trigrams(term) for term in terms))
+            candidates = None
+            for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+                ids = self._postings.get(gram, set())
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+
+            if candidates is None:
+                candidates = self._texts.keys()
+
+            texts = self._texts
+            matches = (pk for pk in candidates if all(term in texts[pk] for term in terms))
+            best = heapq.nlargest(
+                self.MAX_RESULTS, matches,
+                key=lambda pk: (_rank(texts[pk], terms[0]), -len(texts[pk])),
+            )
+        return best
+
+
+def _rank(text, term):
+    # 2 = começa pelo termo (nome), 1 = alguma palavra começa pelo termo, 0 = contém
+    if text.startswith(term):
+        return 2
+    return 1 if f' {term}' in text else 0
+
+
+search_index = GuestSearchIndex()
+
+
+class GuestSearchService:
+    @staticmethod
+    def search(queryset, query):
+        """
+        Filtra e ordena por relevância. Sem termos, devolve o queryset intacto.
+        No fallback em memória devolve um RankedGuests (fatiável, como o queryset).
+        Nos dois casos no máximo GuestSearchIndex.MAX_RESULTS: a paginação da busca é
+        por posição (OFFSET) e não desce além disso.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return queryset
+
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import TrigramSimilarity
+
+            condition = Q()
+            for term in terms:
+                condition &= Q(search_text__contains=term)
+            first = terms[0]
+            return queryset.filter(condition).annotate(
+                search_rank=Case(
+                    When(search_text__startswith=first, then=Value(2)),
+                    When(search_text__contains=f' {first}', then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                similarity=TrigramSimilarity('search_text', ' '.join(terms)),
+            ).order_by('-search_rank', '-similarity', 'name')[:GuestSearchIndex.MAX_RESULTS]
+
+        return RankedGuests(queryset, search_index.search(terms))
+
+
+class RankedGuests:
+    """
+    Resultado do índice em memória, já ranqueado.
+    Funciona com o Paginator: só a fatia da página vai ao banco (in_bulk).
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def count(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        ids = self.ids[index]
+        found = self.queryset.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
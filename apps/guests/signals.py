@@ -0,0 +1,19 @@
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Guest
+from .search import search_index
+
+
+# O índice em memória só é usado fora do Postgres (lá o pg_trgm cuida da busca)
+@receiver(post_save, sender=Guest)
+def guest_saved(sender, instance, **kwargs):
+    if connection.vendor != 'postgresql':
+        search_index.changed(instance.pk, instance.search_text)
+
+
+@receiver(post_delete, sender=Guest)
+def guest_deleted(sender, instance, **kwargs):
+    if connection.vendor != 'postgresql':
+        search_index.changed(instance.pk)
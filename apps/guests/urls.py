@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path('', views.guest_list, name='guest_list'),
     path('create/', views.guest_create, name='guest_create'),
+    path('options/', views.guest_options, name='guest_options'),
     path('<uuid:guest_id>/', views.guest_detail, name='guest_detail'),
 ]
@@ -1,12 +1,14 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Count, Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from apps.bookings.forms import QuickBookingForm
+from apps.core.pagination import CursorPaginator
+
 from .forms import GuestForm
 from .models import Guest
+from .search import GuestSearchService, query_terms
 
 
 @login_required
@@ -16,34 +18,46 @@ def guest_list(request):
     """
     query = request.GET.get("q", "")
 
-    # Otimização: prefetch para evitar queries N+1 se precisar acessar dados relacionados
-    guests = Guest.objects.annotate(
-        stays_count=Count("bookings"),
-    ).order_by("-created_at")
-
-    if query:
-        guests = guests.filter(
-            Q(name__icontains=query)
-            | Q(email__icontains=query)
-            | Q(document__icontains=query)
-        )
+    # Busca pelo campo normalizado (índice de trigramas), já ordenada por relevância.
+    # stays_count é o resumo desnormalizado em Guest: nenhum JOIN com bookings.
+    guests = GuestSearchService.search(Guest.objects.order_by("-created_at"), query)
 
-    paginator = Paginator(guests, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Sem pesquisa: cursor por (created_at, id). Com pesquisa a ordem é a do
+    # ranking e o cursor é só a posição; a busca devolve no máximo
+    # GuestSearchIndex.MAX_RESULTS, então o OFFSET nunca passa disso.
+    ordering = None if query_terms(query) else ("-created_at", "-id")
+    page = CursorPaginator(guests, ordering, per_page=10).page(request.GET.get("cursor"))
 
     # LÓGICA CORRIGIDA PARA SPA (HX-BOOST)
-    # Só retornamos o HTML parcial (linhas da tabela) se o alvo for especificamente a tabela.
+    # Só retornamos o HTML parcial (linhas da tabela) se o alvo for a tabela
+    # (pesquisa) ou a linha "Carregar mais".
     # Se for uma navegação do menu (hx-boost), retornamos a página completa.
-    if (
-        request.headers.get("HX-Request")
-        and request.headers.get("HX-Target") == "guest-table-body"
+    if request.headers.get("HX-Request") and request.headers.get("HX-Target") in (
+        "guest-table-body",
+        "load-more-row",
     ):
         return render(
-            request, "guests/partials/guest_table_rows.html", {"page_obj": page_obj}
+            request,
+            "guests/partials/guest_table_rows.html",
+            {"page": page, "query": query},
         )
 
-    return render(request, "guests/guest_list.html", {"page_obj": page_obj})
+    return render(request, "guests/guest_list.html", {"page": page, "query": query})
+
+
+@login_required
+def guest_options(request):
+    """
+    <option>s do select de hóspedes (Reserva Rápida), pela mesma busca da lista.
+    Sempre limitado: a tabela inteira nunca vai para o HTML.
+    """
+    query = request.GET.get("guest_q", "")
+    guests = GuestSearchService.search(Guest.objects.order_by("-created_at"), query)
+    return render(
+        request,
+        "guests/partials/guest_options.html",
+        {"guests": guests[:QuickBookingForm.GUEST_CHOICES]},
+    )
 
 
 @login_required
@@ -74,7 +88,8 @@ def guest_detail(request, guest_id):
     Ficha completa do hóspede (Histórico).
     """
     guest = get_object_or_404(Guest, pk=guest_id)
-    bookings = guest.bookings.all().order_by("-created_at")
+    # Totais e saldo vêm do ledger gravado em cada reserva (sem subqueries)
+    bookings = guest.bookings.prefetch_related("allocations__room").order_by("-created_at")
     return render(
         request, "guests/guest_detail.html", {"guest": guest, "bookings": bookings}
     )
@@ -0,0 +1,19 @@
+"""
+Benchmarks dos caminhos quentes (motor de reservas, relatórios financeiros e painéis).
+
+Rode com:  python manage.py benchmark [--baseline resultados-anteriores.json]
+Os dados vêm do banco atual: gere antes com  python manage.py generate_hotel
+
+Cada benchmark é uma função que recebe o Context e executa UMA operação;
+o runner repete, mede e desfaz tudo o que ela gravou (savepoint).
+"""
+
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=20):
+    """Registra a função como benchmark `name` (repeat = execuções medidas)."""
+    def register(function):
+        BENCHMARKS[name] = (function, repeat)
+        return function
+    return register
@@ -0,0 +1,40 @@
+from django.core.exceptions import ValidationError
+
+from apps.bookings.models import RoomAllocation
+from apps.bookings.occupancy import OccupancyGrid
+from apps.bookings.services import create_booking_safely
+
+from . import benchmark
+
+
+@benchmark('booking.create_booking_safely', repeat=50)
+def create_booking(context):
+    # Quarto livre: caminho completo (checagem com lock, reserva, alocação, ledger)
+    create_booking_safely(context.guest, context.free_room, context.free_start, context.free_end, context.user)
+
+
+@benchmark('booking.allocation_clean.conflict', repeat=50)
+def allocation_conflict(context):
+    busy = context.busy
+    allocation = RoomAllocation(
+        booking=busy.booking, room=busy.room, start_date=busy.start_date, end_date=busy.end_date
+    )
+    try:
+        allocation.clean()
+    except ValidationError:
+        return
+    raise AssertionError("Conflito não detectado.")
+
+
+@benchmark('booking.allocation_clean.free', repeat=50)
+def allocation_free(context):
+    RoomAllocation(
+        booking=context.busy.booking, room=context.free_room,
+        start_date=context.free_start, end_date=context.free_end,
+    ).clean()
+
+
+@benchmark('booking.calendar_grid.30d', repeat=10)
+def calendar_grid(context):
+    # Agenda inteira (todos os quartos) numa janela de 30 dias
+    OccupancyGrid(context.rooms, context.today, 30).build()
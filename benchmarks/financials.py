@@ -0,0 +1,11 @@
+from decimal import Decimal
+
+from apps.financials.services import CashierService
+
+from . import benchmark
+
+
+@benchmark('cashier.close_session', repeat=20)
+def close_session(context):
+    # Turno com mais lançamentos do dataset (fechamento = soma de tudo do turno)
+    CashierService.close_session(context.reopened_session(), Decimal('0.00'))
@@ -0,0 +1,173 @@
+import copy
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.accommodations.models import Room
+from apps.accommodations.services import RoomStatusService
+from apps.bookings.availability import AvailabilityService
+from apps.bookings.models import Booking, RoomAllocation
+from apps.core.models import User
+from apps.financials.models import CashRegisterSession, Transaction
+from apps.financials.services import CashierService
+from apps.guests.models import Guest
+from apps.guests.search import search_index
+
+from . import BENCHMARKS, bookings, financials, views  # noqa: F401 (importar registra os benchmarks)
+
+
+class Context:
+    """Objetos do dataset usados pelos benchmarks (escolhidos uma vez, sempre os mesmos)."""
+
+    def __init__(self):
+        self.today = timezone.localdate()
+        self.user = User.objects.create_user(
+            'benchmark@example.com', None, role=User.Roles.MANAGER, is_staff=True
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.rooms = list(Room.objects.select_related('category').order_by('number'))
+        self.guest = Guest.objects.filter(stays_count__gt=0).order_by('pk').first()
+        self.search_term = self.guest.name.split()[0]
+
+        # Período longe do dataset gerado: sempre livre
+        self.free_start = self.today + timedelta(days=400)
+        self.free_end = self.free_start + timedelta(days=3)
+        self.free_room = AvailabilityService.free_rooms(self.free_start, self.free_end).order_by('number').first()
+
+        # Estadia futura ativa: alvo do teste de conflito
+        self.busy = RoomAllocation.objects.filter(
+            is_active=True, start_date__gte=self.today
+        ).select_related('room__category', 'booking').order_by('start_date', 'id').first()
+
+        # Turno fechado com mais lançamentos (pior caso do fechamento)
+        session_id = Transaction.objects.filter(
+            session__status=CashRegisterSession.Status.CLOSED
+        ).values('session').annotate(n=Count('id')).order_by('-n').values_list('session', flat=True).first()
+        self.session = CashRegisterSession.objects.get(pk=session_id)
+
+    def reopened_session(self):
+        """O turno reaberto (no banco, dentro do savepoint do benchmark) e a cópia em memória."""
+        CashRegisterSession.objects.filter(pk=self.session.pk).update(status=CashRegisterSession.Status.OPEN)
+        session = copy.copy(self.session)
+        session.status = CashRegisterSession.Status.OPEN
+        return session
+
+
+def dataset():
+    return {
+        'rooms': Room.objects.count(),
+        'guests': Guest.objects.count(),
+        'bookings': Booking.objects.count(),
+        'transactions': Transaction.objects.count(),
+    }
+
+
+def run(names=None, repeat=None, log=print):
+    """
+    Executa os benchmarks (todos ou `names`) e devolve {nome: estatísticas em ms}.
+    Tudo roda numa transação desfeita no final; cada execução num savepoint desfeito.
+    """
+    selected = {name: BENCHMARKS[name] for name in sorted(BENCHMARKS) if not names or name in names}
+    results = {}
+    context = None
+    try:
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            context = Context()
+            for name, (function, default_repeat) in selected.items():
+                timings = _measure(function, context, repeat or default_repeat)
+                results[name] = _stats(timings)
+                log(f"  {name:<40} {results[name]['median_ms']:>9.2f} ms  (p95 {results[name]['p95_ms']:.2f})")
+            transaction.set_rollback(True)
+    finally:
+        # Caches/índice em memória podem ter visto dados da transação desfeita
+        search_index.invalidate()
+        RoomStatusService.invalidate()
+        if context:
+            CashierService.forget_session(context.user.pk)
+    return results
+
+
+def _measure(function, context, repeat):
+    timings = []
+    for i in range(repeat + 1):
+        with transaction.atomic():
+            started = time.perf_counter()
+            function(context)
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        if i:  # A primeira é aquecimento (caches, templates compilados)
+            timings.append(elapsed * 1000)
+    return timings
+
+
+def _stats(timings):
+    ordered = sorted(timings)
+    median = statistics.median(ordered)
+    return {
+        'runs': len(ordered),
+        'median_ms': round(median, 3),
+        'min_ms': round(ordered[0], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'ops_per_s': round(1000 / median, 1) if median else None,
+    }
+
+
+def report(results):
+    """Documento JSON de uma execução (resultados + de onde vieram)."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created_at': timezone.now().isoformat(),
+        'commit': commit,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'dataset': dataset(),
+        'results': results,
+    }
+
+
+# Abaixo disso a diferença é ruído (operações de 1-2 ms oscilam dezenas de %)
+MIN_REGRESSION_MS = 1.0
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compara a mediana de cada benchmark com a do baseline.
+    Devolve [(nome, mediana atual, mediana baseline, variação)] e os nomes que pioraram além da tolerância.
+    """
+    rows, regressions = [], []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous.get('median_ms'):
+            continue
+        change = current['median_ms'] / previous['median_ms'] - 1
+        rows.append((name, current['median_ms'], previous['median_ms'], change))
+        if change > tolerance and current['median_ms'] - previous['median_ms'] > MIN_REGRESSION_MS:
+            regressions.append(name)
+    return rows, regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save(path, document):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2, ensure_ascii=False)
@@ -0,0 +1,42 @@
+from django.urls import reverse
+
+from . import benchmark
+
+
+def get(context, url, params=None):
+    response = context.client.get(url, params or {})
+    if response.status_code != 200:
+        raise AssertionError(f"{url} respondeu {response.status_code}.")
+    return response
+
+
+@benchmark('view.dashboard')
+def dashboard(context):
+    get(context, reverse('dashboard'))
+
+
+@benchmark('view.booking_calendar.rows', repeat=10)
+def booking_calendar_rows(context):
+    room = context.rooms[0]
+    get(context, reverse('booking_calendar_rows'), {'floor': room.floor, 'offset': 0, 'days': 30})
+
+
+def _financial_dashboard(period):
+    @benchmark(f'view.financial_dashboard.{period}')
+    def run(context):
+        get(context, reverse('financial_dashboard'), {'period': period})
+    return run
+
+
+for _period in ('30days', 'month', 'year'):
+    _financial_dashboard(_period)
+
+
+@benchmark('view.guest_list.search')
+def guest_list_search(context):
+    get(context, reverse('guest_list'), {'q': context.search_term})
+
+
+@benchmark('view.guest_list.page')
+def guest_list_page(context):
+    get(context, reverse('guest_list'))
@@ -3,6 +3,12 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Necessário para as atualizações ao vivo (SSE) dos quartos, por exemplo:
+    uvicorn config.asgi:application --workers 4
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
+Com mais de um worker, configure REDIS_URL para os eventos chegarem a todos.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -11,6 +17,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Em produção, isso garante que usemos as configurações certas
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
 
 application = get_asgi_application()
@@ -89,6 +89,26 @@ DATABASES = {
     "default": dj_database_url.config(default=config("DATABASE_URL"), conn_max_age=600)
 }
 
+# --- CACHE ---
+# Em produção com vários workers, use um cache compartilhado (REDIS_URL),
+# senão cada processo tem o seu e a invalidação por signals fica local.
+# (RedisCache exige o pacote `redis` instalado.)
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "hotel-lux",
+        }
+    }
+
 # --- SENHAS E AUTH ---
 AUTH_PASSWORD_VALIDATORS = [
     {